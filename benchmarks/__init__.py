@@ -0,0 +1 @@
+"""Micro-benchmarks run against a throwaway test database: ``python -m benchmarks.<name>``."""
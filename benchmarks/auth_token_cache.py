@@ -0,0 +1,51 @@
+"""Compares DRF TokenAuthentication with CachedTokenAuthentication on the same token.
+
+Usage: python -m benchmarks.auth_token_cache [--iterations N]
+"""
+
+import argparse
+from benchmarks.common import measure, report, setup_django, test_database
+
+
+def run(iterations: int) -> dict:
+    from django.db import connection
+    from django.contrib.auth.models import User
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.request import Request
+    from quests.authentication import CachedTokenAuthentication
+
+    user = User.objects.create_user(username="bench", password="password")
+    token = Token.objects.create(user=user)
+    request = Request(RequestFactory().get("/api/quests/", HTTP_AUTHORIZATION=f"Token {token.key}"))
+
+    results = {}
+    for name, authentication in (("token", TokenAuthentication()), ("cached_token", CachedTokenAuthentication())):
+        authentication.authenticate(request)  # прогрев: первый вызов кладёт токен в кеш
+        with CaptureQueriesContext(connection) as ctx:
+            authentication.authenticate(request)
+        results[name] = {
+            "queries_per_request": len(ctx.captured_queries),
+            **measure(lambda: authentication.authenticate(request), iterations),
+        }
+
+    results["saved_queries_per_request"] = (
+        results["token"]["queries_per_request"] - results["cached_token"]["queries_per_request"]
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        report(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
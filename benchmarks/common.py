@@ -0,0 +1,62 @@
+import json
+import math
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+import django
+
+
+def setup_django() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "quest_service.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database() -> Iterator[None]:
+    """Creates the test database (as pytest would) so benchmarks never touch db.sqlite3."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(sorted_timings: list[float], share: float) -> float:
+    # Nearest-rank: наименьшее значение, не меньше которого share всех замеров
+    index = max(math.ceil(len(sorted_timings) * share) - 1, 0)
+    return round(sorted_timings[index], 3)
+
+
+def latency_summary(timings: list[float]) -> dict[str, float | None]:
+    """mean/p50/p95/p99 of latencies given in milliseconds."""
+    if not timings:
+        return {"mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    timings = sorted(timings)
+    return {
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "p99_ms": percentile(timings, 0.99),
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int) -> dict[str, float]:
+    """Runs func `iterations` times and returns latency percentiles in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"iterations": iterations, **latency_summary(timings)}
+
+
+def report(results: dict[str, Any]) -> None:
+    print(json.dumps(results, indent=2, sort_keys=True))
@@ -0,0 +1,152 @@
+"""Concurrent writers against each database profile: lock-error rate and write latency.
+
+Mimics gthread traffic: WRITER threads create/start/complete quests (the
+`complete` path writes the quest, an achievement and an image job in one
+transaction) while one thread plays the scheduler's bulk expiry UPDATE.
+Every profile runs in its own process, because the database settings are
+read once at startup.
+
+Usage: python -m benchmarks.concurrent_writers [--threads 8] [--cycles 50] [--postgres]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.common import latency_summary, report, setup_django, test_database
+
+PROFILES = {
+    "sqlite-default": {"DATABASE_ENGINE": "sqlite", "SQLITE_TUNED": "False", "CONN_MAX_AGE": "0"},
+    "sqlite-tuned": {"DATABASE_ENGINE": "sqlite", "SQLITE_TUNED": "True", "CONN_MAX_AGE": "60"},
+    "postgres": {"DATABASE_ENGINE": "postgres", "SERVER_MODE": "wsgi", "CONN_MAX_AGE": "60"},
+}
+
+
+def run_profile(threads: int, cycles: int) -> dict:
+    from datetime import timedelta
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection, transaction
+    from django.utils import timezone
+    from quests.expiry import expire_quests
+    from quests.jobs import enqueue_image_job
+    from quests.models import Achievement, Quest
+
+    users = [User.objects.create_user(username=f"writer{i}", password="password") for i in range(threads)]
+    latencies: list[float] = []
+    errors = {"lock": 0, "other": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def timed(operation) -> None:
+        started = time.perf_counter()
+        try:
+            operation()
+        except OperationalError as e:
+            with lock:
+                errors["lock" if "locked" in str(e) else "other"] += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    def complete(quest: Quest) -> None:
+        with transaction.atomic():
+            quest.mark_completed()
+            quest.save()
+            achievement = Achievement.objects.create(user=quest.user, quest=quest, name=quest.planned_achievement_name)
+            enqueue_image_job(achievement)
+
+    def writer(user: User) -> None:
+        try:
+            for i in range(cycles):
+                quest = Quest(user=user, title=f"Quest {i}", planned_achievement_name="Bench")
+                timed(quest.save)
+                if quest.pk is None:
+                    continue
+                quest.mark_started(60)
+                timed(quest.save)
+                timed(lambda: complete(quest))
+        finally:
+            connection.close()
+
+    def scheduler(user: User) -> None:
+        try:
+            while not stop.is_set():
+                overdue = timezone.now() - timedelta(minutes=1)
+                batch = [
+                    Quest(user=user, title="Overdue", planned_achievement_name="N/A", status="active", end_time=overdue)
+                    for _ in range(50)
+                ]
+                timed(lambda: Quest.objects.bulk_create(batch))
+                timed(expire_quests)
+                time.sleep(0.01)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=writer, args=(user,)) for user in users]
+    expiry = threading.Thread(target=scheduler, args=(users[0],))
+    started = time.perf_counter()
+    expiry.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    expiry.join()
+    elapsed = time.perf_counter() - started
+
+    attempts = len(latencies) + errors["lock"] + errors["other"]
+    return {
+        "threads": threads,
+        "writes": attempts,
+        "lock_errors": errors["lock"],
+        "other_errors": errors["other"],
+        "lock_error_rate": round(errors["lock"] / attempts, 4) if attempts else 0.0,
+        "writes_per_second": round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies),
+    }
+
+
+def run_worker(threads: int, cycles: int) -> None:
+    setup_django()
+    from django.db import connection
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == "sqlite":
+            # Блокировки возникают только на файловой базе, in-memory тестовая база их не покажет
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tmp, "bench.sqlite3")
+        with test_database():
+            print(json.dumps(run_profile(threads, cycles)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=50, help="create/start/complete cycles per writer thread")
+    parser.add_argument("--postgres", action="store_true", help="also run the Postgres profile (POSTGRES_* env)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.threads, args.cycles)
+        return
+
+    results = {}
+    for name, env in PROFILES.items():
+        if name == "postgres" and not args.postgres:
+            continue
+        command = [sys.executable, "-m", "benchmarks.concurrent_writers", "--worker"]
+        command += ["--threads", str(args.threads), "--cycles", str(args.cycles)]
+        completed = subprocess.run(command, env={**os.environ, **env}, capture_output=True, text=True)
+        if completed.returncode != 0:
+            results[name] = {"error": completed.stderr.strip().splitlines()[-1:]}
+            continue
+        results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
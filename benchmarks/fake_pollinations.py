@@ -0,0 +1,132 @@
+"""Local stand-in for the Pollinations image API, for load tests.
+
+Answers GET /image/<prompt>?seed=... with a PNG after a configurable delay,
+and fails a configurable share of requests with 500 (or 429). Point the app
+at it with POLLINATIONS_BASE_URL=http://127.0.0.1:<port>/image.
+
+Usage: python -m benchmarks.fake_pollinations [--port 8090] [--latency 0.5] [--failure-rate 0.05]
+"""
+
+import argparse
+import io
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from PIL import Image
+
+
+@lru_cache(maxsize=64)
+def render_png(seed: int, size: int) -> bytes:
+    # Цвет зависит от seed: разные seed дают разные файлы, как у настоящего API
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size, size), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakePollinationsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.5,
+        jitter: float = 0.2,
+        failure_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        image_size: int = 1024,
+    ) -> None:
+        super().__init__(address, FakePollinationsHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.image_size = image_size
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/image"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="fake-pollinations", daemon=True)
+        thread.start()
+        return thread
+
+
+class FakePollinationsHandler(BaseHTTPRequestHandler):
+    server: FakePollinationsServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server._lock:
+            server.requests += 1
+
+        url = urlsplit(self.path)
+        if not url.path.startswith("/image/"):
+            self._reply(404, b"not found", "text/plain")
+            return
+
+        time.sleep(max(server.latency + random.uniform(-server.jitter, server.jitter), 0))
+        roll = random.random()
+        if roll < server.failure_rate:
+            self._reply(500, b"upstream failure", "text/plain")
+            return
+        if roll < server.failure_rate + server.throttle_rate:
+            self._reply(429, b"slow down", "text/plain", {"Retry-After": "1"})
+            return
+
+        seed = parse_qs(url.query).get("seed", ["0"])[0]
+        body = render_png(int(seed) if seed.isdigit() else 0, server.image_size)
+        self._reply(200, body, "image/png")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _reply(self, code: int, body: bytes, content_type: str, headers: dict[str, str] | None = None) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response delay in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Uniform +/- jitter in seconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--image-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    server = FakePollinationsServer(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        image_size=args.image_size,
+    )
+    print(f"Fake Pollinations listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Concurrent regenerate_image calls against a slow image API: gthread WSGI vs. ASGI.
+
+Spawns the app (see load_test.spawned_app) in each --servers mode against a
+fake Pollinations server with --latency seconds per image, completes
+--concurrency quests and then fires one regenerate_image per achievement at
+once. Under gunicorn gthread every call holds one of workers x threads
+threads for the whole upstream round-trip; under uvicorn the async view
+awaits it, so all calls are in flight together.
+
+Usage: python -m benchmarks.image_concurrency [--concurrency 100] [--latency 2] [--servers gunicorn uvicorn]
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+import requests
+from benchmarks.fake_pollinations import FakePollinationsServer
+from benchmarks.load_test import SERVER_COMMANDS, Recorder, VirtualUser, spawned_app
+
+LABEL = "POST /api/achievements/{id}/regenerate_image/"
+
+
+def completed_achievements(base_url: str, count: int) -> tuple[dict[str, str], list[int]]:
+    """Signs up a user and completes `count` quests; returns its auth headers and achievement ids."""
+    setup = VirtualUser(base_url, f"images-{uuid.uuid4().hex[:8]}", Recorder(), think_time=0)
+    if not setup.sign_up():
+        raise RuntimeError("Could not sign up the benchmark user")
+
+    achievement_ids = []
+    for index in range(count):
+        quest = {"title": f"Image quest {index}", "planned_achievement_name": f"Image {index}", "difficulty": "hard"}
+        quest_id = setup.request("POST", "create", "/api/quests/", json=quest).json()["id"]
+        setup.request("POST", "start", f"/api/quests/{quest_id}/start/", json={})
+        response = setup.request("POST", "complete", f"/api/quests/{quest_id}/complete/")
+        achievement_ids.append(response.json()["quest"]["achievement"]["id"])
+    return dict(setup.session.headers), achievement_ids
+
+
+def regenerate_all(base_url: str, headers: dict[str, str], achievement_ids: list[int]) -> dict[str, Any]:
+    recorder = Recorder()
+    barrier = threading.Barrier(len(achievement_ids))
+
+    def regenerate(achievement_id: int) -> None:
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{base_url}/api/achievements/{achievement_id}/regenerate_image/", headers=headers, timeout=300
+            )
+            status = str(response.status_code)
+        except requests.RequestException as e:
+            status = type(e).__name__
+        recorder.record(LABEL, (time.perf_counter() - started) * 1000, status)
+
+    threads = [threading.Thread(target=regenerate, args=(achievement_id,)) for achievement_id in achievement_ids]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return {**recorder.summary(elapsed)["endpoints"][LABEL], "wall_s": round(elapsed, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=100, help="Simultaneous regenerate_image calls.")
+    parser.add_argument("--latency", type=float, default=2.0, help="Fake image API latency, seconds.")
+    # Маленькие картинки, чтобы время уходило на ожидание апстрима, а не на построение превью
+    parser.add_argument("--image-size", type=int, default=128)
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVER_COMMANDS), default=["gunicorn", "uvicorn"])
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    fake = FakePollinationsServer(latency=args.latency, jitter=0, image_size=args.image_size)
+    fake.start()
+    results: dict[str, Any] = {}
+    try:
+        for server in args.servers:
+            with spawned_app(server, fake.base_url, image_workers=1) as base_url:
+                headers, achievement_ids = completed_achievements(base_url, args.concurrency)
+                results[server] = regenerate_all(base_url, headers, achievement_ids)
+    finally:
+        fake.shutdown()
+        fake.server_close()
+
+    results["meta"] = {
+        "concurrency": args.concurrency,
+        "fake_image_api_latency_s": args.latency,
+        "image_size": args.image_size,
+    }
+    report = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""End-to-end load test of the register -> create -> start -> complete -> regenerate flow.
+
+By default spawns the real app on a fresh SQLite database (plus the image
+worker pool) and a fake Pollinations server, then drives it with --users
+virtual users for --duration seconds. With --target it drives an already
+running deployment instead (that one must be pointed at a fake server itself).
+
+Prints (or writes to --output) JSON with requests/s and p50/p95/p99 per
+endpoint; keys are sorted so results of two releases diff cleanly.
+
+Usage: python -m benchmarks.load_test [--users 20] [--duration 30] [--server gunicorn] [--output run.json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+import requests
+from benchmarks.common import latency_summary
+from benchmarks.fake_pollinations import FakePollinationsServer
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SERVER_COMMANDS = {
+    "runserver": ["{python}", "manage.py", "runserver", "--noreload", "127.0.0.1:{port}"],
+    "gunicorn": [
+        "gunicorn", "quest_service.wsgi:application", "--bind", "127.0.0.1:{port}",
+        "--workers", "2", "--threads", "4", "--worker-class", "gthread",
+    ],
+    "uvicorn": [
+        "gunicorn", "quest_service.asgi:application", "--bind", "127.0.0.1:{port}",
+        "--workers", "2", "--worker-class", "uvicorn_worker.UvicornWorker",
+    ],
+}
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and status code log."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label: str, elapsed_ms: float, status: str) -> None:
+        with self._lock:
+            self.timings[label].append(elapsed_ms)
+            self.statuses[label][status] += 1
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        endpoints = {}
+        for label, timings in self.timings.items():
+            statuses = dict(self.statuses[label])
+            errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+            endpoints[label] = {
+                "requests": len(timings),
+                "errors": errors,
+                "rps": round(len(timings) / elapsed, 2),
+                "status_codes": statuses,
+                **latency_summary(timings),
+            }
+        all_timings = [timing for timings in self.timings.values() for timing in timings]
+        total = {
+            "requests": len(all_timings),
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+            "rps": round(len(all_timings) / elapsed, 2),
+            **latency_summary(all_timings),
+        }
+        return {"endpoints": endpoints, "total": total}
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, username: str, recorder: Recorder, think_time: float) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.recorder = recorder
+        self.think_time = think_time
+        self.session = requests.Session()
+
+    def request(self, method: str, label: str, path: str, **kwargs: Any) -> requests.Response | None:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=120, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.record(label, (time.perf_counter() - started) * 1000, type(e).__name__)
+            return None
+        self.recorder.record(label, (time.perf_counter() - started) * 1000, str(response.status_code))
+        return response
+
+    def sign_up(self) -> bool:
+        credentials = {"username": self.username, "password": "load-test-password"}
+        self.request("POST", "POST /api/register/", "/api/register/", json=credentials)
+        response = self.request("POST", "POST /api-token-auth/", "/api-token-auth/", json=credentials)
+        if response is None or response.status_code != 200:
+            return False
+        self.session.headers["Authorization"] = f"Token {response.json()['token']}"
+        return True
+
+    def run_flow(self, iteration: int) -> None:
+        quest = {
+            "title": f"Load quest {iteration}",
+            "description": "Generated by benchmarks.load_test",
+            "planned_achievement_name": f"Load achievement {iteration}",
+            "difficulty": "medium",
+        }
+        response = self.request("POST", "POST /api/quests/", "/api/quests/", json=quest)
+        if response is None or response.status_code != 201:
+            return
+        quest_id = response.json()["id"]
+
+        self.pause()
+        self.request("POST", "POST /api/quests/{id}/start/", f"/api/quests/{quest_id}/start/", json={})
+        self.pause()
+        response = self.request("POST", "POST /api/quests/{id}/complete/", f"/api/quests/{quest_id}/complete/")
+        self.pause()
+        self.request("GET", "GET /api/quests/", "/api/quests/")
+
+        achievement = response.json()["quest"].get("achievement") if response and response.status_code == 200 else None
+        if achievement:
+            self.pause()
+            self.request(
+                "POST",
+                "POST /api/achievements/{id}/regenerate_image/",
+                f"/api/achievements/{achievement['id']}/regenerate_image/",
+            )
+            self.request("GET", "GET /api/achievements/", "/api/achievements/")
+
+    def pause(self) -> None:
+        if self.think_time:
+            time.sleep(self.think_time)
+
+    def run(self, deadline: float) -> None:
+        if not self.sign_up():
+            return
+        iteration = 0
+        while time.monotonic() < deadline:
+            self.run_flow(iteration)
+            iteration += 1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App server exited with code {process.returncode}")
+        try:
+            requests.get(base_url + "/api/quests/", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"App server did not answer within {timeout} s")
+
+
+@contextmanager
+def spawned_app(server: str, pollinations_url: str, image_workers: int) -> Iterator[str]:
+    """Runs migrate, the app server and the image worker pool on a throwaway database."""
+    with tempfile.TemporaryDirectory(prefix="quest-load-") as tmp, ExitStack() as stack:
+        port = free_port()
+        env = {
+            **os.environ,
+            "DJANGO_SECRET_KEY": os.environ.get("DJANGO_SECRET_KEY") or "load-test",
+            "DEBUG": "False",
+            "DATABASE_ENGINE": "sqlite",
+            "SQLITE_PATH": os.path.join(tmp, "db.sqlite3"),
+            "MEDIA_ROOT": os.path.join(tmp, "media"),
+            "IMAGE_CACHE_DIR": os.path.join(tmp, "image_cache"),
+            "POLLINATIONS_BASE_URL": pollinations_url,
+            "EXPIRY_SCHEDULER_ADDRESS": "",
+            "SERVER_MODE": "asgi" if server == "uvicorn" else "wsgi",
+        }
+        subprocess.run([sys.executable, "manage.py", "migrate", "--noinput"], cwd=BASE_DIR, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+
+        def spawn(command: list[str]) -> subprocess.Popen:
+            process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+            stack.callback(process.wait, 10)
+            stack.callback(process.terminate)
+            return process
+
+        command = [part.format(python=sys.executable, port=port) for part in SERVER_COMMANDS[server]]
+        app = spawn(command)
+        spawn([sys.executable, "manage.py", "run_image_worker", "--workers", str(image_workers),
+               "--poll-interval", "0.2"])
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_ready(base_url, app)
+        yield base_url
+
+
+def run_load(base_url: str, users: int, duration: float, think_time: float) -> dict[str, Any]:
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=VirtualUser(base_url, f"load-{run_id}-{i}", recorder, think_time).run, args=(deadline,)
+        )
+        for i in range(users)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.monotonic() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to keep starting new flows.")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between steps of a flow, seconds.")
+    parser.add_argument("--target", help="Base URL of a running deployment; skips spawning the app.")
+    parser.add_argument("--server", choices=sorted(SERVER_COMMANDS), default="runserver")
+    parser.add_argument("--image-workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake image API mean latency, seconds.")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake image API 500s.")
+    parser.add_argument("--image-size", type=int, default=1024)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    fake = FakePollinationsServer(
+        latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, image_size=args.image_size
+    )
+    fake.start()
+    try:
+        with ExitStack() as stack:
+            base_url = args.target or stack.enter_context(
+                spawned_app(args.server, fake.base_url, args.image_workers)
+            )
+            result = run_load(base_url, args.users, args.duration, args.think_time)
+    finally:
+        fake.shutdown()
+        fake.server_close()
+
+    result["meta"] = {
+        "users": args.users,
+        "duration_s": args.duration,
+        "think_time_s": args.think_time,
+        "server": "external" if args.target else args.server,
+        "fake_image_api": {"latency_s": args.latency, "jitter_s": args.jitter, "failure_rate": args.failure_rate},
+        "fake_image_api_requests": fake.requests,
+    }
+    report = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,10 @@ set -e
 
 echo "Starting deployment script..."
 
+# Gunicorn takes its worker count from WEB_CONCURRENCY; Django reads it too and then defaults to a cache
+# shared by the workers (see CACHES in quest_service/settings.py)
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-2}"
+
 # 1. Apply Database Migrations
 echo "Applying database migrations..."
 python manage.py migrate --noinput
@@ -13,16 +17,34 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+# Prometheus multiprocess mode: every process writes its metrics here, /metrics merges them
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # 3. Start Background Scheduler (Non-blocking)
 echo "Starting background scheduler..."
 python run_scheduler.py &
 SCHEDULER_PID=$!
 
-# 4. Start Gunicorn (Blocking)
-echo "Starting optimized Gunicorn (2 workers, 4 threads)..."
+# 4. Start Image Worker Pool (Non-blocking)
+echo "Starting image worker pool..."
+python manage.py run_image_worker --workers 4 &
+IMAGE_WORKER_PID=$!
+
+# 5. Start Gunicorn (Blocking)
+# SERVER_MODE=asgi serves the app through uvicorn workers, so SSE streams (api/events/) don't pin a thread each
+if [ "${SERVER_MODE:-asgi}" = "asgi" ]; then
+    echo "Starting Gunicorn with Uvicorn workers (ASGI, $WEB_CONCURRENCY workers)..."
+    exec gunicorn quest_service.asgi:application \
+        --bind 0.0.0.0:8000 \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --timeout 60
+fi
+
+echo "Starting optimized Gunicorn ($WEB_CONCURRENCY workers, 4 threads)..."
 exec gunicorn quest_service.wsgi:application \
     --bind 0.0.0.0:8000 \
-    --workers 2 \
     --threads 4 \
     --worker-class gthread \
     --timeout 60
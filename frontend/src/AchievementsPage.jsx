@@ -3,12 +3,21 @@ import { useSearchParams } from 'react-router-dom';
 import api from './api';
 import { Award, RefreshCw } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { ACHIEVEMENT_RARITY_LABELS, QUEST_ACTIONS, UI_LABELS } from './constants';
+import { ACHIEVEMENT_LIST_FIELDS, ACHIEVEMENT_RARITY_LABELS, QUEST_ACTIONS, UI_LABELS } from './constants';
+
+// Builds an <img srcset> string from the server's {"128": url, "256": url, ...} map
+const toSrcSet = (renditions) => {
+    if (!renditions) return undefined;
+    const entries = Object.entries(renditions);
+    if (entries.length === 0) return undefined;
+    return entries.map(([width, url]) => `${url} ${width}w`).join(', ');
+};
 
 export const AchievementCard = React.forwardRef(({ achievement, isHighlighted }, ref) => {
     const [isExpanded, setIsExpanded] = useState(false);
     const [isRedrawing, setIsRedrawing] = useState(false);
     const [imageUrl, setImageUrl] = useState(achievement.image);
+    const [srcSet, setSrcSet] = useState(toSrcSet(achievement.image_renditions?.webp));
     const [imgError, setImgError] = useState(false);
 
     const handleRedraw = async () => {
@@ -17,12 +26,19 @@ export const AchievementCard = React.forwardRef(({ achievement, isHighlighted },
         try {
             const res = await api.post(`achievements/${achievement.id}/regenerate_image/`);
 
-            // Add a timestamp to bypass image cache
-            const newUrl = `${res.data.image}?t=${new Date().getTime()}`;
+            // Image URLs are content-versioned, so a redrawn image always has a fresh URL
+            const newUrl = res.data.image;
 
             setImgError(false);
             setImageUrl(newUrl);
+            setSrcSet(toSrcSet(res.data.image_renditions?.webp));
         } catch (err) {
+            if (err.response?.status === 429) {
+                // Server is at its limit of concurrent generations; Retry-After says when to come back
+                const retryAfter = err.response.headers['retry-after'];
+                alert(`Too many images are being drawn right now. Please try again in ${retryAfter || 'a few'} seconds.`);
+                return;
+            }
             alert('Failed to redraw achievement image. Please try again.');
         } finally {
             setIsRedrawing(false);
@@ -93,6 +109,8 @@ export const AchievementCard = React.forwardRef(({ achievement, isHighlighted },
                 {imageUrl ? (
                     <img
                         src={imageUrl}
+                        srcSet={srcSet}
+                        sizes="120px"
                         alt={achievement.name}
                         className={`w-full h-full object-cover rounded transition-opacity duration-300 ${isRedrawing ? 'opacity-30' : 'opacity-100'}`}
                         style={{ display: imgError ? 'none' : 'block' }}
@@ -197,7 +215,7 @@ const AchievementsPage = () => {
 
     const fetchAchievements = async () => {
         try {
-            const res = await api.get('achievements/');
+            const res = await api.get('achievements/', { params: { fields: ACHIEVEMENT_LIST_FIELDS } });
             setAchievements(res.data);
 
             // Allow some time for rendering before scrolling
@@ -3,7 +3,7 @@ import { Link } from 'react-router-dom';
 import api from './api';
 import { Plus, Play, CheckCircle, RefreshCcw, Clock, Target, Trash2, Award } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { DIFFICULTY_LABELS, DIFFICULTY_LEVELS, FORM_LABELS, QUEST_ACTIONS, QUEST_STATUS, TIME_LABELS, UI_LABELS } from './constants';
+import { DIFFICULTY_LABELS, DIFFICULTY_LEVELS, FORM_LABELS, QUEST_ACTIONS, QUEST_LIST_FIELDS, QUEST_STATUS, TIME_LABELS, UI_LABELS } from './constants';
 
 export const StatusBadge = ({ status }) => {
     const styles = {
@@ -20,6 +20,67 @@ export const StatusBadge = ({ status }) => {
     );
 };
 
+const IMAGE_FAILED_MESSAGE = "Quest completed! However, we couldn't generate your achievement image right now. You can try to redraw it later in the Hall of Fame.";
+
+// The image is drawn by a background job (see quests/jobs.py); poll it until it settles
+export const waitForImageJob = async (jobId, { interval = 2000, attempts = 60 } = {}) => {
+    for (let i = 0; i < attempts; i++) {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        try {
+            const res = await api.get(`image-jobs/${jobId}/`);
+            if (res.data.status === 'done' || res.data.status === 'failed') return res.data.status;
+        } catch (err) {
+            return null;
+        }
+    }
+    return null;
+};
+
+const QUEST_POLL_INTERVAL_MS = 30000;
+
+// The stream takes a short-lived ticket instead of the API token, so the token never lands in URLs and access logs.
+// EventSource stops on 204 (WSGI mode) or 401 (expired ticket); then a fresh ticket is requested.
+export const subscribeToQuestUpdates = ({ onUpdate, onUnavailable, retryDelay = 3000 }) => {
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+    let lastEventId = '';
+
+    const connect = async () => {
+        let res;
+        try {
+            res = await api.post('events/ticket/');
+        } catch (err) {
+            if (!closed) onUnavailable();
+            return;
+        }
+        if (closed) return;
+        if (res.status === 204 || !res.data?.ticket || typeof EventSource === 'undefined') {
+            onUnavailable();
+            return;
+        }
+
+        const params = new URLSearchParams({ ticket: res.data.ticket });
+        if (lastEventId) params.set('last_event_id', lastEventId);
+        source = new EventSource(`${api.defaults.baseURL}events/?${params}`);
+        source.addEventListener('quest.updated', (e) => {
+            lastEventId = e.lastEventId || lastEventId;
+            onUpdate(JSON.parse(e.data));
+        });
+        source.onerror = () => {
+            if (source.readyState !== EventSource.CLOSED || closed) return;
+            retryTimer = setTimeout(connect, retryDelay);
+        };
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        clearTimeout(retryTimer);
+        if (source) source.close();
+    };
+};
+
 export const QuestCard = ({ quest, onAction, onDelete }) => {
     const [isStarting, setIsStarting] = useState(false);
     const [isCompleting, setIsCompleting] = useState(false);
@@ -45,8 +106,14 @@ export const QuestCard = ({ quest, onAction, onDelete }) => {
         setIsCompleting(true);
         try {
             const res = await onAction(quest.id, 'complete');
-            if (res && res.data && res.data.image_generated === false) {
-                alert("Quest completed! However, we couldn't generate your achievement image right now. You can try to redraw it later in the Hall of Fame.");
+            const { image_status: imageStatus, image_job: imageJob } = res?.data || {};
+            if (imageStatus === 'failed') {
+                alert(IMAGE_FAILED_MESSAGE);
+            } else if (imageStatus === 'pending' && imageJob) {
+                // Don't hold the button in "completing" while the image renders
+                waitForImageJob(imageJob).then(status => {
+                    if (status === 'failed') alert(IMAGE_FAILED_MESSAGE);
+                });
             }
         } catch (err) {
             // Errors are handled in Dashboard or by Status refresh
@@ -252,7 +319,8 @@ const Dashboard = () => {
 
     const fetchQuests = async () => {
         try {
-            const res = await api.get('quests/');
+            // Only what the cards show: skips the nested achievement and its JOIN
+            const res = await api.get('quests/', { params: { fields: QUEST_LIST_FIELDS } });
             setQuests(sortQuests(res.data));
         } catch (err) {
             console.error('Failed to fetch quests');
@@ -265,6 +333,25 @@ const Dashboard = () => {
         fetchQuests();
     }, []);
 
+    // Live updates (expiry, transitions from other tabs); polls quests/ when the server has no stream
+    useEffect(() => {
+        if (!localStorage.getItem('token')) return undefined;
+
+        let pollTimer = null;
+        const unsubscribe = subscribeToQuestUpdates({
+            onUpdate: (update) => {
+                setQuests(prev => sortQuests(prev.map(q => (q.id === update.id ? { ...q, ...update } : q))));
+            },
+            onUnavailable: () => {
+                pollTimer = setInterval(fetchQuests, QUEST_POLL_INTERVAL_MS);
+            },
+        });
+        return () => {
+            unsubscribe();
+            clearInterval(pollTimer);
+        };
+    }, []);
+
     const handleCreate = async (e) => {
         e.preventDefault();
         try {
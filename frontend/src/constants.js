@@ -64,3 +64,7 @@ export const TIME_LABELS = {
     hours: 'Hours',
     minutes: 'Minutes'
 };
+
+// ?fields= for list requests: the server serializes only what the pages render
+export const QUEST_LIST_FIELDS = 'id,title,description,difficulty,status,start_time,end_time,created_at';
+export const ACHIEVEMENT_LIST_FIELDS = 'id,name,image,image_renditions,awarded_at,quest,quest_title,quest_description,rarity';
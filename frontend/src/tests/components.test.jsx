@@ -1,8 +1,17 @@
 import { render, screen, fireEvent } from '@testing-library/react';
 import { describe, it, expect, vi } from 'vitest';
-import { StatusBadge, QuestCard } from '../Dashboard';
+import { StatusBadge, QuestCard, subscribeToQuestUpdates, waitForImageJob } from '../Dashboard';
 import { BrowserRouter } from 'react-router-dom';
 import { DIFFICULTY_LABELS, QUEST_ACTIONS, QUEST_STATUS, TIME_LABELS, UI_LABELS, DIFFICULTY_LEVELS } from '../constants';
+import api from '../api';
+
+vi.mock('../api', () => ({
+    default: {
+        post: vi.fn(),
+        get: vi.fn(),
+        defaults: { baseURL: '/api/' },
+    }
+}));
 
 // Wrapper for components needing Router
 const renderWithRouter = (ui) => {
@@ -135,7 +144,7 @@ describe('QuestCard Completion', () => {
 
     it('shows loading state during completion', async () => {
         const onAction = vi.fn(() => new Promise(resolve => setTimeout(() => resolve({
-            data: { quest: { ...mockQuest, status: QUEST_STATUS.completed }, image_generated: true }
+            data: { quest: { ...mockQuest, status: QUEST_STATUS.completed }, image_status: 'done', image_job: null }
         }), 100)));
 
         renderWithRouter(<QuestCard quest={mockQuest} onAction={onAction} />);
@@ -156,7 +165,7 @@ describe('QuestCard Completion', () => {
 
     it('shows alert when image generation fails', async () => {
         const onAction = vi.fn().mockResolvedValue({
-            data: { quest: { ...mockQuest, status: QUEST_STATUS.completed }, image_generated: false }
+            data: { quest: { ...mockQuest, status: QUEST_STATUS.completed }, image_status: 'failed', image_job: null }
         });
 
         const alertMock = vi.spyOn(window, 'alert').mockImplementation(() => { });
@@ -173,4 +182,64 @@ describe('QuestCard Completion', () => {
 
         alertMock.mockRestore();
     });
+
+    it('shows alert when the background image job fails', async () => {
+        vi.useFakeTimers();
+        api.get.mockResolvedValue({ data: { id: 7, status: 'failed' } });
+        const onAction = vi.fn().mockResolvedValue({
+            data: { quest: { ...mockQuest, status: QUEST_STATUS.completed }, image_status: 'pending', image_job: 7 }
+        });
+        const alertMock = vi.spyOn(window, 'alert').mockImplementation(() => { });
+
+        renderWithRouter(<QuestCard quest={mockQuest} onAction={onAction} />);
+        fireEvent.click(screen.getByText(QUEST_ACTIONS.complete));
+        await vi.runAllTimersAsync();
+
+        expect(api.get).toHaveBeenCalledWith('image-jobs/7/');
+        expect(alertMock).toHaveBeenCalledWith(expect.stringContaining("couldn't generate your achievement image"));
+
+        alertMock.mockRestore();
+        vi.useRealTimers();
+    });
+
+    it('waitForImageJob resolves with the final job status', async () => {
+        api.get.mockResolvedValue({ data: { id: 8, status: 'done' } });
+
+        const status = await waitForImageJob(8, { interval: 0 });
+
+        expect(status).toBe('done');
+    });
+});
+
+describe('subscribeToQuestUpdates', () => {
+    it('falls back to polling when the server has no event stream', async () => {
+        api.post.mockResolvedValue({ status: 204, data: '' });
+        const onUnavailable = vi.fn();
+
+        subscribeToQuestUpdates({ onUpdate: vi.fn(), onUnavailable });
+
+        await vi.waitFor(() => expect(onUnavailable).toHaveBeenCalled());
+        expect(api.post).toHaveBeenCalledWith('events/ticket/');
+    });
+
+    it('opens the stream with a ticket instead of the API token', async () => {
+        const EventSourceMock = vi.fn(function () {
+            this.addEventListener = vi.fn();
+            this.close = vi.fn();
+        });
+        vi.stubGlobal('EventSource', EventSourceMock);
+        localStorage.setItem('token', 'secret-token');
+        api.post.mockResolvedValue({ status: 200, data: { ticket: 'signed-ticket' } });
+
+        const unsubscribe = subscribeToQuestUpdates({ onUpdate: vi.fn(), onUnavailable: vi.fn() });
+
+        await vi.waitFor(() => expect(EventSourceMock).toHaveBeenCalled());
+        const url = EventSourceMock.mock.calls[0][0];
+        expect(url).toBe('/api/events/?ticket=signed-ticket');
+        expect(url).not.toContain('secret-token');
+
+        unsubscribe();
+        localStorage.removeItem('token');
+        vi.unstubAllGlobals();
+    });
 });
@@ -0,0 +1,11 @@
+# Loaded by gunicorn from the working directory; command-line flags live in entrypoint.sh
+import os
+from typing import Any
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    # Drop live-gauge files of a dead worker; its counters and histograms stay in the totals
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -49,9 +49,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so request latency includes every other middleware (see /metrics)
+    "quests.metrics.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Async-capable, so ASGI requests are not pushed onto a thread by this middleware
+    "quests.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -62,7 +65,7 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "quests.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -100,13 +103,84 @@ WSGI_APPLICATION = "quest_service.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en6.0/ref/settings/#databases
 
-DATABASES = {
+# "sqlite" (default) or "postgres"; the Postgres profile needs psycopg installed
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "sqlite")
+# Under ASGI every request runs its sync code in a fresh thread, so persistent connections would leak;
+# there Postgres uses psycopg's pool instead (see https://docs.djangoproject.com/en/6.0/ref/databases/)
+SERVER_MODE = os.environ.get("SERVER_MODE", "asgi")
+CONN_MAX_AGE = int(os.environ.get("CONN_MAX_AGE", 0 if SERVER_MODE == "asgi" else 60))
+
+if DATABASE_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "quest_master"),
+            "USER": os.environ.get("POSTGRES_USER", "quest_master"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": 0 if SERVER_MODE == "asgi" else CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"pool": True} if SERVER_MODE == "asgi" else {},
+        }
+    }
+else:
+    # WAL lets readers run alongside the single writer, busy_timeout makes writers wait instead of failing
+    # with "database is locked", and IMMEDIATE transactions take the write lock up front so two writers
+    # never deadlock while upgrading a read lock (which busy_timeout cannot resolve)
+    SQLITE_TUNED = os.environ.get("SQLITE_TUNED", "True") == "True"
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": CONN_MAX_AGE,
+            "OPTIONS": (
+                {
+                    "init_command": (
+                        "PRAGMA journal_mode=WAL;"
+                        f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))};"
+                        "PRAGMA synchronous=NORMAL;"
+                        f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))};"
+                        "PRAGMA temp_store=MEMORY;"
+                    ),
+                    "transaction_mode": "IMMEDIATE",
+                }
+                if SQLITE_TUNED
+                else {}
+            ),
+        }
+    }
+
+
+# Gunicorn worker processes; gunicorn reads the same variable for its default --workers
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Cache framework: local memory for a single process; with several gunicorn workers the default is on disk,
+# so invalidations (revoked tokens, see quests/authentication.py) reach every worker
+if WEB_CONCURRENCY > 1:
+    DEFAULT_CACHE_BACKEND = "django.core.cache.backends.filebased.FileBasedCache"
+    DEFAULT_CACHE_LOCATION = str(BASE_DIR / "django_cache")
+else:
+    DEFAULT_CACHE_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+    DEFAULT_CACHE_LOCATION = "quest-master"
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": os.environ.get("CACHE_BACKEND", DEFAULT_CACHE_BACKEND),
+        "LOCATION": os.environ.get("CACHE_LOCATION", DEFAULT_CACHE_LOCATION),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000))},
     }
 }
 
+# Serialized quests/ and achievements/ payloads (see quests/response_cache.py)
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
+
+# Token -> user lookups of CachedTokenAuthentication (see quests/authentication.py); 0 disables the cache.
+# Revocations reach other workers only through a shared backend: a per-process one with several workers
+# turns the token cache off (with a warning from quests/checks.py)
+AUTH_TOKEN_CACHE_ALIAS = "default"
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get("AUTH_TOKEN_CACHE_TIMEOUT", 60))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -152,7 +226,59 @@ STATICFILES_DIRS = [
 
 # Media files (uploaded/generated images)
 MEDIA_URL = "/media/"
-MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT", BASE_DIR / "media"))
+# Offload media bodies to the front proxy: "X-Accel-Redirect" (nginx) or "X-Sendfile" (apache);
+# empty = serve from Django
+MEDIA_SENDFILE_HEADER = os.environ.get("MEDIA_SENDFILE_HEADER", "")
+# nginx `internal` location that maps onto MEDIA_ROOT (only used with X-Accel-Redirect)
+MEDIA_SENDFILE_PREFIX = os.environ.get("MEDIA_SENDFILE_PREFIX", "/protected-media/")
+
+# On-disk cache of generated achievement images, shared by all workers
+IMAGE_CACHE_DIR = Path(os.environ.get("IMAGE_CACHE_DIR", BASE_DIR / "image_cache"))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Larger upstream responses are rejected while streaming instead of being buffered in full
+IMAGE_MAX_BYTES = int(os.environ.get("IMAGE_MAX_BYTES", 16 * 1024 * 1024))
+
+# Replaced achievement images and renditions are removed by a periodic sweep in the scheduler (see quests/jobs.py),
+# never right after the swap; files younger than the grace period are kept, a worker may not have committed yet
+ORPHAN_IMAGE_GRACE_SECONDS = int(os.environ.get("ORPHAN_IMAGE_GRACE_SECONDS", 60 * 60))
+ORPHAN_IMAGE_SWEEP_INTERVAL_SECONDS = int(os.environ.get("ORPHAN_IMAGE_SWEEP_INTERVAL_SECONDS", 60 * 60))
+# Upstream generations regenerate_image may run at once in one process; beyond that it answers 429
+IMAGE_REGENERATE_MAX_IN_FLIGHT = int(os.environ.get("IMAGE_REGENERATE_MAX_IN_FLIGHT", 16))
+IMAGE_REGENERATE_RETRY_AFTER = int(os.environ.get("IMAGE_REGENERATE_RETRY_AFTER", 10))
+# Render the achievement image while the quest is active, so complete can attach it at once (quests/speculative.py)
+SPECULATIVE_IMAGES = os.environ.get("SPECULATIVE_IMAGES", "False") == "True"
+
+# Completed and failed quests that ended this long ago are moved to ArchivedQuest by archive_quests
+QUEST_ARCHIVE_AFTER_DAYS = int(os.environ.get("QUEST_ARCHIVE_AFTER_DAYS", 180))
+
+# UDP address the in-process expiry scheduler (run_scheduler.py) listens on; empty disables notifications
+EXPIRY_SCHEDULER_ADDRESS = os.environ.get("EXPIRY_SCHEDULER_ADDRESS", "127.0.0.1:8765")
+
+# Server-Sent Events stream (api/events/, see quests/events.py); served best by the ASGI entry point
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.environ.get("EVENT_STREAM_HEARTBEAT_SECONDS", 15))
+# One poller thread per process looks for events published by other processes (scheduler, image workers)
+EVENT_STREAM_POLL_SECONDS = float(os.environ.get("EVENT_STREAM_POLL_SECONDS", 2))
+EVENT_STREAM_RETRY_MS = int(os.environ.get("EVENT_STREAM_RETRY_MS", 3000))
+EVENT_RETENTION_SECONDS = int(os.environ.get("EVENT_RETENTION_SECONDS", 24 * 60 * 60))
+# Lifetime of the signed ticket (api/events/ticket/) that EventSource passes instead of the API token
+EVENT_STREAM_TICKET_MAX_AGE = int(os.environ.get("EVENT_STREAM_TICKET_MAX_AGE", 60))
+
+# Bearer token Prometheus sends to /metrics (see quests/metrics.py); empty keeps the endpoint off
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Pooled HTTP client used for image generation (see quests/http_client.py)
+IMAGE_HTTP_POOL_SIZE = int(os.environ.get("IMAGE_HTTP_POOL_SIZE", 8))
+# Connections per event loop for the async client behind the ASGI regenerate_image view
+IMAGE_HTTP_ASYNC_POOL_SIZE = int(os.environ.get("IMAGE_HTTP_ASYNC_POOL_SIZE", 100))
+IMAGE_HTTP_CONNECT_TIMEOUT = float(os.environ.get("IMAGE_HTTP_CONNECT_TIMEOUT", 3.05))
+IMAGE_HTTP_READ_TIMEOUT = float(os.environ.get("IMAGE_HTTP_READ_TIMEOUT", 45))
+IMAGE_HTTP_MAX_RETRIES = int(os.environ.get("IMAGE_HTTP_MAX_RETRIES", 2))
+IMAGE_HTTP_RETRY_BUDGET = float(os.environ.get("IMAGE_HTTP_RETRY_BUDGET", 10))
+# Overall limit for one image download, retries and body included; READ_TIMEOUT only bounds a single read
+IMAGE_HTTP_DOWNLOAD_TIMEOUT = float(os.environ.get("IMAGE_HTTP_DOWNLOAD_TIMEOUT", 90))
+IMAGE_HTTP_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("IMAGE_HTTP_CIRCUIT_FAILURE_THRESHOLD", 5))
+IMAGE_HTTP_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("IMAGE_HTTP_CIRCUIT_RESET_TIMEOUT", 30))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
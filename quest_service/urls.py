@@ -20,19 +20,36 @@ from django.urls import path, include, re_path
 from django.views.generic import TemplateView
 from rest_framework.authtoken.views import obtain_auth_token
 from quests.auth_views import RegisterView
+from quests.media import serve_media
+from quests.events import stream_events
+from quests.metrics import metrics_view
+from quests.async_views import regenerate_image
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/events/", stream_events, name="events"),
     path("api/", include("quests.urls")),
     path("api-token-auth/", obtain_auth_token),
     path("api/register/", RegisterView.as_view(), name="register"),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Under ASGI the slow image regeneration awaits the upstream instead of holding a thread (see quests/async_views.py)
+if settings.SERVER_MODE == "asgi":
+    urlpatterns.insert(
+        0,
+        path(
+            "api/achievements/<int:pk>/regenerate_image/",
+            regenerate_image,
+            name="achievement-regenerate-image",
+        ),
+    )
+
+# Media files (achievement images) with ETag/Range support, in development and production
+urlpatterns += [
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$", serve_media, name="media"),
+]
 
 # Catch-all for React SPA (must be last)
 urlpatterns += [
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Quest, Achievement
+from .models import Quest, ArchivedQuest, Achievement, ImageJob, SpeculativeImage
 
 
 @admin.register(Quest)
@@ -9,8 +9,27 @@ class QuestAdmin(admin.ModelAdmin):
     search_fields = ("title", "description")
 
 
+@admin.register(ArchivedQuest)
+class ArchivedQuestAdmin(admin.ModelAdmin):
+    list_display = ("title", "user", "status", "end_time", "archived_at")
+    list_filter = ("status",)
+    search_fields = ("title", "description")
+
+
 @admin.register(Achievement)
 class AchievementAdmin(admin.ModelAdmin):
-    list_display = ("name", "user", "quest", "awarded_at")
+    list_display = ("name", "user", "quest", "archived_quest", "image_status", "awarded_at")
     list_filter = ("user",)
     search_fields = ("name",)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "achievement", "status", "attempts", "created_at", "finished_at")
+    list_filter = ("status",)
+
+
+@admin.register(SpeculativeImage)
+class SpeculativeImageAdmin(admin.ModelAdmin):
+    list_display = ("id", "quest", "status", "created_at", "started_at")
+    list_filter = ("status",)
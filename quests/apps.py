@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class QuestsConfig(AppConfig):
     name = 'quests'
+
+    def ready(self) -> None:
+        from . import checks, metrics, signals  # noqa: F401
@@ -0,0 +1,56 @@
+from contextvars import ContextVar
+from datetime import datetime
+from django.db import transaction
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from .models import Quest, ArchivedQuest, Achievement
+from .speculative import evict_speculative_images
+from .versioning import bump_user_versions
+
+ARCHIVED_STATUSES = ("completed", "failed")
+
+_archiving: ContextVar[bool] = ContextVar("quests_archiving", default=False)
+
+
+def is_archiving() -> bool:
+    """True while archive_quests deletes quests it has just copied to the archive (see quests/signals.py)."""
+    return _archiving.get()
+
+
+def archivable_quests(before: datetime) -> QuerySet[Quest]:
+    # Завершённые квесты всегда запускались, так что end_time есть и поиск идёт по индексу (status, end_time)
+    return Quest.objects.filter(status__in=ARCHIVED_STATUSES, end_time__lt=before)
+
+
+def archive_quests(before: datetime, quest_ids: list[int] | None = None) -> int:
+    """Moves finished quests that ended before `before` to ArchivedQuest in one transaction.
+
+    Achievements stay in the hot table and are relinked to the archived row,
+    which keeps the quest's id. Stats are not touched: archiving moves rows
+    between tables, it does not delete history, so the post_delete stats
+    handler skips quests deleted here.
+    """
+    queryset = archivable_quests(before)
+    if quest_ids is not None:
+        queryset = queryset.filter(id__in=quest_ids)
+
+    with transaction.atomic():
+        quests = list(queryset.select_for_update())
+        if not quests:
+            return 0
+        ids = [quest.id for quest in quests]
+        now = timezone.now()
+
+        ArchivedQuest.objects.bulk_create([ArchivedQuest.from_quest(quest, archived_at=now) for quest in quests])
+        Achievement.objects.filter(quest_id__in=ids).update(archived_quest_id=F("quest_id"), quest=None)
+        # Обычно уже пусто: заранее нарисованные картинки удаляются при завершении квеста
+        evict_speculative_images(ids)
+        # Обычный delete(): каскады остаются в силе, а сигнал статистики видит флаг и счётчики не уменьшает
+        token = _archiving.set(True)
+        try:
+            Quest.objects.filter(id__in=ids).delete()
+        finally:
+            _archiving.reset(token)
+        bump_user_versions({quest.user_id for quest in quests})
+    return len(quests)
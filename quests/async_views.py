@@ -0,0 +1,92 @@
+import logging
+import random
+from typing import Any
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .concurrency import async_regenerate_flights, get_regenerate_limiter
+from .image_generator import agenerate_achievement_image
+from .jobs import save_achievement_image
+from .models import Achievement
+from .serializers import AchievementSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def _drf_request(request: HttpRequest) -> Request:
+    return Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+
+
+def _authenticated_user(drf_request: Request) -> Any:
+    # Те же классы аутентификации, что и у DRF-вьюх (токен из кеша, сессия с CSRF)
+    user = drf_request.user
+    return user if user.is_authenticated else None
+
+
+# Как и у DRF-вьюх: CSRF проверяет SessionAuthentication, а запросам с токеном он не нужен
+@csrf_exempt
+async def regenerate_image(request: HttpRequest, pk: int) -> JsonResponse:
+    """ASGI variant of AchievementViewSet.regenerate_image.
+
+    The Pollinations round-trip is awaited on the event loop, so slow
+    generations do not hold a worker thread; only the short DB and file
+    writes run through sync_to_async. Served instead of the DRF action when
+    SERVER_MODE is "asgi" (see quest_service/urls.py).
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+    drf_request = _drf_request(request)
+    try:
+        user = await sync_to_async(_authenticated_user)(drf_request)
+    except APIException as e:
+        return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    achievement = await Achievement.objects.select_related("quest", "archived_quest").filter(user=user, pk=pk).afirst()
+    if achievement is None:
+        return JsonResponse({"detail": "No Achievement matches the given query."}, status=404)
+
+    # Двойной клик не запускает вторую генерацию: запросы ждут идущую и получают её результат
+    status_code, data = await async_regenerate_flights.do(achievement.id, lambda: _regenerate(achievement, drf_request))
+    response = JsonResponse(data, status=status_code)
+    if status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+        response["Retry-After"] = str(settings.IMAGE_REGENERATE_RETRY_AFTER)
+    return response
+
+
+async def _regenerate(achievement: Achievement, drf_request: Request) -> tuple[int, dict[str, Any]]:
+    # Тот же лимит, что и у синхронной вьюхи: одновременных обращений к апстриму на процесс не больше заданного
+    limiter = get_regenerate_limiter()
+    if not limiter.try_acquire():
+        throttled = Throttled(wait=settings.IMAGE_REGENERATE_RETRY_AFTER)
+        return status.HTTP_429_TOO_MANY_REQUESTS, {"detail": str(throttled.detail)}
+    quest = achievement.source_quest
+
+    try:
+        image_content = await agenerate_achievement_image(
+            quest_title=quest.title,
+            quest_description=quest.description,
+            achievement_name=achievement.name,
+            seed=random.randint(1, 10000),
+        )
+        if not image_content:
+            logger.error(f"REGENERATE: Image generator returned None for achievement {achievement.id}")
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {"error": "Failed to generate image"}
+
+        with image_content:
+            await sync_to_async(save_achievement_image)(achievement, image_content)
+        data = await sync_to_async(lambda: AchievementSerializer(achievement, context={"request": drf_request}).data)()
+        return status.HTTP_200_OK, data
+
+    except Exception as e:
+        logger.error(f"Error regenerating image for achievement {achievement.id}: {e}")
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, {"error": str(e)}
+    finally:
+        limiter.release()
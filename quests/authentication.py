@@ -0,0 +1,53 @@
+import hashlib
+from typing import Any, Iterable
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+# Кеши, у которых каждый процесс свой: удаление токена в одном воркере другие не увидят
+PER_PROCESS_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def token_cache_timeout() -> int:
+    """AUTH_TOKEN_CACHE_TIMEOUT, or 0 (no token cache) when the cache is not shared by the gunicorn workers."""
+    backend = settings.CACHES[settings.AUTH_TOKEN_CACHE_ALIAS]["BACKEND"]
+    if settings.WEB_CONCURRENCY > 1 and backend in PER_PROCESS_CACHE_BACKENDS:
+        return 0
+    return settings.AUTH_TOKEN_CACHE_TIMEOUT
+
+
+def token_cache_key(key: str) -> str:
+    # Сам токен в ключ не кладём: ключи кеша видны в memcached/redis и в файлах FileBasedCache
+    return f"auth-token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def invalidate_tokens(keys: Iterable[str]) -> None:
+    caches[settings.AUTH_TOKEN_CACHE_ALIAS].delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that keeps the token (with its user) in the cache for AUTH_TOKEN_CACHE_TIMEOUT.
+
+    Saves the token->user JOIN on every API request. Entries are dropped when
+    the token is deleted or the user is saved (e.g. deactivated), see
+    quests/signals.py; changes made with queryset.update() only expire with the TTL.
+    Without a cache shared by all workers it is not used (see token_cache_timeout).
+    """
+
+    def authenticate_credentials(self, key: str) -> tuple[Any, Any]:
+        timeout = token_cache_timeout()
+        if timeout <= 0:
+            return super().authenticate_credentials(key)
+        cache = caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is None:
+            # Неверные и отключённые токены не кешируем: родитель бросит AuthenticationFailed
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, token, timeout)
+            return user, token
+        return token.user, token
@@ -0,0 +1,167 @@
+from typing import Any
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from .models import Quest, Achievement, ImageJob, QuestTransitionError, QuestExpiredError
+from .serializers import QuestSerializer
+from .expiry import notify_deadline
+from .versioning import bump_user_versions
+from .events import publish_quest_events
+from .stats import StatsDelta, apply_stats_delta
+from .speculative import attach_speculative_images, evict_speculative_images, queue_speculative_images
+
+MAX_BATCH_OPERATIONS = 500
+TRANSITIONS = ("start", "complete", "restart")
+
+
+def run_batch(
+    user: User, operations: list[Any], default_duration_minutes: int, serializer_context: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """Applies create/start/complete/restart operations in one transaction.
+
+    Quests are loaded with one query and written back with bulk_create /
+    bulk_update, so the number of queries does not depend on the batch size.
+    The one exception is speculative renders: every completed quest whose
+    pre-rendered image is attached saves its achievement on its own (see
+    attach_speculative_images). Every operation gets its own result; an
+    invalid operation does not stop the others.
+    """
+    results: list[dict[str, Any]] = [{}] * len(operations)
+    now = timezone.now()
+
+    with transaction.atomic():
+        quest_ids = {
+            op["id"]
+            for op in operations
+            if isinstance(op, dict) and op.get("op") in TRANSITIONS and isinstance(op.get("id"), int)
+        }
+        # Блокируем строки до bulk_update, иначе параллельный переход посчитается в статистике дважды
+        quests = {
+            quest.id: quest
+            for quest in Quest.objects.filter(user=user, id__in=quest_ids)
+            .select_related("achievement")
+            .select_for_update(of=("self",))
+        }
+
+        created: list[tuple[int, Quest]] = []
+        changed: dict[int, Quest] = {}
+        delta = StatsDelta()
+        touched: list[tuple[int, Quest]] = []
+        new_achievements: list[Achievement] = []
+        started: list[Quest] = []
+        # Провалившиеся и перезапущенные квесты: их заранее отрисованные картинки больше не нужны
+        evicted: list[int] = []
+
+        for index, op in enumerate(operations):
+            kind = op.get("op") if isinstance(op, dict) else None
+
+            if kind == "create":
+                serializer = QuestSerializer(data=op.get("data"), context=serializer_context)
+                if serializer.is_valid():
+                    created.append((index, Quest(user=user, **serializer.validated_data)))
+                else:
+                    results[index] = _error(index, status.HTTP_400_BAD_REQUEST, serializer.errors)
+                continue
+
+            if kind not in TRANSITIONS:
+                results[index] = _error(index, status.HTTP_400_BAD_REQUEST, f"Unknown operation: {kind!r}")
+                continue
+
+            quest = quests.get(op.get("id"))
+            if quest is None:
+                results[index] = _error(index, status.HTTP_404_NOT_FOUND, "Quest not found")
+                continue
+
+            old_status = quest.status
+            try:
+                if kind == "start":
+                    quest.mark_started(op.get("duration_minutes", default_duration_minutes))
+                elif kind == "complete":
+                    quest.mark_completed()
+                    new_achievements.append(_build_achievement(quest))
+                else:
+                    quest.mark_restarted()
+            except QuestExpiredError as e:
+                changed[quest.id] = quest
+                delta.status_changed(quest, old_status, now=now)
+                evicted.append(quest.id)
+                results[index] = _error(index, status.HTTP_400_BAD_REQUEST, str(e))
+                continue
+            except QuestTransitionError as e:
+                results[index] = _error(index, status.HTTP_400_BAD_REQUEST, str(e))
+                continue
+
+            changed[quest.id] = quest
+            touched.append((index, quest))
+            delta.status_changed(quest, old_status, now=now)
+            if kind == "start":
+                started.append(quest)
+            elif kind == "restart":
+                evicted.append(quest.id)
+
+        if created:
+            Quest.objects.bulk_create([quest for _, quest in created])
+            for _, quest in created:
+                # У нового квеста ачивки нет - кешируем это, чтобы сериализатор не шёл в БД
+                Quest.achievement.related.set_cached_value(quest, None)
+        if changed:
+            # bulk_update не вызывает auto_now, проставляем updated_at сами
+            for quest in changed.values():
+                quest.updated_at = now
+            Quest.objects.bulk_update(changed.values(), ["status", "start_time", "end_time", "updated_at"])
+        for _, quest in created:
+            delta.quest_added(quest)
+        for achievement in new_achievements:
+            delta.achievement_added(achievement)
+
+        if new_achievements:
+            Achievement.objects.bulk_create(new_achievements)
+            for achievement in new_achievements:
+                # Обратная связь one-to-one, чтобы сериализатор не делал запрос на каждый квест
+                achievement.quest.achievement = achievement
+            attached = attach_speculative_images(new_achievements)
+            ImageJob.objects.bulk_create(
+                [
+                    ImageJob(achievement=achievement)
+                    for achievement in new_achievements
+                    if achievement.id not in attached
+                ]
+            )
+        if started:
+            queue_speculative_images(started)
+        if evicted:
+            evict_speculative_images(evicted)
+
+        if created or changed:
+            # Массовые операции не шлют post_save
+            bump_user_versions([user.id], create_missing=True)
+            apply_stats_delta(user.id, delta)
+            publish_quest_events([quest for _, quest in created] + list(changed.values()))
+
+        deadline_changes = [quest for quest in changed.values() if quest.status in ("active", "created")]
+
+        def notify_scheduler() -> None:
+            for quest in deadline_changes:
+                notify_deadline(quest)
+
+        transaction.on_commit(notify_scheduler)
+
+    for index, quest in created:
+        results[index] = {"index": index, "status": status.HTTP_201_CREATED, "quest": QuestSerializer(quest).data}
+    for index, quest in touched:
+        results[index] = {"index": index, "status": status.HTTP_200_OK, "quest": QuestSerializer(quest).data}
+    return results
+
+
+def _build_achievement(quest: Quest) -> Achievement:
+    return Achievement(
+        user_id=quest.user_id,
+        quest=quest,
+        name=quest.planned_achievement_name,
+        rarity=Achievement.RARITY_BY_DIFFICULTY.get(quest.difficulty, "silver"),
+    )
+
+
+def _error(index: int, status_code: int, error: Any) -> dict[str, Any]:
+    return {"index": index, "status": status_code, "error": error}
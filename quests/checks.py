@@ -0,0 +1,21 @@
+from typing import Any
+from django.conf import settings
+from django.core import checks
+from .authentication import token_cache_timeout
+
+
+@checks.register()
+def check_auth_token_cache(app_configs: Any, **kwargs: Any) -> list[checks.CheckMessage]:
+    """Token revocation only reaches every gunicorn worker through a cache they share."""
+    if settings.AUTH_TOKEN_CACHE_TIMEOUT <= 0 or token_cache_timeout() > 0:
+        return []
+    backend = settings.CACHES[settings.AUTH_TOKEN_CACHE_ALIAS]["BACKEND"]
+    return [
+        checks.Warning(
+            f"AUTH_TOKEN_CACHE_ALIAS uses the per-process {backend.rsplit('.', 1)[-1]} "
+            f"with WEB_CONCURRENCY={settings.WEB_CONCURRENCY}, so the token cache is disabled: "
+            "every request looks the token up in the database.",
+            hint="Set CACHE_BACKEND to a shared backend (e.g. FileBasedCache or Redis) to use the token cache.",
+            id="quests.W001",
+        )
+    ]
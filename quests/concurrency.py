@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+from django.conf import settings
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs one call per key at a time; threads asking for the same key meanwhile get its result.
+
+    An exception raised by the running call is raised in every waiting thread too.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, "_Call"] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop.
+
+    The call runs as its own task, so a client that disconnects does not
+    cancel the generation the other waiters (and the saved image) depend on.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        slot = (asyncio.get_running_loop(), key)
+        task = self._calls.get(slot)
+        if task is None:
+            task = self._calls[slot] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._calls.pop(slot, None))
+        return await asyncio.shield(task)
+
+
+class InFlightLimiter:
+    """Process-wide cap on concurrent calls that never blocks: a full limiter just says no."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._in_flight >= self.limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+
+# Повторные клики "перерисовать" по одной ачивке присоединяются к уже идущей генерации
+regenerate_flights = SingleFlight()
+async_regenerate_flights = AsyncSingleFlight()
+
+_limiter: InFlightLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_regenerate_limiter() -> InFlightLimiter:
+    """Limiter shared by the sync and async regenerate_image views of this process."""
+    global _limiter
+
+    with _limiter_lock:
+        if _limiter is None or _limiter.limit != settings.IMAGE_REGENERATE_MAX_IN_FLIGHT:
+            _limiter = InFlightLimiter(settings.IMAGE_REGENERATE_MAX_IN_FLIGHT)
+        return _limiter
@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, AsyncIterator, Iterable
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import connection, transaction
+from django.db.models import Max
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from .authentication import CachedTokenAuthentication
+from .models import Quest, Achievement, QuestEvent
+
+logger = logging.getLogger(__name__)
+
+# Событий за одно чтение журнала; полная страница значит, что за ней могут быть ещё
+EVENT_PAGE_SIZE = 100
+
+
+class EventBroker:
+    """Wakes SSE streams in this process when an event for their user appears.
+
+    Events committed in this process wake the streams right after the commit.
+    Events from other processes (scheduler, image workers) are found by one
+    poller thread per process, which checks QuestEvent for all subscribed
+    users at once every EVENT_STREAM_POLL_SECONDS; the streams themselves
+    only read the log when woken.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = defaultdict(set)
+        self._poller: threading.Thread | None = None
+        self._last_event_id: int | None = None
+
+    def subscribe(self, user_id: int) -> tuple[asyncio.AbstractEventLoop, asyncio.Event]:
+        subscription = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        self._start_poller()
+        return subscription
+
+    def unsubscribe(self, user_id: int, subscription: tuple[asyncio.AbstractEventLoop, asyncio.Event]) -> None:
+        with self._lock:
+            self._subscribers[user_id].discard(subscription)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    def notify(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            subscriptions = [sub for user_id in set(user_ids) for sub in self._subscribers.get(user_id, ())]
+        for loop, event in subscriptions:
+            # Публикация идёт из синхронных потоков, а ждут события корутины в своём цикле
+            loop.call_soon_threadsafe(event.set)
+
+    def poll(self) -> None:
+        """One query for the whole process: wakes the streams of users with events newer than the last poll."""
+        with self._lock:
+            user_ids = set(self._subscribers)
+        if self._last_event_id is None:
+            # Первый опрос: события между чтением журнала потоком и этим моментом не должны потеряться
+            self._last_event_id = QuestEvent.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+            self.notify(user_ids)
+            return
+        rows = QuestEvent.objects.filter(id__gt=self._last_event_id).values("user_id").annotate(last_id=Max("id"))
+        rows = list(rows)
+        if rows:
+            self._last_event_id = max(row["last_id"] for row in rows)
+            self.notify({row["user_id"] for row in rows} & user_ids)
+
+    def _start_poller(self) -> None:
+        with self._lock:
+            if self._poller is not None and self._poller.is_alive():
+                return
+            self._poller = threading.Thread(target=self._poll_forever, name="quest-event-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_forever(self) -> None:
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Event poll failed: {e}")
+            finally:
+                # Между опросами соединение не держим: в ASGI-режиме это слот пула
+                connection.close()
+            time.sleep(settings.EVENT_STREAM_POLL_SECONDS)
+
+
+broker = EventBroker()
+
+
+def quest_payload(quest: Quest) -> dict[str, Any]:
+    return {
+        "id": quest.id,
+        "status": quest.status,
+        "start_time": quest.start_time.isoformat() if quest.start_time else None,
+        "end_time": quest.end_time.isoformat() if quest.end_time else None,
+    }
+
+
+def achievement_payload(achievement: Achievement) -> dict[str, Any]:
+    return {
+        "id": achievement.id,
+        "quest": achievement.source_quest_id,
+        "image_status": achievement.image_status,
+        "image": achievement.image.url if achievement.image else None,
+    }
+
+
+def publish_quest_events(quests: Iterable[Quest]) -> None:
+    _publish(
+        [QuestEvent(user_id=quest.user_id, kind="quest.updated", payload=quest_payload(quest)) for quest in quests]
+    )
+
+
+def publish_achievement_event(achievement: Achievement) -> None:
+    _publish(
+        [
+            QuestEvent(
+                user_id=achievement.user_id, kind="achievement.image", payload=achievement_payload(achievement)
+            )
+        ]
+    )
+
+
+def _publish(events: list[QuestEvent]) -> None:
+    if not events:
+        return
+    # Событие пишется в той же транзакции, что и изменение, а будим потоки только после коммита
+    QuestEvent.objects.bulk_create(events)
+    user_ids = {event.user_id for event in events}
+    transaction.on_commit(lambda: broker.notify(user_ids))
+
+
+def prune_events(now: Any = None) -> int:
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.EVENT_RETENTION_SECONDS)
+    deleted, _ = QuestEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def latest_event_id(user_id: int) -> int:
+    return QuestEvent.objects.filter(user_id=user_id).order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def events_after(user_id: int, last_event_id: int, limit: int = EVENT_PAGE_SIZE) -> list[QuestEvent]:
+    return list(QuestEvent.objects.filter(user_id=user_id, id__gt=last_event_id).order_by("id")[:limit])
+
+
+def format_event(event: QuestEvent) -> str:
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {json.dumps(event.payload)}\n\n"
+
+
+def _release_connection() -> None:
+    # Поток событий живёт часами: соединение (в ASGI-режиме - слот пула) отдаём сразу после чтения
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def _read_latest_event_id(user_id: int) -> int:
+    try:
+        return latest_event_id(user_id)
+    finally:
+        _release_connection()
+
+
+def _read_events_after(user_id: int, last_event_id: int) -> list[QuestEvent]:
+    try:
+        return events_after(user_id, last_event_id)
+    finally:
+        _release_connection()
+
+
+async def event_stream(user_id: int, last_event_id: int | None) -> AsyncIterator[str]:
+    """Yields SSE frames for a user: backlog after last_event_id, then live events and heartbeats.
+
+    The log is read only when the broker wakes the stream; idle streams just
+    send heartbeats and hold no database connection.
+    """
+    subscription = broker.subscribe(user_id)
+    _, wakeup = subscription
+    loop = asyncio.get_running_loop()
+    last_frame_at = loop.time()
+    try:
+        if last_event_id is None:
+            last_event_id = await sync_to_async(_read_latest_event_id)(user_id)
+        yield f"retry: {settings.EVENT_STREAM_RETRY_MS}\n\n"
+        while True:
+            wakeup.clear()
+            events = await sync_to_async(_read_events_after)(user_id, last_event_id)
+            for event in events:
+                last_event_id = event.id
+                yield format_event(event)
+            if events:
+                last_frame_at = loop.time()
+                if len(events) == EVENT_PAGE_SIZE:
+                    continue
+
+            while not wakeup.is_set():
+                timeout = settings.EVENT_STREAM_HEARTBEAT_SECONDS - (loop.time() - last_frame_at)
+                if timeout <= 0:
+                    # Комментарий держит соединение живым через прокси и выявляет отключившихся клиентов
+                    yield ": heartbeat\n\n"
+                    last_frame_at = loop.time()
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        broker.unsubscribe(user_id, subscription)
+
+
+_TICKET_SALT = "quests.events.stream"
+
+
+def streaming_enabled() -> bool:
+    # Под WSGI каждая открытая вкладка держала бы поток gthread-воркера, поэтому поток только в ASGI-режиме
+    return settings.SERVER_MODE == "asgi"
+
+
+def issue_stream_ticket(user_id: int) -> str:
+    """Short-lived signed ticket that EventSource passes in the URL instead of the API token."""
+    return signing.TimestampSigner(salt=_TICKET_SALT).sign(str(user_id))
+
+
+def _authenticate(request: HttpRequest) -> int | None:
+    auth = request.headers.get("Authorization", "").split()
+    if len(auth) == 2 and auth[0].lower() == "token":
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(auth[1])
+        except AuthenticationFailed:
+            return None
+        return user.id
+
+    # EventSource не умеет слать заголовки: вместо токена в URL (и в логах прокси) попадает билет на минуту
+    ticket = request.GET.get("ticket")
+    if not ticket:
+        return None
+    try:
+        user_id = int(
+            signing.TimestampSigner(salt=_TICKET_SALT).unsign(ticket, max_age=settings.EVENT_STREAM_TICKET_MAX_AGE)
+        )
+    except (signing.BadSignature, ValueError):
+        return None
+    return user_id if User.objects.filter(pk=user_id, is_active=True).exists() else None
+
+
+def _authenticate_and_release(request: HttpRequest) -> int | None:
+    try:
+        return _authenticate(request)
+    finally:
+        _release_connection()
+
+
+def _parse_last_event_id(request: HttpRequest) -> int | None:
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    return int(value) if value and value.isdigit() else None
+
+
+async def stream_events(request: HttpRequest) -> HttpResponse:
+    """SSE endpoint: pushes quest transitions and achievement image updates of the current user.
+
+    Browsers authenticate with a ticket from api/events/ticket/, other clients
+    with the Authorization header. Reconnecting clients resume after the
+    Last-Event-ID they got; the log keeps events for EVENT_RETENTION_SECONDS.
+    Under SERVER_MODE=wsgi the stream is disabled and answers 204.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    if not streaming_enabled():
+        # 204 останавливает переподключения EventSource; клиент переходит на опрос quests/
+        return HttpResponse(status=204)
+    user_id = await sync_to_async(_authenticate_and_release)(request)
+    if user_id is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    response = StreamingHttpResponse(
+        event_stream(user_id, _parse_last_event_id(request)), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Без этого nginx буферизует поток и события приходят пачками
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,221 @@
+import heapq
+import json
+import logging
+import select
+import socket
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Quest
+from .versioning import bump_user_versions
+from .events import prune_events, publish_quest_events
+from .jobs import sweep_orphan_images
+from .stats import apply_expired
+from .speculative import evict_speculative_images
+
+logger = logging.getLogger(__name__)
+
+_notify_socket: socket.socket | None = None
+_notify_lock = threading.Lock()
+
+
+def expire_quests(now: datetime | None = None, quest_ids: list[int] | None = None) -> int:
+    now = now or timezone.now()
+    queryset = Quest.objects.filter(status="active", end_time__lt=now)
+    if quest_ids is not None:
+        queryset = queryset.filter(id__in=quest_ids)
+
+    with transaction.atomic():
+        # Массовый UPDATE не шлёт post_save, поэтому версии пользователей обновляем сами
+        expiring = list(queryset.only("id", "user", "start_time", "end_time"))
+        if not expiring:
+            return 0
+        updated = queryset.update(status="failed", updated_at=now)
+        bump_user_versions({quest.user_id for quest in expiring})
+        apply_expired(Counter(quest.user_id for quest in expiring))
+        for quest in expiring:
+            quest.status = "failed"
+        publish_quest_events(expiring)
+        evict_speculative_images([quest.id for quest in expiring])
+    return updated
+
+
+def notify_deadline(quest: Quest) -> None:
+    """Tells a running ExpiryScheduler about a new (or dropped) quest deadline.
+
+    Best effort: a lost datagram is picked up by the scheduler's next refresh.
+    """
+    address = _parse_address(settings.EXPIRY_SCHEDULER_ADDRESS)
+    if address is None:
+        return
+
+    end_time = quest.end_time.isoformat() if quest.status == "active" and quest.end_time else None
+    payload = json.dumps({"quest": quest.id, "end_time": end_time}).encode("utf-8")
+
+    global _notify_socket
+    try:
+        with _notify_lock:
+            if _notify_socket is None:
+                _notify_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _notify_socket.sendto(payload, address)
+    except OSError as e:
+        logger.warning(f"Failed to notify expiry scheduler about quest {quest.id}: {e}")
+
+
+class ExpiryScheduler:
+    """Fails active quests within about a second of their end_time.
+
+    Keeps a min-heap of upcoming deadlines. The heap is filled from the
+    (status, end_time) index for the next ``horizon`` on every refresh, and
+    start/restart actions push changes in between via ``notify_deadline``,
+    so the table never has to be rescanned to pick up new deadlines.
+    """
+
+    def __init__(
+        self,
+        horizon: timedelta = timedelta(minutes=10),
+        refresh_interval: float = 60.0,
+        listen_address: str | None = None,
+    ) -> None:
+        self.horizon = horizon
+        self.refresh_interval = refresh_interval
+        self._heap: list[tuple[datetime, int]] = []
+        self._deadlines: dict[int, datetime] = {}
+        self._last_refresh: datetime | None = None
+        self._last_sweep: datetime | None = None
+        self._stop = threading.Event()
+
+        self.socket: socket.socket | None = None
+        address = _parse_address(listen_address)
+        if address is not None:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.bind(address)
+            self.socket.setblocking(False)
+
+    @property
+    def next_deadline(self) -> datetime | None:
+        self._drop_stale_entries()
+        return self._heap[0][0] if self._heap else None
+
+    def schedule(self, quest_id: int, end_time: datetime | None) -> None:
+        if end_time is None:
+            self._deadlines.pop(quest_id, None)
+            return
+        # Older heap entries for the same quest become stale and are skipped on pop
+        self._deadlines[quest_id] = end_time
+        heapq.heappush(self._heap, (end_time, quest_id))
+
+    def refresh(self, now: datetime | None = None) -> None:
+        now = now or timezone.now()
+        upcoming = Quest.objects.filter(status="active", end_time__lte=now + self.horizon).values_list(
+            "id", "end_time"
+        )
+        self._heap = []
+        self._deadlines = {}
+        for quest_id, end_time in upcoming:
+            self.schedule(quest_id, end_time)
+        self._last_refresh = now
+
+    def expire_due(self, now: datetime | None = None) -> int:
+        now = now or timezone.now()
+        due_ids = []
+        while self._heap and self._heap[0][0] < now:
+            end_time, quest_id = heapq.heappop(self._heap)
+            if self._deadlines.get(quest_id) == end_time:
+                del self._deadlines[quest_id]
+                due_ids.append(quest_id)
+
+        if not due_ids:
+            return 0
+        # The UPDATE re-checks status and end_time, so a restarted or completed quest is left alone
+        expired = expire_quests(now=now, quest_ids=due_ids)
+        if expired:
+            logger.info(f"Marked {expired} quest(s) as failed")
+        return expired
+
+    def sweep_images(self, now: datetime) -> None:
+        if self._last_sweep is not None and (now - self._last_sweep).total_seconds() < (
+            settings.ORPHAN_IMAGE_SWEEP_INTERVAL_SECONDS
+        ):
+            return
+        self._last_sweep = now
+        sweep_orphan_images(now)
+
+    def handle_message(self, data: bytes) -> None:
+        try:
+            message = json.loads(data)
+            end_time = parse_datetime(message["end_time"]) if message.get("end_time") else None
+            quest_id = int(message["quest"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed expiry notification {data!r}: {e}")
+            return
+
+        if end_time is not None and end_time > timezone.now() + self.horizon:
+            # Will be loaded by a later refresh once it is inside the horizon
+            self._deadlines.pop(quest_id, None)
+            return
+        self.schedule(quest_id, end_time)
+
+    def run_once(self) -> None:
+        now = timezone.now()
+        if self._last_refresh is None or (now - self._last_refresh).total_seconds() >= self.refresh_interval:
+            self.refresh(now)
+            # Заодно чистим журнал SSE-событий: клиенты, отставшие сильнее, перечитают списки целиком
+            prune_events(now)
+            self.sweep_images(now)
+        self.expire_due(now)
+        self._wait(self._seconds_until_next_event())
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Expiry scheduler iteration failed: {e}")
+                self._stop.wait(1)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def _seconds_until_next_event(self) -> float:
+        now = timezone.now()
+        timeout = self.refresh_interval - (now - self._last_refresh).total_seconds()
+        next_deadline = self.next_deadline
+        if next_deadline is not None:
+            timeout = min(timeout, (next_deadline - now).total_seconds())
+        # Wake a hair after the deadline: quests expire once now > end_time
+        return max(timeout, 0) + 0.01
+
+    def _wait(self, timeout: float) -> None:
+        if self.socket is None:
+            self._stop.wait(timeout)
+            return
+
+        readable, _, _ = select.select([self.socket], [], [], timeout)
+        while readable:
+            try:
+                data = self.socket.recv(4096)
+            except BlockingIOError:
+                break
+            self.handle_message(data)
+
+    def _drop_stale_entries(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+
+def _parse_address(address: str | None) -> tuple[str, int] | None:
+    if not address:
+        return None
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
@@ -0,0 +1,64 @@
+from datetime import datetime, time
+from typing import Any
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+class ChoiceAndRangeFilter(BaseFilterBackend):
+    """Filters a list by query parameters declared on the view.
+
+    ``filter_choices = {"status": ("status", Quest.STATUS_CHOICES)}`` accepts
+    ``?status=active,created``; ``filter_ranges = {"created": "created_at"}``
+    accepts ``?created_after=`` / ``?created_before=`` (ISO date or datetime).
+    Status, rarity and the time ranges are served by the (user, ...)
+    composite indexes on Quest and Achievement.
+    """
+
+    def filter_queryset(self, request: Any, queryset: QuerySet, view: Any) -> QuerySet:
+        for param, (field, choices) in getattr(view, "filter_choices", {}).items():
+            raw = request.query_params.get(param)
+            if not raw:
+                continue
+            values = [value.strip() for value in raw.split(",") if value.strip()]
+            allowed = {choice for choice, _ in choices}
+            unknown = [value for value in values if value not in allowed]
+            if unknown:
+                raise ValidationError({param: f"Unknown value(s): {', '.join(unknown)}"})
+            queryset = queryset.filter(**{f"{field}__in": values})
+
+        for prefix, field in getattr(view, "filter_ranges", {}).items():
+            after = request.query_params.get(f"{prefix}_after")
+            before = request.query_params.get(f"{prefix}_before")
+            if after:
+                queryset = queryset.filter(**{f"{field}__gte": _parse_moment(f"{prefix}_after", after)})
+            if before:
+                queryset = queryset.filter(**{f"{field}__lt": _parse_moment(f"{prefix}_before", before)})
+        return queryset
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """?ordering= that always ends with an id tie-breaker, so cursor pages stay stable."""
+
+    def get_ordering(self, request: Any, queryset: QuerySet, view: Any) -> list[str] | None:
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = list(ordering)
+        if not any(term.lstrip("-") in ("id", "pk") for term in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
+
+
+def _parse_moment(param: str, value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
@@ -0,0 +1,376 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from .image_files import CHUNK_SIZE, DownloadedImage, ImageSpool, InvalidImageError, declared_size, spool_image
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after a run of consecutive upstream failures.
+
+    After ``failure_threshold`` failed calls the circuit opens and every call is
+    rejected until ``reset_timeout`` seconds have passed. Then a single trial
+    call is let through (half-open): success closes the circuit, failure
+    opens it again for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+
+class PooledHttpClient:
+    """Keep-alive HTTP client with bounded, jittered retries and a circuit breaker."""
+
+    def __init__(
+        self,
+        pool_size: int = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 45.0,
+        max_retries: int = 2,
+        retry_budget: float = 10.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4.0,
+        download_timeout: float = 90.0,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.download_timeout = download_timeout
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+
+        self.session = requests.Session()
+        # Retries are handled here rather than by urllib3 so that the breaker sees the final outcome
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, params: dict[str, Any] | None = None, **kwargs: Any) -> requests.Response:
+        """Fetch a small response whole; use download() for bodies, so the breaker sees how reading them ends."""
+        return self._call(url, lambda: self._get_with_retries(url, params, **kwargs))
+
+    def download(self, url: str, params: dict[str, Any] | None, max_bytes: int) -> DownloadedImage:
+        """Stream the body to a temp file; a body that breaks off or outlasts download_timeout is a failure.
+
+        The deadline is checked between reads, so a stalled read can overrun it by at most read_timeout.
+        """
+        started = time.monotonic()
+
+        def fetch() -> DownloadedImage:
+            response = self._get_with_retries(url, params, stream=True)
+            try:
+                return spool_image(self._iter_body(response, started), max_bytes, declared_size(response.headers))
+            finally:
+                response.close()
+
+        return self._call(url, fetch)
+
+    def _call(self, url: str, fetch: Callable[[], T]) -> T:
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit is open, not calling {url.split('?')[0]}")
+
+        # Исход для брейкера фиксируется здесь при любом исключении, иначе пробный вызов в half-open не освободится
+        try:
+            result = fetch()
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code not in RETRYABLE_STATUS_CODES:
+                # 4xx means the request itself is wrong; the upstream is healthy
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        except InvalidImageError:
+            # Апстрим ответил целиком, просто не картинкой: это не сбой соединения
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _iter_body(self, response: requests.Response, started: float) -> Iterator[bytes]:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if time.monotonic() - started > self.download_timeout:
+                raise requests.Timeout(f"Download took longer than {self.download_timeout}s")
+            yield chunk
+
+    def _get_with_retries(self, url: str, params: dict[str, Any] | None, **kwargs: Any) -> requests.Response:
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(
+                    url, params=params, timeout=(self.connect_timeout, self.read_timeout), **kwargs
+                )
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError:
+                        response.close()
+                        raise
+                    return response
+                error: requests.RequestException = requests.HTTPError(
+                    f"{response.status_code} Server Error for url: {response.url}", response=response
+                )
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            delay = self._backoff(attempt)
+            if attempt >= self.max_retries or time.monotonic() - started + delay > self.retry_budget:
+                raise error
+
+            logger.warning(f"Upstream call failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _backoff(self, attempt: int) -> float:
+        return _full_jitter(self.backoff_base, self.backoff_max, attempt)
+
+
+class AsyncPooledHttpClient:
+    """httpx.AsyncClient counterpart of PooledHttpClient for ASGI views.
+
+    Same retry, backoff and retry-budget rules; waiting for the upstream does
+    not hold a thread, so one worker can keep many generations in flight.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 45.0,
+        max_retries: int = 2,
+        retry_budget: float = 10.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4.0,
+        download_timeout: float = 90.0,
+        breaker: CircuitBreaker | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.download_timeout = download_timeout
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+
+    async def get(self, url: str, params: dict[str, Any] | None = None) -> httpx.Response:
+        return await self._call(url, lambda: self._get_with_retries(url, params, stream=False))
+
+    async def download(self, url: str, params: dict[str, Any] | None, max_bytes: int) -> DownloadedImage:
+        """Stream the body to a temp file; a body that breaks off or outlasts download_timeout is a failure."""
+
+        async def fetch() -> DownloadedImage:
+            try:
+                async with asyncio.timeout(self.download_timeout):
+                    response = await self._get_with_retries(url, params, stream=True)
+                    try:
+                        spool = ImageSpool(max_bytes, declared_size(response.headers))
+                        try:
+                            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                                spool.write(chunk)
+                        except BaseException:
+                            spool.close()
+                            raise
+                    finally:
+                        await response.aclose()
+            except TimeoutError:
+                raise httpx.ReadTimeout(f"Download took longer than {self.download_timeout}s") from None
+            return await asyncio.to_thread(spool.finish)
+
+        return await self._call(url, fetch)
+
+    async def _call(self, url: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit is open, not calling {url.split('?')[0]}")
+
+        try:
+            result = await fetch()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in RETRYABLE_STATUS_CODES:
+                # 4xx means the request itself is wrong; the upstream is healthy
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        except InvalidImageError:
+            self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _get_with_retries(self, url: str, params: dict[str, Any] | None, stream: bool) -> httpx.Response:
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.send(self.client.build_request("GET", url, params=params), stream=stream)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except httpx.HTTPStatusError:
+                        await response.aclose()
+                        raise
+                    return response
+                error: httpx.HTTPError = httpx.HTTPStatusError(
+                    f"{response.status_code} Server Error for url: {response.url}",
+                    request=response.request,
+                    response=response,
+                )
+                await response.aclose()
+            except httpx.TransportError as e:
+                error = e
+
+            delay = _full_jitter(self.backoff_base, self.backoff_max, attempt)
+            if attempt >= self.max_retries or time.monotonic() - started + delay > self.retry_budget:
+                raise error
+
+            logger.warning(f"Upstream call failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def _full_jitter(base: float, cap: float, attempt: int) -> float:
+    # "Full jitter": spreads retries from concurrent workers instead of synchronising them
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+_breaker: CircuitBreaker | None = None
+_client: PooledHttpClient | None = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPooledHttpClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_client_lock = threading.Lock()
+
+
+def get_image_circuit_breaker() -> CircuitBreaker:
+    # Один выключатель на процесс: синхронный и асинхронный клиенты видят одни и те же сбои апстрима
+    global _breaker
+
+    with _client_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                failure_threshold=settings.IMAGE_HTTP_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.IMAGE_HTTP_CIRCUIT_RESET_TIMEOUT,
+            )
+        return _breaker
+
+
+def get_image_http_client() -> PooledHttpClient:
+    global _client
+
+    breaker = get_image_circuit_breaker()
+    with _client_lock:
+        if _client is None:
+            _client = PooledHttpClient(
+                pool_size=settings.IMAGE_HTTP_POOL_SIZE,
+                connect_timeout=settings.IMAGE_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.IMAGE_HTTP_READ_TIMEOUT,
+                max_retries=settings.IMAGE_HTTP_MAX_RETRIES,
+                retry_budget=settings.IMAGE_HTTP_RETRY_BUDGET,
+                download_timeout=settings.IMAGE_HTTP_DOWNLOAD_TIMEOUT,
+                breaker=breaker,
+            )
+        return _client
+
+
+def get_async_image_http_client() -> AsyncPooledHttpClient:
+    """Client for the running event loop; httpx connections cannot be shared between loops."""
+    loop = asyncio.get_running_loop()
+    breaker = get_image_circuit_breaker()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = AsyncPooledHttpClient(
+                pool_size=settings.IMAGE_HTTP_ASYNC_POOL_SIZE,
+                connect_timeout=settings.IMAGE_HTTP_CONNECT_TIMEOUT,
+                read_timeout=settings.IMAGE_HTTP_READ_TIMEOUT,
+                max_retries=settings.IMAGE_HTTP_MAX_RETRIES,
+                retry_budget=settings.IMAGE_HTTP_RETRY_BUDGET,
+                download_timeout=settings.IMAGE_HTTP_DOWNLOAD_TIMEOUT,
+                breaker=breaker,
+            )
+        return client
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import IO, Callable
+from django.conf import settings
+from .metrics import IMAGE_CACHE_EVICTIONS, IMAGE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """Content-addressed on-disk cache of generated images with LRU eviction.
+
+    Entries are keyed on everything that determines the upstream result, so
+    identical prompts are fetched once and shared across achievements and
+    worker processes. Recency is tracked through file mtimes, which keeps the
+    LRU order consistent between processes sharing the same directory.
+    """
+
+    SUFFIX = ".img"
+
+    def __init__(self, directory: str | Path, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(prompt: str, seed: int, model: str, width: int, height: int) -> str:
+        raw = "\x1f".join([prompt, str(seed), model, str(width), str(height)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def open(self, key: str) -> IO[bytes] | None:
+        """Opens an entry for reading (None on a miss), so large images are not read into memory."""
+        path = self._path(key)
+        try:
+            file = path.open("rb")
+            os.utime(path)
+        except FileNotFoundError:
+            IMAGE_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        except OSError as e:
+            logger.warning(f"Image cache read failed for {key}: {e}")
+            IMAGE_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        IMAGE_CACHE_LOOKUPS.labels("hit").inc()
+        return file
+
+    def set_file(self, key: str, file: IO[bytes], size: int) -> None:
+        """Stores an entry by copying from the file's current position, then rewinds the file."""
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        start = file.tell()
+        try:
+            self._write(key, lambda tmp: shutil.copyfileobj(file, tmp))
+        finally:
+            file.seek(start)
+
+    def _write(self, key: str, fill: Callable[[IO[bytes]], object]) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file first so readers never see a partial image
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                fill(tmp)
+            os.replace(tmp_name, path)
+        except OSError as e:
+            logger.warning(f"Image cache write failed for {key}: {e}")
+            return
+
+        self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.SUFFIX}"
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*/*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+
+        IMAGE_CACHE_EVICTIONS.inc(evicted)
+
+
+_cache: ImageCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    global _cache
+
+    directory = Path(settings.IMAGE_CACHE_DIR)
+    max_bytes = settings.IMAGE_CACHE_MAX_BYTES
+    with _cache_lock:
+        if _cache is None or _cache.directory != directory or _cache.max_bytes != max_bytes:
+            _cache = ImageCache(directory, max_bytes)
+        return _cache
@@ -0,0 +1,82 @@
+import hashlib
+import tempfile
+from typing import IO, Iterable
+from PIL import Image
+from django.core.files import File
+
+CHUNK_SIZE = 64 * 1024
+# Форматы, которые принимаем от апстрима, и расширения файлов для них
+IMAGE_EXTENSIONS = {"PNG": "png", "JPEG": "jpg", "WEBP": "webp", "GIF": "gif"}
+
+
+class InvalidImageError(ValueError):
+    """The upstream body is larger than allowed or is not an image."""
+
+
+class DownloadedImage(File):
+    """Image spooled to an anonymous temp file, with the SHA-256 and type found while writing it."""
+
+    def __init__(self, file: IO[bytes], sha256: str, extension: str, size: int) -> None:
+        super().__init__(file)
+        self.sha256 = sha256
+        self.extension = extension
+        self._size = size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+class ImageSpool:
+    """Writes an image chunk by chunk to a temp file, hashing it and enforcing max_bytes on the way.
+
+    Only one chunk is ever held in memory, however large the image is.
+    """
+
+    def __init__(self, max_bytes: int, declared_size: int | None = None) -> None:
+        if declared_size is not None and declared_size > max_bytes:
+            raise InvalidImageError(f"Image is {declared_size} bytes, the limit is {max_bytes}")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = tempfile.TemporaryFile()
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.close()
+            raise InvalidImageError(f"Image exceeds the {self.max_bytes} byte limit")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> DownloadedImage:
+        """Checks that the spooled bytes are an image Pillow can decode and returns it, rewound."""
+        self._file.seek(0)
+        try:
+            with Image.open(self._file, formats=list(IMAGE_EXTENSIONS)) as image:
+                image_format = image.format
+                image.verify()
+        except Exception as e:
+            self.close()
+            raise InvalidImageError(f"Not a valid image: {e}") from e
+        self._file.seek(0)
+        return DownloadedImage(self._file, self._digest.hexdigest(), IMAGE_EXTENSIONS[image_format], self.size)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def spool_image(chunks: Iterable[bytes], max_bytes: int, declared_size: int | None = None) -> DownloadedImage:
+    spool = ImageSpool(max_bytes, declared_size)
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    return spool.finish()
+
+
+def declared_size(headers: dict | None) -> int | None:
+    value = (headers or {}).get("Content-Length")
+    return int(value) if value and str(value).isdigit() else None
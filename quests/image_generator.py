@@ -1,9 +1,18 @@
+import asyncio
 import logging
+import httpx
 import requests
 import os
+import time
+import zlib
+from typing import Any
 from urllib.parse import quote
-from django.core.files.base import ContentFile
+from django.conf import settings
 from dotenv import load_dotenv
+from .image_cache import ImageCache, get_image_cache
+from .image_files import CHUNK_SIZE, DownloadedImage, InvalidImageError, spool_image
+from .http_client import CircuitOpenError, get_async_image_http_client, get_image_http_client
+from .metrics import IMAGE_GENERATION_LATENCY, IMAGE_GENERATIONS
 
 load_dotenv()
 
@@ -12,53 +21,156 @@ logger = logging.getLogger(__name__)
 WIDTH_IMAGE_SIZE = 1024
 HEIGHT_IMAGE_SIZE = 1024
 MODEL = "nanobanana"
+API_BASE_URL = os.environ.get("POLLINATIONS_BASE_URL", "https://gen.pollinations.ai/image")
+
+
+def default_seed(achievement_name: str) -> int:
+    # hash() is salted per process, so it would give every gunicorn worker its own seed
+    return zlib.crc32(achievement_name.encode("utf-8")) % 10000
+
+
+def build_image_request(
+    quest_title: str, quest_description: str, achievement_name: str, seed: int | None = None
+) -> tuple[str, int, str, dict[str, Any]]:
+    """Returns (prompt, seed, api_url, params) for one Pollinations call."""
+    # Construct prompt for image generation
+    prompt = (
+        f"Нужно нарисовать ачивку с названием '{achievement_name}'. "
+        f"Квест после которого дается ачивка называется: {quest_title}. "
+        f"digital art"
+    )
+
+    # Truncate description if too long to avoid URL length issues
+    if quest_description and len(quest_description) < 100:
+        prompt += f". Описание квеста ачивки: {quest_description}"
+
+    if seed is None:
+        seed = default_seed(achievement_name)
+
+    # URL encode the prompt
+    encoded_prompt = quote(prompt)
+
+    # Pollinations.ai API endpoint
+    api_key = os.environ.get("POLLINATIONS_API_KEY", "")
+    api_url = f"{API_BASE_URL}/{encoded_prompt}?model={MODEL}&key={api_key}"
+
+    # Add parameters for better quality
+    params = {
+        "width": WIDTH_IMAGE_SIZE,
+        "height": HEIGHT_IMAGE_SIZE,
+        "seed": seed,
+        "nologo": "true",
+    }
+    return prompt, seed, api_url, params
+
+
+def image_cache_key(
+    quest_title: str, quest_description: str, achievement_name: str, seed: int | None = None
+) -> str:
+    """Identifies the image a generate call would return: same key, same picture."""
+    prompt, seed, _, _ = build_image_request(quest_title, quest_description, achievement_name, seed)
+    return ImageCache.make_key(prompt, seed, MODEL, WIDTH_IMAGE_SIZE, HEIGHT_IMAGE_SIZE)
 
 
 def generate_achievement_image(
     quest_title: str, quest_description: str, achievement_name: str, seed: int = None
-) -> ContentFile | None:
+) -> DownloadedImage | None:
+    started = time.perf_counter()
     try:
-        # Construct prompt for image generation
-        prompt = (
-            f"Нужно нарисовать ачивку с названием '{achievement_name}'. "
-            f"Квест после которого дается ачивка называется: {quest_title}. "
-            f"digital art"
-        )
-
-        # Truncate description if too long to avoid URL length issues
-        if quest_description and len(quest_description) < 100:
-            prompt += f". Описание квеста ачивки: {quest_description}"
-
-        # URL encode the prompt
-        encoded_prompt = quote(prompt)
-
-        # Pollinations.ai API endpoint
-        api_key = os.environ.get("POLLINATIONS_API_KEY", "")
-        api_url = f"https://gen.pollinations.ai/image/{encoded_prompt}?model={MODEL}&key={api_key}"
-
-        # Add parameters for better quality
-        params = {
-            "width": WIDTH_IMAGE_SIZE,
-            "height": HEIGHT_IMAGE_SIZE,
-            "seed": seed if seed is not None else (hash(achievement_name) % 10000),
-            "nologo": "true",
-        }
+        prompt, seed, api_url, params = build_image_request(quest_title, quest_description, achievement_name, seed)
 
-        logger.info(f"Generating image for achievement: {achievement_name}")
+        cache = get_image_cache()
+        cache_key = cache.make_key(prompt, seed, MODEL, WIDTH_IMAGE_SIZE, HEIGHT_IMAGE_SIZE)
+        cached_image = _open_cached(cache, cache_key)
+        if cached_image is not None:
+            logger.info(f"Image cache hit for achievement: {achievement_name}")
+            _record_outcome("cache_hit", started)
+            return cached_image
 
-        # Make request to Pollinations.ai
-        response = requests.get(api_url, params=params, timeout=60)
-        response.raise_for_status()
+        logger.info(f"Generating image for achievement: {achievement_name}")
 
-        # Create ContentFile from response
-        image_content = ContentFile(response.content)
+        # Make request to Pollinations.ai over the shared keep-alive pool; the body is streamed to a temp file
+        image = get_image_http_client().download(api_url, params, settings.IMAGE_MAX_BYTES)
+        cache.set_file(cache_key, image.file, image.size)
 
         logger.info(f"Successfully generated image for: {achievement_name}")
-        return image_content
+        _record_outcome("success", started)
+        return image
 
+    except CircuitOpenError as e:
+        logger.error(f"Failed to generate image for {achievement_name}: {e}")
+        _record_outcome("circuit_open", started)
+        return None
     except requests.RequestException as e:
         logger.error(f"Failed to generate image for {achievement_name}: {e}")
+        _record_outcome("http_error", started)
+        return None
+    except InvalidImageError as e:
+        logger.error(f"Upstream returned an unusable image for {achievement_name}: {e}")
+        _record_outcome("invalid", started)
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error generating image for {achievement_name}: {e}")
+        _record_outcome("error", started)
+        return None
+
+
+async def agenerate_achievement_image(
+    quest_title: str, quest_description: str, achievement_name: str, seed: int | None = None
+) -> DownloadedImage | None:
+    """Async twin of generate_achievement_image for ASGI views: awaits the upstream instead of blocking a thread."""
+    started = time.perf_counter()
+    try:
+        prompt, seed, api_url, params = build_image_request(quest_title, quest_description, achievement_name, seed)
+
+        cache = get_image_cache()
+        cache_key = cache.make_key(prompt, seed, MODEL, WIDTH_IMAGE_SIZE, HEIGHT_IMAGE_SIZE)
+        # Файловый кеш - это диск, уносим его из цикла событий
+        cached_image = await asyncio.to_thread(_open_cached, cache, cache_key)
+        if cached_image is not None:
+            logger.info(f"Image cache hit for achievement: {achievement_name}")
+            _record_outcome("cache_hit", started)
+            return cached_image
+
+        logger.info(f"Generating image for achievement: {achievement_name}")
+        image = await get_async_image_http_client().download(api_url, params, settings.IMAGE_MAX_BYTES)
+        await asyncio.to_thread(cache.set_file, cache_key, image.file, image.size)
+
+        logger.info(f"Successfully generated image for: {achievement_name}")
+        _record_outcome("success", started)
+        return image
+
+    except CircuitOpenError as e:
+        logger.error(f"Failed to generate image for {achievement_name}: {e}")
+        _record_outcome("circuit_open", started)
+        return None
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to generate image for {achievement_name}: {e}")
+        _record_outcome("http_error", started)
+        return None
+    except InvalidImageError as e:
+        logger.error(f"Upstream returned an unusable image for {achievement_name}: {e}")
+        _record_outcome("invalid", started)
         return None
     except Exception as e:
         logger.error(f"Unexpected error generating image for {achievement_name}: {e}")
+        _record_outcome("error", started)
         return None
+
+
+def _open_cached(cache: ImageCache, cache_key: str) -> DownloadedImage | None:
+    cached = cache.open(cache_key)
+    if cached is None:
+        return None
+    # Копия во временный файл: запись кеша может быть вытеснена, пока картинку сохраняют
+    with cached:
+        try:
+            return spool_image(iter(lambda: cached.read(CHUNK_SIZE), b""), settings.IMAGE_MAX_BYTES)
+        except InvalidImageError as e:
+            logger.warning(f"Ignoring unusable image cache entry {cache_key}: {e}")
+            return None
+
+
+def _record_outcome(outcome: str, started: float) -> None:
+    IMAGE_GENERATIONS.labels(outcome).inc()
+    IMAGE_GENERATION_LATENCY.labels(outcome).observe(time.perf_counter() - started)
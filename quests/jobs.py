@@ -0,0 +1,295 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+from .models import Achievement, ImageJob, SpeculativeImage
+from .image_generator import generate_achievement_image, image_cache_key
+from .versioning import bump_user_versions
+from .events import publish_achievement_event
+from .thumbnails import RENDITION_DIR, touch_file
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз подряд пытаемся "захватить" задачу, если её перехватил другой воркер
+CLAIM_RETRIES = 5
+# Задачи в статусе running дольше этого времени считаем брошенными (воркер упал)
+STALE_JOB_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_image_job(achievement: Achievement, seed: int | None = None) -> ImageJob:
+    if achievement.image_status != "pending":
+        achievement.image_status = "pending"
+        achievement.save(update_fields=["image_status"])
+    return ImageJob.objects.create(achievement=achievement, seed=seed)
+
+
+def claim_next_job() -> ImageJob | None:
+    for _ in range(CLAIM_RETRIES):
+        job_id = (
+            ImageJob.objects.filter(status="pending").order_by("created_at", "id").values_list("id", flat=True).first()
+        )
+        if job_id is None:
+            return None
+
+        # Условный UPDATE: задачу получает только тот воркер, который первым сменил статус
+        claimed = ImageJob.objects.filter(pk=job_id, status="pending").update(
+            status="running", started_at=timezone.now(), attempts=F("attempts") + 1
+        )
+        if claimed:
+            return ImageJob.objects.select_related("achievement__quest", "achievement__archived_quest").get(pk=job_id)
+    return None
+
+
+def claim_next_speculative_image() -> SpeculativeImage | None:
+    for _ in range(CLAIM_RETRIES):
+        asset_id = (
+            SpeculativeImage.objects.filter(status="pending")
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if asset_id is None:
+            return None
+
+        claimed = SpeculativeImage.objects.filter(pk=asset_id, status="pending").update(
+            status="running", started_at=timezone.now()
+        )
+        if claimed:
+            return SpeculativeImage.objects.select_related("quest").get(pk=asset_id)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    cutoff = timezone.now() - STALE_JOB_TIMEOUT
+    SpeculativeImage.objects.filter(status="running", started_at__lt=cutoff).update(status="pending")
+    return ImageJob.objects.filter(status="running", started_at__lt=cutoff).update(status="pending")
+
+
+def run_job(job: ImageJob) -> None:
+    achievement = job.achievement
+    quest = achievement.source_quest
+
+    try:
+        image_content = generate_achievement_image(
+            quest_title=quest.title,
+            quest_description=quest.description,
+            achievement_name=achievement.name,
+            seed=job.seed,
+        )
+        if image_content:
+            # Закрываем сразу: за картинкой стоит временный файл
+            with image_content:
+                save_achievement_image(achievement, image_content)
+            _finish_job(job, "done")
+            return
+        error = "Image generator returned no content"
+    except Exception as e:
+        error = str(e)
+
+    logger.error(f"Image job {job.id} for achievement {achievement.id} failed (attempt {job.attempts}): {error}")
+    if job.attempts < ImageJob.MAX_ATTEMPTS:
+        job.status = "pending"
+        job.error = error
+        job.save(update_fields=["status", "error"])
+    else:
+        _finish_job(job, "failed", error=error)
+
+
+def run_speculative_image(asset: SpeculativeImage) -> None:
+    quest = asset.quest
+    cache_key = image_cache_key(quest.title, quest.description, quest.planned_achievement_name)
+    image_content = generate_achievement_image(
+        quest_title=quest.title,
+        quest_description=quest.description,
+        achievement_name=quest.planned_achievement_name,
+    )
+    if not image_content:
+        SpeculativeImage.objects.filter(pk=asset.pk, status="running").update(status="failed")
+        return
+
+    storage = asset.image.storage
+    extension = getattr(image_content, "extension", "png")
+    try:
+        with image_content:
+            name = storage.save(f"speculative/quest_{quest.id}_{cache_key[:12]}.{extension}", image_content)
+    except OSError as e:
+        logger.error(f"Could not store speculative image for quest {quest.id}: {e}")
+        SpeculativeImage.objects.filter(pk=asset.pk, status="running").update(status="failed")
+        return
+    # Условный UPDATE: если квест успели провалить или перезапустить, строки уже нет и файл не нужен
+    done = SpeculativeImage.objects.filter(pk=asset.pk, status="running").update(
+        status="done", image=name, cache_key=cache_key
+    )
+    if not done:
+        storage.delete(name)
+
+
+def process_next_job() -> bool:
+    job = claim_next_job()
+    if job is not None:
+        run_job(job)
+        return True
+
+    # Заранее рисуем картинки только когда в очереди нет настоящих задач
+    if settings.SPECULATIVE_IMAGES:
+        asset = claim_next_speculative_image()
+        if asset is not None:
+            run_speculative_image(asset)
+            return True
+    return False
+
+
+def save_achievement_image(achievement: Achievement, image_content: File) -> None:
+    """Stores the image under its content hash and points the achievement at it.
+
+    Identical images share one file (and one set of renditions), and a new
+    picture always gets a new URL that can be cached forever.
+    """
+    digest = getattr(image_content, "sha256", None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in image_content.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    image_content.seek(0)
+    extension = getattr(image_content, "extension", None) or _extension(image_content.name) or "png"
+    name = f"{Achievement.image.field.upload_to}{digest}.{extension}"
+
+    old_name = achievement.image.name if achievement.image else None
+    if old_name == name:
+        # Та же картинка уже сохранена - переписывать файл незачем
+        achievement.image_status = "done"
+        achievement.save(update_fields=["image_status"])
+        publish_achievement_event(achievement)
+        return
+
+    storage = achievement.image.storage
+    if storage.exists(name):
+        # Файл мог остаться без ссылок: обновляем mtime, чтобы sweep_orphan_images не удалил его из-под нас
+        touch_file(storage, name)
+    else:
+        saved = storage.save(name, image_content)
+        if saved != name:
+            # Другой воркер успел записать ту же картинку между exists() и save(): копию с суффиксом не оставляем
+            storage.delete(saved)
+            touch_file(storage, name)
+    achievement.image.name = name
+    achievement.image_status = "done"
+    # Только свои поля: пока рисовалась картинка, archive_quests мог перевесить ачивку на архивный квест
+    achievement.save(update_fields=["image", "image_status"])
+    publish_achievement_event(achievement)
+    # Прежний файл здесь не удаляем: его могла подхватить другая ачивка, это решает sweep_orphan_images
+
+
+def sweep_orphan_images(now: datetime | None = None) -> int:
+    """Deletes achievement images and renditions that no achievement references any more.
+
+    Only files older than ORPHAN_IMAGE_GRACE_SECONDS are considered, and the
+    age is checked again right before each delete: a worker that stored or
+    reused a file (save_achievement_image touches it) but has not committed
+    yet keeps it.
+    """
+    storage = Achievement.image.field.storage
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.ORPHAN_IMAGE_GRACE_SECONDS)
+    source_dir = Achievement.image.field.upload_to.rstrip("/")
+
+    candidates = [f"{source_dir}/{name}" for name in _list_files(storage, source_dir)]
+    candidates += [f"{RENDITION_DIR}/{name}" for name in _list_files(storage, RENDITION_DIR)]
+    candidates = [name for name in candidates if storage.get_modified_time(name) < cutoff]
+    if not candidates:
+        return 0
+
+    # Превью называются по имени исходника (<sha256>_<size>.<ext>), так что ссылку на них даёт сама картинка
+    referenced = set()
+    image_names = Achievement.objects.exclude(image="").exclude(image=None).values_list("image", flat=True)
+    for image_name in image_names.iterator():
+        referenced.add(image_name)
+        referenced.add(os.path.splitext(os.path.basename(image_name))[0])
+
+    deleted = 0
+    for name in candidates:
+        stem = os.path.splitext(os.path.basename(name))[0]
+        if name.startswith(f"{RENDITION_DIR}/"):
+            stem = stem.rsplit("_", 1)[0]
+        if name in referenced or stem in referenced:
+            continue
+        try:
+            if storage.get_modified_time(name) < cutoff:
+                storage.delete(name)
+                deleted += 1
+        except FileNotFoundError:
+            continue
+    if deleted:
+        logger.info(f"Deleted {deleted} orphaned achievement image file(s)")
+    return deleted
+
+
+def _list_files(storage, directory: str) -> list[str]:
+    try:
+        return storage.listdir(directory)[1]
+    except FileNotFoundError:
+        return []
+
+
+def _extension(name: str | None) -> str:
+    return os.path.splitext(name or "")[1].lstrip(".").lower()
+
+
+def _finish_job(job: ImageJob, job_status: str, error: str = "") -> None:
+    job.status = job_status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+    if job_status == "failed":
+        Achievement.objects.filter(pk=job.achievement_id).update(image_status="failed")
+        bump_user_versions([job.achievement.user_id])
+        job.achievement.image_status = "failed"
+        publish_achievement_event(job.achievement)
+
+
+class ImageWorkerPool:
+    """Пул потоков, разбирающих очередь ImageJob из базы данных."""
+
+    def __init__(self, workers: int = 2, poll_interval: float = 1.0) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        requeued = requeue_stale_jobs()
+        if requeued:
+            logger.warning(f"Requeued {requeued} stale image job(s)")
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"image-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self) -> None:
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    processed = process_next_job()
+                except Exception as e:
+                    logger.error(f"Image worker crashed while processing a job: {e}")
+                    processed = False
+
+                if not processed:
+                    self._stop.wait(self.poll_interval)
+        finally:
+            connection.close()
@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+from typing import Any
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from quests.archive import archivable_quests, archive_quests
+
+
+class Command(BaseCommand):
+    help = "Moves completed and failed quests that ended long ago (and their achievement links) to the archive table."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Archive quests whose end_time is older than this (default: QUEST_ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Quests moved per transaction, in id order.")
+        parser.add_argument(
+            "--sleep", type=float, default=0.0, help="Seconds to pause between batches so API writers can get the lock."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        days = options["older_than_days"]
+        if days is None:
+            days = settings.QUEST_ARCHIVE_AFTER_DAYS
+        batch_size = max(options["batch_size"], 1)
+        # Граница фиксируется один раз: квесты, "постаревшие" во время работы, подождут следующего запуска
+        before = timezone.now() - timedelta(days=days)
+
+        last_id = 0
+        total = 0
+        batch_number = 0
+        while True:
+            ids = list(
+                archivable_quests(before)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            batch_number += 1
+            started = time.monotonic()
+            archived = archive_quests(before, quest_ids=ids)
+            elapsed_ms = (time.monotonic() - started) * 1000
+
+            total += archived
+            last_id = ids[-1]
+            self.stdout.write(f"Batch {batch_number}: archived {archived} quest(s) in {elapsed_ms:.1f} ms")
+
+            if len(ids) < batch_size:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        if total > 0:
+            self.stdout.write(self.style.SUCCESS(f"Archived {total} quest(s) that ended before {before:%Y-%m-%d}."))
+        else:
+            self.stdout.write(self.style.NOTICE("No quests to archive."))
@@ -1,19 +1,67 @@
+import time
 from typing import Any
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
+from quests.expiry import expire_quests
 from quests.models import Quest
 
 
 class Command(BaseCommand):
     help = "Finds active quests that have passed their end_time and marks them as failed."
 
-    def handle(self, *args: Any, **options: Any) -> None:
-        now = timezone.now()
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=0,
+            help="Expire quests in id-ordered chunks of this size, each in its own transaction (0 = single UPDATE).",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=0.0, help="Seconds to pause between batches so API writers can get the lock."
+        )
 
-        # Bulk update: extremely efficient for large datasets
-        updated_count = Quest.objects.filter(status="active", end_time__lt=now).update(status="failed", updated_at=now)
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["batch_size"] > 0:
+            updated_count = self._expire_in_batches(options["batch_size"], options["sleep"])
+        else:
+            # Bulk update: extremely efficient for large datasets
+            updated_count = expire_quests()
 
         if updated_count > 0:
             self.stdout.write(self.style.SUCCESS(f"Successfully marked {updated_count} quest(s) as failed."))
         else:
             self.stdout.write(self.style.NOTICE("No expired active quests found."))
+
+    def _expire_in_batches(self, batch_size: int, sleep: float) -> int:
+        # Фиксируем "сейчас", чтобы цикл закончился даже при постоянном потоке новых истечений
+        now = timezone.now()
+        last_id = 0
+        total = 0
+        batch_number = 0
+
+        while True:
+            ids = list(
+                Quest.objects.filter(status="active", end_time__lt=now, id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            batch_number += 1
+            started = time.monotonic()
+            with transaction.atomic():
+                updated = expire_quests(now=now, quest_ids=ids)
+            elapsed_ms = (time.monotonic() - started) * 1000
+
+            total += updated
+            last_id = ids[-1]
+            self.stdout.write(f"Batch {batch_number}: marked {updated} quest(s) as failed in {elapsed_ms:.1f} ms")
+
+            if len(ids) < batch_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+
+        return total
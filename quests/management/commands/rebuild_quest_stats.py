@@ -0,0 +1,26 @@
+from typing import Any
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from quests.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes UserQuestStats from the quest and achievement tables (backfill or repair)."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids", help="Only this user id (repeatable)."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user_ids = options["user_ids"] or User.objects.order_by("id").values_list("id", flat=True).iterator()
+
+        rebuilt = 0
+        for user_id in user_ids:
+            # Своя транзакция на пользователя: запись не держит блокировку на всю таблицу пользователей
+            with transaction.atomic():
+                rebuild_user_stats(user_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt quest stats for {rebuilt} user(s)."))
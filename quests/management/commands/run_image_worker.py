@@ -0,0 +1,32 @@
+import signal
+import threading
+from typing import Any
+from django.core.management.base import BaseCommand
+from quests.jobs import ImageWorkerPool
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of worker threads that render pending achievement images."
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument("--workers", type=int, default=4, help="Number of worker threads.")
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        pool = ImageWorkerPool(workers=options["workers"], poll_interval=options["poll_interval"])
+        stopped = threading.Event()
+
+        def shutdown(signum: int, frame: Any) -> None:
+            stopped.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        pool.start()
+        self.stdout.write(self.style.SUCCESS(f"Image worker pool started with {options['workers']} thread(s)."))
+
+        stopped.wait()
+        pool.stop(timeout=5)
+        self.stdout.write(self.style.NOTICE("Image worker pool stopped."))
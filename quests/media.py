@@ -0,0 +1,132 @@
+import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from typing import Iterator
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+
+# <sha256>.png and its renditions (<sha256>_<size>.webp); older images: achievement_<id>_<quest>_<sha256[:12]>.png
+VERSIONED_NAME_RE = re.compile(r"(?:/[0-9a-f]{64}|_[0-9a-f]{12})(?:_\d+)?\.\w+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=4096)
+def _file_etag(path: str, mtime_ns: int, size: int) -> str:
+    # mtime/size входят в ключ кеша, так что перезаписанный файл получит новый ETag
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Returns an inclusive (start, end) pair, or None for an unsatisfiable range.
+
+    Raises ValueError for syntax we don't support (e.g. multiple ranges); per
+    RFC 9110 such a Range header is ignored and the whole file is sent.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise ValueError(f"Unsupported Range header: {header}")
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _read_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """Serves MEDIA_ROOT files with strong ETags, 304s and byte ranges.
+
+    Content-versioned names get a year-long immutable Cache-Control; anything
+    else must be revalidated. With MEDIA_SENDFILE_HEADER set, the body is
+    handed off to the front proxy (X-Accel-Redirect / X-Sendfile).
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Media file not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    etag = _file_etag(full_path, stat.st_mtime_ns, stat.st_size)
+    cache_control = IMMUTABLE_CACHE_CONTROL if VERSIONED_NAME_RE.search(path) else REVALIDATE_CACHE_CONTROL
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_SENDFILE_HEADER:
+        # Range-запросы и отдачу тела берёт на себя nginx/apache
+        response = HttpResponse(content_type=content_type)
+        if settings.MEDIA_SENDFILE_HEADER.lower() == "x-sendfile":
+            response[settings.MEDIA_SENDFILE_HEADER] = full_path
+        else:
+            response[settings.MEDIA_SENDFILE_HEADER] = settings.MEDIA_SENDFILE_PREFIX.rstrip("/") + "/" + path
+    else:
+        response = _file_response(request, full_path, stat.st_size, etag, content_type)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def _file_response(request: HttpRequest, full_path: str, size: int, etag: str, content_type: str) -> HttpResponse:
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    # If-Range с устаревшим ETag означает "отдай файл целиком"
+    byte_range: tuple[int, int] | None = None
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            range_header = None
+        if range_header and byte_range is None:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_read_range(full_path, start, length), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+    else:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,187 @@
+import hmac
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_safe
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_LATENCY = Histogram(
+    "quest_http_request_duration_seconds",
+    "Time spent handling a request, by DRF route name.",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "quest_http_request_db_queries",
+    "SQL queries executed per request.",
+    ["route", "method"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "quest_http_request_db_duration_seconds",
+    "Time spent in SQL per request.",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "quest_http_response_size_bytes",
+    "Response body size (streaming responses are not counted).",
+    ["route", "method"],
+    buckets=SIZE_BUCKETS,
+)
+IMAGE_GENERATION_LATENCY = Histogram(
+    "quest_image_generation_duration_seconds",
+    "generate_achievement_image() latency, by outcome.",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+IMAGE_GENERATIONS = Counter(
+    "quest_image_generations",
+    "generate_achievement_image() calls: cache_hit, success, circuit_open, http_error, invalid or error.",
+    ["outcome"],
+)
+
+IMAGE_CACHE_LOOKUPS = Counter(
+    "quest_image_cache_lookups",
+    "Lookups in the on-disk generated image cache (quests/image_cache.py): hit or miss.",
+    ["result"],
+)
+IMAGE_CACHE_EVICTIONS = Counter(
+    "quest_image_cache_evictions",
+    "Entries evicted from the on-disk generated image cache to stay under IMAGE_CACHE_MAX_BYTES.",
+)
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "quest_response_cache_lookups",
+    "Lookups in the serialized list payload cache (quests/response_cache.py): hit or miss.",
+    ["result"],
+)
+
+
+def route_name(request: HttpRequest) -> str:
+    # Имя маршрута DRF (quest-list, quest-complete, ...), а не путь: id в пути раздул бы число серий
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.url_name or "spa"
+
+
+class QueryStats:
+    """connection.execute_wrapper that counts queries and the time spent in them."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+_request_queries: ContextVar[QueryStats | None] = ContextVar("quest_request_queries", default=None)
+
+
+def track_queries(execute: Callable, sql: str, params: Any, many: bool, context: Any) -> Any:
+    # Под ASGI запросы к БД идут из потоков sync_to_async со своими соединениями;
+    # контекст запроса копируется в эти потоки, поэтому счётчик берём из ContextVar
+    queries = _request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+
+def install_query_tracking(sender: Any = None, connection: Any = connection, **kwargs: Any) -> None:
+    # Первым в списке: connection.execute_wrapper() снимает с конца то, что добавил
+    if track_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, track_queries)
+
+
+connection_created.connect(install_query_tracking, dispatch_uid="quests.metrics.install_query_tracking")
+
+
+class RequestMetricsMiddleware:
+    """Records latency, SQL and response size per route; runs natively in both WSGI and ASGI modes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        install_query_tracking(connection=connection)
+        queries = QueryStats()
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._observe(request, response, time.perf_counter() - started, queries)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        get_response: Callable[[HttpRequest], Awaitable[HttpResponse]] = self.get_response
+        queries = QueryStats()
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._observe(request, response, time.perf_counter() - started, queries)
+        return response
+
+    def _observe(self, request: HttpRequest, response: HttpResponse, elapsed: float, queries: QueryStats) -> None:
+        route, method = route_name(request), request.method
+        REQUEST_LATENCY.labels(route, method, str(response.status_code)).observe(elapsed)
+        REQUEST_DB_QUERIES.labels(route, method).observe(queries.count)
+        REQUEST_DB_TIME.labels(route, method).observe(queries.duration)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route, method).observe(len(response.content))
+
+
+@require_safe
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Prometheus text exposition of this process, or of all processes in multiprocess mode.
+
+    Under gunicorn set PROMETHEUS_MULTIPROC_DIR (entrypoint.sh does), so every
+    worker, the image worker pool and the scheduler write to one directory.
+    Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>"; without
+    METRICS_TOKEN the endpoint is not served.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    auth = request.headers.get("Authorization", "").split()
+    # Маршруты и объёмы запросов не для посторонних; сравнение за постоянное время
+    if len(auth) != 2 or auth[0].lower() != "bearer" or not hmac.compare_digest(auth[1], settings.METRICS_TOKEN):
+        response = HttpResponse("Unauthorized", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
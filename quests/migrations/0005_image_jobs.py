@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_image_status(apps, schema_editor):
+    # Achievements created before the job queue either got an image inline or never will
+    Achievement = apps.get_model("quests", "Achievement")
+    Achievement.objects.exclude(image="").exclude(image__isnull=True).update(image_status="done")
+    Achievement.objects.filter(image_status="pending").update(image_status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quests', '0004_achievement_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('seed', models.IntegerField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('achievement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='quests.achievement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='quests_imag_status_411085_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_image_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 03:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quests', '0005_image_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['user', 'awarded_at', 'id'], name='quests_achi_user_id_137996_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='quests_ques_user_id_f8b78f_idx'),
+        ),
+    ]
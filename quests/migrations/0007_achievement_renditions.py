@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quests', '0006_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quests', '0009_quest_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['user', 'rarity', 'awarded_at'], name='quests_achi_user_id_80571c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quest',
+            index=models.Index(fields=['user', 'status', 'end_time'], name='quests_ques_user_id_021efc_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('quests', '0010_per_user_status_rarity_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserQuestStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quest_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('status_created', models.PositiveIntegerField(default=0)),
+                ('status_active', models.PositiveIntegerField(default=0)),
+                ('status_completed', models.PositiveIntegerField(default=0)),
+                ('status_failed', models.PositiveIntegerField(default=0)),
+                ('difficulty_easy', models.PositiveIntegerField(default=0)),
+                ('difficulty_medium', models.PositiveIntegerField(default=0)),
+                ('difficulty_hard', models.PositiveIntegerField(default=0)),
+                ('difficulty_insane', models.PositiveIntegerField(default=0)),
+                ('rarity_bronze', models.PositiveIntegerField(default=0)),
+                ('rarity_silver', models.PositiveIntegerField(default=0)),
+                ('rarity_gold', models.PositiveIntegerField(default=0)),
+                ('rarity_diamond', models.PositiveIntegerField(default=0)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('best_streak', models.PositiveIntegerField(default=0)),
+                ('total_completed_seconds', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
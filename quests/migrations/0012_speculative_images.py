@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quests', '0011_user_quest_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeculativeImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('cache_key', models.CharField(blank=True, max_length=64)),
+                ('image', models.FileField(blank=True, null=True, upload_to='speculative/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('quest', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='speculative_image', to='quests.quest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='quests_spec_status_2f72bc_idx')],
+            },
+        ),
+    ]
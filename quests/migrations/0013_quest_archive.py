@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quests', '0012_speculative_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='achievement',
+            name='quest',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='achievement', to='quests.quest'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedQuest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('planned_achievement_name', models.CharField(max_length=255)),
+                ('difficulty', models.CharField(choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard'), ('insane', 'Insane')], max_length=20)),
+                ('status', models.CharField(choices=[('created', 'Created'), ('active', 'Active'), ('completed', 'Completed'), ('failed', 'Failed')], max_length=20)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_quests', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='achievement',
+            name='archived_quest',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='achievement', to='quests.archivedquest'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedquest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='quests_arch_user_id_a9dba6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='achievement',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('archived_quest__isnull', True), ('quest__isnull', False)), models.Q(('archived_quest__isnull', False), ('quest__isnull', True)), _connector='OR'), name='achievement_exactly_one_quest'),
+        ),
+    ]
@@ -1,6 +1,17 @@
-from django.db import models
+from typing import Any
+from django.db import models, transaction
+from django.db.models.fields.files import FieldFile
 from django.contrib.auth.models import User
 from django.utils import timezone
+from .thumbnails import build_renditions
+
+
+class QuestTransitionError(Exception):
+    """Запрошенный переход статуса квеста недопустим."""
+
+
+class QuestExpiredError(QuestTransitionError):
+    """Квест истёк при попытке завершения; статус уже переведён в failed, но не сохранён."""
 
 
 class Quest(models.Model):
@@ -34,6 +45,8 @@ class Quest(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["status", "end_time"]),
+            models.Index(fields=["user", "created_at", "id"]),
+            models.Index(fields=["user", "status", "end_time"]),
         ]
 
     def __str__(self) -> str:
@@ -45,6 +58,95 @@ class Quest(models.Model):
             return True
         return False
 
+    # Переходы статусов меняют только поля в памяти; сохранение - на вызывающей стороне
+
+    def mark_started(self, duration_minutes: Any) -> None:
+        if self.status != "created":
+            raise QuestTransitionError("Quest is already started or finished")
+        try:
+            duration_minutes = int(duration_minutes)
+        except (TypeError, ValueError):
+            raise QuestTransitionError("duration_minutes must be an integer")
+        if duration_minutes < 1:
+            raise QuestTransitionError("duration_minutes must be positive")
+
+        self.status = "active"
+        self.start_time = timezone.now()
+        self.end_time = self.start_time + timezone.timedelta(minutes=duration_minutes)
+
+    def mark_completed(self) -> None:
+        # Проверяем "лениво", не истек ли квест прямо сейчас
+        if self.is_expired:
+            self.status = "failed"
+            raise QuestExpiredError("Quest time has expired")
+        if self.status != "active":
+            raise QuestTransitionError("Quest must be active to complete")
+        self.status = "completed"
+
+    def mark_restarted(self) -> None:
+        if self.status != "failed":
+            raise QuestTransitionError("Only failed quests can be restarted")
+        self.status = "created"
+        self.start_time = None
+        self.end_time = None
+
+
+class ArchivedQuest(models.Model):
+    """Завершённый или проваленный квест, перенесённый из Quest командой archive_quests.
+
+    Строки копируются как есть, с прежними id и датами, и больше не меняются;
+    API отдаёт их только по ?archived=true (см. QuestViewSet).
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_quests")
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    planned_achievement_name = models.CharField(max_length=255)
+    difficulty = models.CharField(max_length=20, choices=Quest.DIFFICULTY_CHOICES)
+    status = models.CharField(max_length=20, choices=Quest.STATUS_CHOICES)
+
+    start_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+
+    # Без auto_now: при переносе сохраняются даты исходного квеста
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # Колонки, которые переносятся из Quest один в один
+    COPIED_FIELDS = (
+        "id",
+        "user_id",
+        "title",
+        "description",
+        "planned_achievement_name",
+        "difficulty",
+        "status",
+        "start_time",
+        "end_time",
+        "created_at",
+        "updated_at",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.title} ({self.status}, archived)"
+
+    @classmethod
+    def from_quest(cls, quest: Quest, archived_at: Any = None) -> "ArchivedQuest":
+        values = {field: getattr(quest, field) for field in cls.COPIED_FIELDS}
+        return cls(**values, archived_at=archived_at or timezone.now())
+
+    @property
+    def is_expired(self) -> bool:
+        # В архиве только завершённые квесты
+        return False
+
 
 class Achievement(models.Model):
     RARITY_CHOICES = [
@@ -53,14 +155,212 @@ class Achievement(models.Model):
         ("gold", "Gold"),
         ("diamond", "Diamond"),
     ]
+    # Маппинг сложности квеста в редкость ачивки
+    RARITY_BY_DIFFICULTY = {
+        "easy": "bronze",
+        "medium": "silver",
+        "hard": "gold",
+        "insane": "diamond",
+    }
+    IMAGE_STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="achievements")
-    quest = models.OneToOneField(Quest, on_delete=models.CASCADE, related_name="achievement")
+    # Ровно одно из двух: после archive_quests ачивка ссылается на квест в архиве (с тем же id)
+    quest = models.OneToOneField(Quest, on_delete=models.CASCADE, null=True, blank=True, related_name="achievement")
+    archived_quest = models.OneToOneField(
+        "ArchivedQuest", on_delete=models.CASCADE, null=True, blank=True, related_name="achievement"
+    )
     name = models.CharField(max_length=255)
     icon_key = models.CharField(max_length=50, default="star")
     image = models.ImageField(upload_to="achievements/", null=True, blank=True)
+    # Уменьшенные копии картинки для галереи, см. quests/thumbnails.py
+    renditions = models.JSONField(default=dict, blank=True)
     rarity = models.CharField(max_length=20, choices=RARITY_CHOICES, default="silver")
+    image_status = models.CharField(max_length=20, choices=IMAGE_STATUS_CHOICES, default="pending")
     awarded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "awarded_at", "id"]),
+            models.Index(fields=["user", "rarity", "awarded_at"]),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(quest__isnull=False, archived_quest__isnull=True)
+                | models.Q(quest__isnull=True, archived_quest__isnull=False),
+                name="achievement_exactly_one_quest",
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"Achievement: {self.name} for {self.user.username}"
+
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get("update_fields")
+        image_name = self.image.name if self.image else None
+
+        if (update_fields is None or "image" in update_fields) and self.renditions.get("source") != image_name:
+            # Пока превью не построены, в renditions только source: галерея отдаёт исходник
+            self.renditions = {"source": image_name} if image_name else {}
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "renditions"}
+            # Кодирование WebP/AVIF - после коммита, чтобы не держать блокировку записи (SQLite) на всё время
+            transaction.on_commit(lambda: self._refresh_renditions(image_name))
+
+        super().save(*args, **kwargs)
+
+    def _refresh_renditions(self, image_name: str | None) -> None:
+        # Старые и ненужные превью не удаляем здесь: их (как и исходники) собирает sweep_orphan_images
+        if not image_name:
+            return
+        renditions = build_renditions(FieldFile(self, self.image.field, image_name))
+        # Условный UPDATE: если картинку успели сменить ещё раз, эти превью уже не нужны
+        if Achievement.objects.filter(pk=self.pk, image=image_name).update(renditions=renditions):
+            from .versioning import bump_user_versions
+
+            # UPDATE не шлёт post_save: закешированные списки должны увидеть превью
+            bump_user_versions([self.user_id])
+            if self.image.name == image_name:
+                self.renditions = renditions
+
+    @property
+    def source_quest(self) -> "Quest | ArchivedQuest":
+        return self.quest if self.quest_id is not None else self.archived_quest
+
+    @property
+    def source_quest_id(self) -> int:
+        # Квест уходит в архив с прежним id, так что для клиента ссылка не меняется
+        return self.quest_id if self.quest_id is not None else self.archived_quest_id
+
+
+class ImageJob(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    MAX_ATTEMPTS = 3
+
+    achievement = models.ForeignKey(Achievement, on_delete=models.CASCADE, related_name="image_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    seed = models.IntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"ImageJob #{self.pk} for achievement {self.achievement_id} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class SpeculativeImage(models.Model):
+    """Картинка ачивки, отрисованная заранее, пока квест активен (см. quests/speculative.py).
+
+    complete прикрепляет её к ачивке без похода в апстрим; при провале,
+    рестарте или удалении квеста строка и файл удаляются.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    quest = models.OneToOneField(Quest, on_delete=models.CASCADE, related_name="speculative_image")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    # Ключ кеша картинок для промпта, по которому рисовали: если квест успели отредактировать, картинка не подходит
+    cache_key = models.CharField(max_length=64, blank=True)
+    image = models.FileField(upload_to="speculative/", null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"SpeculativeImage for quest {self.quest_id} ({self.status})"
+
+
+class UserDataVersion(models.Model):
+    """Счётчик, который увеличивается при любом изменении квестов или ачивок пользователя.
+
+    Из него строится ETag списков: если версия не менялась, список можно не читать из БД.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="data_version")
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"Data version {self.version} for user {self.user_id}"
+
+
+class QuestEvent(models.Model):
+    """Журнал изменений для SSE-потока; id события служит курсором для Last-Event-ID."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="quest_events")
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk} for user {self.user_id}"
+
+
+class UserQuestStats(models.Model):
+    """Счётчики для дашборда, которые обновляются вместе с переходами квестов (см. quests/stats.py).
+
+    Счётчики по статусу, сложности и редкости отражают текущие строки; серии и
+    суммарное время выполнения - историю, удаление квеста их не откатывает.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="quest_stats")
+
+    status_created = models.PositiveIntegerField(default=0)
+    status_active = models.PositiveIntegerField(default=0)
+    status_completed = models.PositiveIntegerField(default=0)
+    status_failed = models.PositiveIntegerField(default=0)
+
+    difficulty_easy = models.PositiveIntegerField(default=0)
+    difficulty_medium = models.PositiveIntegerField(default=0)
+    difficulty_hard = models.PositiveIntegerField(default=0)
+    difficulty_insane = models.PositiveIntegerField(default=0)
+
+    rarity_bronze = models.PositiveIntegerField(default=0)
+    rarity_silver = models.PositiveIntegerField(default=0)
+    rarity_gold = models.PositiveIntegerField(default=0)
+    rarity_diamond = models.PositiveIntegerField(default=0)
+
+    # Серия - подряд завершённые квесты без единого проваленного
+    current_streak = models.PositiveIntegerField(default=0)
+    best_streak = models.PositiveIntegerField(default=0)
+    total_completed_seconds = models.PositiveBigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Quest stats for user {self.user_id}"
@@ -0,0 +1,22 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination, enabled when the client passes ``?page_size=``.
+
+    Without ``page_size`` the full list is returned as before, so existing
+    clients keep working. Pages are fetched with ``WHERE key < cursor`` on an
+    index instead of OFFSET, so the cost of a page does not grow with depth.
+    """
+
+    page_size = None
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class QuestCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class AchievementCursorPagination(KeysetPagination):
+    ordering = ("-awarded_at", "-id")
@@ -0,0 +1,21 @@
+from typing import Any
+from django.conf import settings
+from django.core.cache import caches
+from .metrics import RESPONSE_CACHE_LOOKUPS
+
+
+def cache_key(etag: str) -> str:
+    # ETag уже содержит пользователя, его версию данных и полный путь запроса
+    digest = etag.removeprefix("W/").strip('"')
+    return f"list-response:{digest}"
+
+
+def get_cached_payload(etag: str) -> Any | None:
+    payload = caches[settings.RESPONSE_CACHE_ALIAS].get(cache_key(etag))
+    # Счётчики попаданий - на /metrics (в multiprocess-режиме суммируются по всем воркерам)
+    RESPONSE_CACHE_LOOKUPS.labels("hit" if payload is not None else "miss").inc()
+    return payload
+
+
+def set_cached_payload(etag: str, payload: Any) -> None:
+    caches[settings.RESPONSE_CACHE_ALIAS].set(cache_key(etag), payload, settings.RESPONSE_CACHE_TIMEOUT)
@@ -1,7 +1,30 @@
 from typing import Any
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Quest, Achievement
+from .models import Quest, ArchivedQuest, Achievement, ImageJob, UserQuestStats
+
+
+def requested_fields(request: Any) -> set[str] | None:
+    """Field names from ?fields=id,title,...; None when the client wants every field."""
+    raw = request.query_params.get("fields") if request is not None and hasattr(request, "query_params") else None
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """Serializes only the fields listed in ?fields= (top-level objects; nested ones stay whole)."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get("request"))
+        if fields is None:
+            return
+        unknown = fields - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -10,9 +33,12 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email"]
 
 
-class AchievementSerializer(serializers.ModelSerializer):
-    quest_title = serializers.CharField(source="quest.title", read_only=True)
-    quest_description = serializers.CharField(source="quest.description", read_only=True)
+class AchievementSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Квест может быть и в архиве: id у него тот же, поля берём из той таблицы, где он лежит
+    quest = serializers.IntegerField(source="source_quest_id", read_only=True)
+    quest_title = serializers.CharField(source="source_quest.title", read_only=True)
+    quest_description = serializers.CharField(source="source_quest.description", read_only=True)
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Achievement
@@ -21,15 +47,47 @@ class AchievementSerializer(serializers.ModelSerializer):
             "name",
             "icon_key",
             "image",
+            "image_renditions",
             "awarded_at",
             "quest",
             "quest_title",
             "quest_description",
             "rarity",
+            "image_status",
         ]
+        read_only_fields = ["image_status"]
+
+    def get_image_renditions(self, achievement: Achievement) -> dict[str, dict[str, str]]:
+        # {"webp": {"128": url, "256": url, ...}} - готово для srcset на фронтенде
+        request = self.context.get("request")
+        storage = achievement.image.storage
+        result = {}
+        for image_format, names in achievement.renditions.items():
+            if image_format == "source":
+                continue
+            urls = {size: storage.url(name) for size, name in names.items()}
+            if request is not None:
+                urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+            result[image_format] = urls
+        return result
 
 
-class QuestSerializer(serializers.ModelSerializer):
+class ImageJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageJob
+        fields = [
+            "id",
+            "achievement",
+            "status",
+            "attempts",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+
+class QuestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     achievement = AchievementSerializer(read_only=True)
     is_active_expired = serializers.BooleanField(read_only=True, source="is_expired")
 
@@ -54,3 +112,31 @@ class QuestSerializer(serializers.ModelSerializer):
         # Автоматически привязываем квест к текущему пользователю
         validated_data["user"] = self.context["request"].user
         return super().create(validated_data)
+
+    def update(self, instance: Quest, validated_data: dict[str, Any]) -> Quest:
+        # Пишем только присланные поля: полный save() вернул бы статус, который успел сменить параллельный переход
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
+
+
+class ArchivedQuestSerializer(QuestSerializer):
+    """Read-only view of an ArchivedQuest; same shape as QuestSerializer plus archived_at."""
+
+    class Meta:
+        model = ArchivedQuest
+        fields = [*QuestSerializer.Meta.fields, "archived_at"]
+        read_only_fields = fields
+
+
+class UserQuestStatsSerializer(serializers.ModelSerializer):
+    completion_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserQuestStats
+        exclude = ["user"]
+
+    def get_completion_rate(self, stats: UserQuestStats) -> float | None:
+        finished = stats.status_completed + stats.status_failed
+        return round(stats.status_completed / finished, 4) if finished else None
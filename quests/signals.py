@@ -0,0 +1,55 @@
+from typing import Any
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .archive import is_archiving
+from .authentication import invalidate_tokens
+from .models import Quest, Achievement, SpeculativeImage
+from .versioning import bump_user_versions
+from .stats import StatsDelta, apply_stats_delta
+
+
+@receiver(post_save, sender=Quest)
+@receiver(post_save, sender=Achievement)
+def bump_version_on_save(sender: Any, instance: Quest | Achievement, **kwargs: Any) -> None:
+    bump_user_versions([instance.user_id], create_missing=True)
+
+
+@receiver(post_delete, sender=Quest)
+@receiver(post_delete, sender=Achievement)
+def bump_version_on_delete(sender: Any, instance: Quest | Achievement, **kwargs: Any) -> None:
+    # Без create_missing: при каскадном удалении пользователя нельзя создавать строки, ссылающиеся на него
+    bump_user_versions([instance.user_id])
+
+    if isinstance(instance, Quest) and is_archiving():
+        # Квест переезжает в ArchivedQuest, а не пропадает: статистика остаётся прежней
+        return
+    # Счётчики текущих строк уменьшаем; серии и время - история, их удаление не откатывает
+    delta = StatsDelta()
+    if isinstance(instance, Quest):
+        delta.quest_added(instance, sign=-1)
+    else:
+        delta.achievement_added(instance, sign=-1)
+    apply_stats_delta(instance.user_id, delta, create_missing=False)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender: Any, instance: Token, **kwargs: Any) -> None:
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender: Any, instance: User, created: bool, **kwargs: Any) -> None:
+    # Деактивация, смена прав и т.п. - закешированный пользователь больше не актуален
+    if not created:
+        invalidate_tokens(Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
+
+
+@receiver(post_delete, sender=SpeculativeImage)
+def delete_speculative_image_file(sender: Any, instance: SpeculativeImage, **kwargs: Any) -> None:
+    # Файл удаляем только после коммита: при откате строка вернётся и будет ссылаться на него
+    if instance.image:
+        name, storage = instance.image.name, instance.image.storage
+        transaction.on_commit(lambda: storage.delete(name))
@@ -0,0 +1,69 @@
+import logging
+from typing import Iterable
+from django.conf import settings
+from .models import Quest, Achievement, SpeculativeImage
+from .image_generator import image_cache_key
+from .jobs import save_achievement_image
+
+logger = logging.getLogger(__name__)
+
+
+def queue_speculative_images(quests: Iterable[Quest]) -> None:
+    """Queues a low-priority render of each quest's future achievement image (SPECULATIVE_IMAGES only).
+
+    The prompt depends only on the title, description and planned achievement
+    name, so it can be drawn while the quest is active; image workers pick
+    these up only when no ImageJob is waiting.
+    """
+    if not settings.SPECULATIVE_IMAGES:
+        return
+    SpeculativeImage.objects.bulk_create([SpeculativeImage(quest=quest) for quest in quests], ignore_conflicts=True)
+
+
+def evict_speculative_images(quest_ids: Iterable[int]) -> int:
+    """Drops renders of quests that failed or restarted; files go in the post_delete signal.
+
+    Runs whatever SPECULATIVE_IMAGES says: renders queued before the flag was
+    turned off must not outlive their quests.
+    """
+    deleted, _ = SpeculativeImage.objects.filter(quest_id__in=list(quest_ids)).delete()
+    return deleted
+
+
+def attach_speculative_image(achievement: Achievement) -> bool:
+    """Gives a new achievement its pre-rendered image; False means an ImageJob is still needed."""
+    return achievement.id in attach_speculative_images([achievement])
+
+
+def attach_speculative_images(achievements: list[Achievement]) -> set[int]:
+    """Batch variant: ids of the achievements that got their pre-rendered image.
+
+    Renders are looked up and evicted with one query each; only an
+    achievement that actually receives an image is saved on its own. A
+    render is used only if it was drawn from the quest as it is now. Like
+    eviction, this does not depend on SPECULATIVE_IMAGES.
+    """
+    if not achievements:
+        return set()
+    quest_ids = [achievement.quest_id for achievement in achievements]
+    assets = {asset.quest_id: asset for asset in SpeculativeImage.objects.filter(quest_id__in=quest_ids)}
+    if not assets:
+        return set()
+
+    attached = set()
+    for achievement in achievements:
+        asset = assets.get(achievement.quest_id)
+        if asset is None:
+            continue
+        quest = achievement.quest
+        if asset.status == "done" and asset.image and asset.cache_key == image_cache_key(
+            quest.title, quest.description, achievement.name
+        ):
+            try:
+                with asset.image.open("rb"):
+                    save_achievement_image(achievement, asset.image)
+                attached.add(achievement.id)
+            except OSError as e:
+                logger.warning(f"Speculative image for quest {quest.id} is unreadable, queueing a job instead: {e}")
+    SpeculativeImage.objects.filter(pk__in=[asset.pk for asset in assets.values()]).delete()
+    return attached
@@ -0,0 +1,143 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import Quest, ArchivedQuest, Achievement, UserQuestStats
+
+COUNTER_PREFIXES = ("status_", "difficulty_", "rarity_")
+
+
+class StatsDelta:
+    """Accumulates changes to one user's UserQuestStats and writes them with a single UPDATE."""
+
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+        self.completed_seconds = 0
+        # True - квест завершён, False - провален, в порядке переходов
+        self.outcomes: list[bool] = []
+
+    def quest_added(self, quest: Quest, sign: int = 1) -> None:
+        self.counts[f"status_{quest.status}"] += sign
+        self.counts[f"difficulty_{quest.difficulty}"] += sign
+
+    def difficulty_changed(self, old_difficulty: str, new_difficulty: str) -> None:
+        self.counts[f"difficulty_{old_difficulty}"] -= 1
+        self.counts[f"difficulty_{new_difficulty}"] += 1
+
+    def status_changed(self, quest: Quest, old_status: str, now: datetime | None = None) -> None:
+        if quest.status == old_status:
+            return
+        self.counts[f"status_{old_status}"] -= 1
+        self.counts[f"status_{quest.status}"] += 1
+        if quest.status == "completed":
+            self.outcomes.append(True)
+            if quest.start_time:
+                self.completed_seconds += max(int(((now or timezone.now()) - quest.start_time).total_seconds()), 0)
+        elif quest.status == "failed":
+            self.outcomes.append(False)
+
+    def achievement_added(self, achievement: Achievement, sign: int = 1) -> None:
+        self.counts[f"rarity_{achievement.rarity}"] += sign
+
+    def as_updates(self) -> dict[str, Any]:
+        updates: dict[str, Any] = {field: F(field) + delta for field, delta in self.counts.items() if delta}
+        if self.completed_seconds:
+            updates["total_completed_seconds"] = F("total_completed_seconds") + self.completed_seconds
+        updates.update(self._streak_updates())
+        return updates
+
+    def _streak_updates(self) -> dict[str, Any]:
+        if not self.outcomes:
+            return {}
+        if all(self.outcomes):
+            # Серия только растёт, так что максимум достигается в конце
+            grown = F("current_streak") + len(self.outcomes)
+            return {"current_streak": grown, "best_streak": Greatest(F("best_streak"), grown)}
+
+        # Разбиваем на серии между провалами: первая продолжает текущую, последняя становится текущей
+        runs = [0]
+        for completed in self.outcomes:
+            if completed:
+                runs[-1] += 1
+            else:
+                runs.append(0)
+        head, tail = runs[0], runs[-1]
+        best = Greatest(F("best_streak"), F("current_streak") + head, Value(max(runs)))
+        return {"current_streak": Value(tail), "best_streak": best}
+
+
+def apply_stats_delta(user_id: int, delta: StatsDelta, create_missing: bool = True) -> None:
+    """Writes a delta in the caller's transaction; call it after the quest rows are saved.
+
+    Without a stats row (e.g. a user from before the table existed) the row is
+    rebuilt from the quests, which already include this change.
+    """
+    updates = delta.as_updates()
+    if not updates:
+        return
+    updated = UserQuestStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **updates)
+    if not updated and create_missing:
+        rebuild_user_stats(user_id)
+
+
+def apply_expired(expired_by_user: dict[int, int]) -> None:
+    """Bulk variant for expire_quests: one UPDATE per distinct number of expired quests."""
+    users_by_count: dict[int, list[int]] = defaultdict(list)
+    for user_id, count in expired_by_user.items():
+        users_by_count[count].append(user_id)
+
+    now = timezone.now()
+    for count, user_ids in users_by_count.items():
+        UserQuestStats.objects.filter(user_id__in=user_ids).update(
+            status_active=F("status_active") - count,
+            status_failed=F("status_failed") + count,
+            current_streak=0,
+            updated_at=now,
+        )
+
+    existing = set(UserQuestStats.objects.filter(user_id__in=expired_by_user).values_list("user_id", flat=True))
+    for user_id in expired_by_user.keys() - existing:
+        rebuild_user_stats(user_id)
+
+
+def compute_user_stats(user_id: int) -> dict[str, int]:
+    """Recomputes every counter from the quest (hot and archived) and achievement tables."""
+    fields = UserQuestStats._meta.concrete_fields
+    values = {field.name: 0 for field in fields if field.name.startswith(COUNTER_PREFIXES)}
+    # Архив - те же квесты пользователя, просто в другой таблице (см. quests/archive.py)
+    tables = [Quest.objects.filter(user_id=user_id), ArchivedQuest.objects.filter(user_id=user_id)]
+    for quests in tables:
+        for row in quests.values("status").annotate(n=Count("id")):
+            values[f"status_{row['status']}"] += row["n"]
+        for row in quests.values("difficulty").annotate(n=Count("id")):
+            values[f"difficulty_{row['difficulty']}"] += row["n"]
+    for row in Achievement.objects.filter(user_id=user_id).values("rarity").annotate(n=Count("id")):
+        values[f"rarity_{row['rarity']}"] = row["n"]
+
+    # Время завершения берём из awarded_at ачивки: updated_at меняется и при правке квеста
+    finished = sorted(
+        row
+        for quests in tables
+        for row in quests.filter(status__in=["completed", "failed"]).values_list(
+            "updated_at", "id", "status", "start_time", "achievement__awarded_at"
+        )
+    )
+    current = best = total_seconds = 0
+    for _, _, status, start_time, awarded_at in finished:
+        if status == "failed":
+            current = 0
+            continue
+        current += 1
+        best = max(best, current)
+        if start_time and awarded_at:
+            total_seconds += max(int((awarded_at - start_time).total_seconds()), 0)
+
+    values.update(current_streak=current, best_streak=best, total_completed_seconds=total_seconds)
+    return values
+
+
+def rebuild_user_stats(user_id: int) -> UserQuestStats:
+    stats, _ = UserQuestStats.objects.update_or_create(user_id=user_id, defaults=compute_user_stats(user_id))
+    return stats
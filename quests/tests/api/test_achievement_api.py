@@ -15,6 +15,7 @@ def api_client() -> Any:
 
 
 @pytest.mark.django_db
+@pytest.mark.urls("quests.tests.wsgi_urls")
 class TestAchievementAPI:
     def test__achievement_list__when_user_has_achievements__returns_only_user_achievements(
         self, api_client: Any, user: User
@@ -87,7 +88,9 @@ class TestAchievementAPI:
             assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
             assert "error" in response.data
 
-    def test__regenerate_image__image_exist__replace_existing_image(self, api_client: Any, user: User) -> None:
+    def test__regenerate_image__image_exist__replace_existing_image_with_versioned_name(
+        self, api_client: Any, user: User
+    ) -> None:
         # Arrange
         api_client.force_authenticate(user=user)
         quest = Quest.objects.create(user=user, title="Q1", planned_achievement_name="A1", status="completed")
@@ -108,4 +111,25 @@ class TestAchievementAPI:
         # Assert
         assert response.status_code == status.HTTP_200_OK
         achievement.refresh_from_db()
-        assert achievement.image.name == original_path
+        # Новое содержимое - новое имя файла; старый файл удалит sweep_orphan_images после grace-периода
+        assert achievement.image.name != original_path
+        assert achievement.image.read() == b"new_image_content"
+
+    def test__regenerate_image__when_generations_limit_reached__returns_429_with_retry_after(
+        self, api_client: Any, user: User, settings: Any
+    ) -> None:
+        # Arrange
+        settings.IMAGE_REGENERATE_MAX_IN_FLIGHT = 0
+        settings.IMAGE_REGENERATE_RETRY_AFTER = 7
+        api_client.force_authenticate(user=user)
+        quest = Quest.objects.create(user=user, title="Q1", planned_achievement_name="A1", status="completed")
+        achievement = Achievement.objects.create(user=user, quest=quest, name="A1")
+
+        with patch("quests.views.generate_achievement_image") as mock_gen:
+            # Act
+            response = api_client.post(f"/api/achievements/{achievement.id}/regenerate_image/")
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "7"
+        mock_gen.assert_not_called()
@@ -0,0 +1,118 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from quests.archive import archive_quests
+from quests.models import Quest, Achievement
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def archived(user: User) -> Quest:
+    end_time = timezone.now() - timedelta(days=400)
+    quest = Quest.objects.create(
+        user=user, title="Old", planned_achievement_name="Veteran", status="completed", end_time=end_time
+    )
+    Achievement.objects.create(user=user, quest=quest, name="Veteran", image_status="done")
+    archive_quests(before=timezone.now() - timedelta(days=180))
+    return quest
+
+
+@pytest.mark.django_db
+class TestArchivedQuestAPI:
+    def test__quest_list__by_default__serves_only_hot_quests(
+        self, api_client: APIClient, user: User, archived: Quest
+    ) -> None:
+        # Arrange
+        hot = Quest.objects.create(user=user, title="New", planned_achievement_name="Rookie")
+
+        # Act
+        response = api_client.get("/api/quests/")
+
+        # Assert
+        assert [quest["id"] for quest in response.data] == [hot.id]
+
+    def test__quest_list__when_archived_requested__serves_archive_with_achievement(
+        self, api_client: APIClient, archived: Quest
+    ) -> None:
+        # Act
+        response = api_client.get("/api/quests/?archived=true")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert [quest["id"] for quest in response.data] == [archived.id]
+        assert response.data[0]["status"] == "completed"
+        assert response.data[0]["is_active_expired"] is False
+        assert response.data[0]["archived_at"] is not None
+        assert response.data[0]["achievement"]["name"] == "Veteran"
+
+    def test__quest_list__when_archived_requested__applies_filters(
+        self, api_client: APIClient, archived: Quest
+    ) -> None:
+        # Act
+        response = api_client.get("/api/quests/?archived=true&status=failed")
+
+        # Assert
+        assert response.data == []
+
+    def test__quest_retrieve__when_archived__found_only_with_flag(self, api_client: APIClient, archived: Quest) -> None:
+        # Act
+        hot = api_client.get(f"/api/quests/{archived.id}/")
+        cold = api_client.get(f"/api/quests/{archived.id}/?archived=true")
+
+        # Assert
+        assert hot.status_code == status.HTTP_404_NOT_FOUND
+        assert cold.status_code == status.HTTP_200_OK
+        assert cold.data["title"] == "Old"
+
+    def test__quest_restart__when_archived__is_not_found(self, api_client: APIClient, archived: Quest) -> None:
+        # Act
+        response = api_client.post(f"/api/quests/{archived.id}/restart/?archived=true")
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test__quest_list__when_archived_value_invalid__returns_400(self, api_client: APIClient) -> None:
+        # Act
+        response = api_client.get("/api/quests/?archived=yes")
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "archived" in response.data
+
+    def test__quest_list__when_quests_archived_meanwhile__etag_changes(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        Quest.objects.create(
+            user=user,
+            title="Old",
+            planned_achievement_name="Veteran",
+            status="failed",
+            end_time=timezone.now() - timedelta(days=400),
+        )
+        first = api_client.get("/api/quests/")
+
+        # Act
+        archive_quests(before=timezone.now())
+        second = api_client.get("/api/quests/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        # Assert
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == []
+
+    def test__achievement_list__when_quest_archived__still_lists_it_with_quest_fields(
+        self, api_client: APIClient, archived: Quest
+    ) -> None:
+        # Act
+        response = api_client.get("/api/achievements/")
+
+        # Assert
+        assert response.data[0]["quest"] == archived.id
+        assert response.data[0]["quest_title"] == "Old"
@@ -0,0 +1,169 @@
+import pytest
+from typing import Any
+from datetime import timedelta
+from rest_framework import status
+from django.contrib.auth.models import User
+from django.utils import timezone
+from quests.models import Quest, Achievement, ImageJob
+from quests.stats import rebuild_user_stats
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestQuestBatchAPI:
+    def test__batch__when_mixed_operations__applies_all_and_returns_per_item_results(
+        self, api_client: Any, user: User
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        to_start = Quest.objects.create(user=user, title="Start me", planned_achievement_name="S")
+        to_complete = Quest.objects.create(
+            user=user,
+            title="Complete me",
+            planned_achievement_name="Winner",
+            difficulty="hard",
+            status="active",
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+        to_restart = Quest.objects.create(user=user, title="Restart me", planned_achievement_name="R", status="failed")
+        operations = [
+            {"op": "create", "data": {"title": "New", "planned_achievement_name": "Fresh"}},
+            {"op": "start", "id": to_start.id, "duration_minutes": 15},
+            {"op": "complete", "id": to_complete.id},
+            {"op": "restart", "id": to_restart.id},
+        ]
+
+        # Act
+        response = api_client.post("/api/quests/batch/", {"operations": operations}, format="json")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [result["status"] for result in results] == [201, 200, 200, 200]
+        assert results[0]["quest"]["title"] == "New"
+        assert results[2]["quest"]["achievement"]["rarity"] == "gold"
+        to_start.refresh_from_db()
+        to_complete.refresh_from_db()
+        to_restart.refresh_from_db()
+        assert to_start.status == "active"
+        assert (to_start.end_time - to_start.start_time) == timedelta(minutes=15)
+        assert to_complete.status == "completed"
+        assert to_restart.status == "created"
+        assert Quest.objects.filter(user=user, title="New", status="created").exists()
+        assert ImageJob.objects.filter(achievement__quest=to_complete, status="pending").exists()
+
+    def test__batch__when_some_operations_invalid__reports_errors_without_blocking_others(
+        self, api_client: Any, user: User
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        other_user = User.objects.create_user(username="other", password="password")
+        foreign = Quest.objects.create(user=other_user, title="Not mine", planned_achievement_name="N")
+        active = Quest.objects.create(user=user, title="Active", planned_achievement_name="A", status="active")
+        created = Quest.objects.create(user=user, title="Created", planned_achievement_name="C")
+        operations = [
+            {"op": "start", "id": foreign.id},
+            {"op": "start", "id": active.id},
+            {"op": "create", "data": {"title": ""}},
+            {"op": "explode", "id": created.id},
+            {"op": "start", "id": created.id},
+        ]
+
+        # Act
+        response = api_client.post("/api/quests/batch/", operations, format="json")
+
+        # Assert
+        results = response.data["results"]
+        assert [result["status"] for result in results] == [404, 400, 400, 400, 200]
+        assert results[1]["error"] == "Quest is already started or finished"
+        created.refresh_from_db()
+        foreign.refresh_from_db()
+        assert created.status == "active"
+        assert foreign.status == "created"
+
+    def test__batch__when_complete_on_expired_quest__marks_failed_without_achievement(
+        self, api_client: Any, user: User
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        quest = Quest.objects.create(
+            user=user,
+            title="Late",
+            planned_achievement_name="L",
+            status="active",
+            end_time=timezone.now() - timedelta(minutes=1),
+        )
+
+        # Act
+        response = api_client.post("/api/quests/batch/", [{"op": "complete", "id": quest.id}], format="json")
+
+        # Assert
+        assert response.data["results"][0]["error"] == "Quest time has expired"
+        quest.refresh_from_db()
+        assert quest.status == "failed"
+        assert not Achievement.objects.filter(quest=quest).exists()
+
+    @pytest.mark.parametrize("count", [5, 50])
+    def test__batch__at_any_size__uses_constant_number_of_queries(
+        self, api_client: Any, user: User, django_assert_max_num_queries: Any, count: int
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        quests = Quest.objects.bulk_create(
+            Quest(user=user, title=f"Q{i}", planned_achievement_name="A", status="active") for i in range(count)
+        )
+        # Строка статистики уже есть, как у любого пользователя после первого перехода
+        rebuild_user_stats(user.id)
+        operations = [
+            {"op": "create", "data": {"title": f"N{i}", "planned_achievement_name": "B"}} for i in range(count)
+        ]
+        operations += [{"op": "complete", "id": quest.id} for quest in quests]
+
+        # Act
+        with django_assert_max_num_queries(12):
+            response = api_client.post("/api/quests/batch/", operations, format="json")
+
+        # Assert
+        assert all(result["status"] in (200, 201) for result in response.data["results"])
+        assert Achievement.objects.filter(user=user).count() == count
+
+    @pytest.mark.parametrize("count", [5, 50])
+    def test__batch__with_speculative_images_and_no_renders__uses_constant_number_of_queries(
+        self, api_client: Any, user: User, django_assert_max_num_queries: Any, settings: Any, count: int
+    ) -> None:
+        # Arrange
+        settings.SPECULATIVE_IMAGES = True
+        api_client.force_authenticate(user=user)
+        active = Quest.objects.bulk_create(
+            Quest(user=user, title=f"Q{i}", planned_achievement_name="A", status="active") for i in range(count)
+        )
+        created = Quest.objects.bulk_create(
+            Quest(user=user, title=f"C{i}", planned_achievement_name="B") for i in range(count)
+        )
+        rebuild_user_stats(user.id)
+        operations = [{"op": "complete", "id": quest.id} for quest in active]
+        operations += [{"op": "start", "id": quest.id} for quest in created]
+
+        # Act
+        with django_assert_max_num_queries(14):
+            response = api_client.post("/api/quests/batch/", operations, format="json")
+
+        # Assert
+        assert all(result["status"] == 200 for result in response.data["results"])
+        assert ImageJob.objects.filter(achievement__user=user).count() == count
+
+    def test__batch__when_operations_empty__returns_400(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+
+        # Act
+        response = api_client.post("/api/quests/batch/", {"operations": []}, format="json")
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,97 @@
+import pytest
+from typing import Any
+from datetime import timedelta
+from rest_framework import status
+from django.contrib.auth.models import User
+from django.utils import timezone
+from quests.models import Quest
+from quests.expiry import expire_quests
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestConditionalListGet:
+    def test__quest_list__when_etag_matches__returns_304_with_single_query(
+        self, api_client: Any, user: User, django_assert_num_queries: Any
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+        etag = api_client.get("/api/quests/")["ETag"]
+
+        # Act
+        with django_assert_num_queries(1):
+            response = api_client.get("/api/quests/", HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+
+    def test__quest_list__when_quest_started__etag_changes(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        quest = Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+        etag = api_client.get("/api/quests/")["ETag"]
+
+        # Act
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 5})
+        response = api_client.get("/api/quests/", HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+        assert response.data[0]["status"] == "active"
+
+    def test__quest_list__when_quest_expired_by_bulk_update__etag_changes(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(
+            user=user,
+            title="Q",
+            planned_achievement_name="A",
+            status="active",
+            end_time=timezone.now() - timedelta(minutes=1),
+        )
+        etag = api_client.get("/api/quests/")["ETag"]
+
+        # Act
+        expire_quests()
+        response = api_client.get("/api/quests/", HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]["status"] == "failed"
+
+    def test__achievement_list__when_other_user_changes_data__still_returns_304(
+        self, api_client: Any, user: User
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+        etag = api_client.get("/api/achievements/")["ETag"]
+        other_user = User.objects.create_user(username="other", password="password")
+
+        # Act
+        Quest.objects.create(user=other_user, title="Other", planned_achievement_name="A")
+        response = api_client.get("/api/achievements/", HTTP_IF_NONE_MATCH=etag)
+
+        # Assert
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test__quest_list__when_query_string_differs__uses_different_etag(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+
+        # Act
+        plain = api_client.get("/api/quests/")["ETag"]
+        paginated = api_client.get("/api/quests/?page_size=10")["ETag"]
+
+        # Assert
+        assert plain != paginated
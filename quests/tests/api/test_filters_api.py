@@ -0,0 +1,108 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from quests.models import Quest, Achievement
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def make_quest(user: User, title: str, **kwargs) -> Quest:
+    return Quest.objects.create(user=user, title=title, planned_achievement_name="N/A", **kwargs)
+
+
+@pytest.mark.django_db
+class TestQuestFilters:
+    def test__list__when_status_filter__returns_only_matching(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        make_quest(user, "New")
+        make_quest(user, "Running", status="active")
+        make_quest(user, "Lost", status="failed")
+
+        # Act
+        response = api_client.get("/api/quests/", {"status": "active,failed", "ordering": "title"})
+
+        # Assert
+        assert [quest["title"] for quest in response.data] == ["Lost", "Running"]
+
+    def test__list__when_unknown_status__returns_400(self, api_client: APIClient) -> None:
+        # Act
+        response = api_client.get("/api/quests/", {"status": "sleeping"})
+
+        # Assert
+        assert response.status_code == 400
+        assert "status" in response.data
+
+    def test__list__when_time_range__filters_by_created_at(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        old = make_quest(user, "Old")
+        Quest.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        make_quest(user, "Fresh")
+
+        # Act
+        response = api_client.get("/api/quests/", {"created_after": (timezone.now() - timedelta(days=1)).date()})
+
+        # Assert
+        assert [quest["title"] for quest in response.data] == ["Fresh"]
+
+    def test__list__when_ordering_with_page_size__pages_in_requested_order(
+        self, api_client: APIClient, user: User
+    ) -> None:
+        # Arrange
+        for title in ["b", "d", "a", "c"]:
+            make_quest(user, title)
+
+        # Act
+        first = api_client.get("/api/quests/", {"ordering": "title", "page_size": 2})
+        second = api_client.get(first.data["next"])
+
+        # Assert
+        titles = [quest["title"] for quest in first.data["results"] + second.data["results"]]
+        assert titles == ["a", "b", "c", "d"]
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    def test__list__when_fields__serializes_only_them_without_achievement_join(
+        self, api_client: APIClient, user: User
+    ) -> None:
+        # Arrange
+        make_quest(user, "Slim")
+
+        # Act
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get("/api/quests/", {"fields": "id,title,status"})
+
+        # Assert
+        assert response.data == [{"id": response.data[0]["id"], "title": "Slim", "status": "created"}]
+        assert not any("quests_achievement" in query["sql"] for query in ctx.captured_queries)
+
+    def test__list__when_unknown_field__returns_400(self, api_client: APIClient) -> None:
+        # Act
+        response = api_client.get("/api/achievements/", {"fields": "id,secret"})
+
+        # Assert
+        assert response.status_code == 400
+        assert "fields" in response.data
+
+    def test__achievements__when_rarity_filter_and_fields__returns_trimmed_matches(
+        self, api_client: APIClient, user: User
+    ) -> None:
+        # Arrange
+        for rarity in ["gold", "bronze"]:
+            quest = make_quest(user, rarity, status="completed")
+            Achievement.objects.create(user=user, quest=quest, name=rarity, rarity=rarity)
+
+        # Act
+        response = api_client.get("/api/achievements/", {"rarity": "gold", "fields": "name,rarity"})
+
+        # Assert
+        assert response.data == [{"name": "gold", "rarity": "gold"}]
@@ -0,0 +1,68 @@
+import pytest
+from typing import Any
+from rest_framework import status
+from django.contrib.auth.models import User
+from quests.models import Quest, Achievement
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+def collect_pages(api_client: Any, url: str) -> list[list[int]]:
+    pages = []
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append([item["id"] for item in response.data["results"]])
+        url = response.data["next"]
+    return pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test__quest_list__when_page_size_given__walks_all_pages_newest_first(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        quests = [Quest.objects.create(user=user, title=f"Q{i}", planned_achievement_name="A") for i in range(5)]
+
+        # Act
+        pages = collect_pages(api_client, "/api/quests/?page_size=2")
+
+        # Assert
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [quest_id for page in pages for quest_id in page] == [quest.id for quest in reversed(quests)]
+
+    def test__quest_list__when_page_size_not_given__returns_plain_list(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+
+        # Act
+        response = api_client.get("/api/quests/")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.data, list)
+
+    def test__achievement_list__when_page_size_given__returns_only_user_achievements_in_pages(
+        self, api_client: Any, user: User
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        other_user = User.objects.create_user(username="other", password="password")
+        own_ids = []
+        for i in range(3):
+            quest = Quest.objects.create(user=user, title=f"Q{i}", planned_achievement_name="A", status="completed")
+            own_ids.append(Achievement.objects.create(user=user, quest=quest, name=f"A{i}").id)
+        other_quest = Quest.objects.create(user=other_user, title="O", planned_achievement_name="A")
+        Achievement.objects.create(user=other_user, quest=other_quest, name="O")
+
+        # Act
+        pages = collect_pages(api_client, "/api/achievements/?page_size=2")
+
+        # Assert
+        assert [achievement_id for page in pages for achievement_id in page] == list(reversed(own_ids))
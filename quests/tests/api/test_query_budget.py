@@ -0,0 +1,58 @@
+import pytest
+from typing import Any
+from rest_framework import status
+from django.contrib.auth.models import User
+from quests.models import Quest, Achievement
+
+# Число SQL-запросов на один вызов эндпоинта. Не должно зависеть от количества строк.
+# Версия данных пользователя (ETag) + сам список.
+ENDPOINT_QUERY_BUDGETS = {
+    "/api/quests/": 2,
+    "/api/quests/?page_size=50": 2,
+    "/api/achievements/": 2,
+    "/api/achievements/?page_size=50": 2,
+}
+ROW_COUNTS = [10, 100, 1000]
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+def seed_history(user: User, rows: int) -> None:
+    # Половина квестов завершена и имеет ачивку, чтобы сериализовались обе ветки
+    quests = Quest.objects.bulk_create(
+        Quest(
+            user=user,
+            title=f"Quest {i}",
+            planned_achievement_name=f"Award {i}",
+            status="completed" if i % 2 else "created",
+        )
+        for i in range(rows)
+    )
+    Achievement.objects.bulk_create(
+        Achievement(user=user, quest=quest, name=quest.planned_achievement_name)
+        for quest in quests
+        if quest.status == "completed"
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+@pytest.mark.parametrize("url,budget", ENDPOINT_QUERY_BUDGETS.items())
+def test__list_endpoint__at_any_row_count__stays_within_query_budget(
+    api_client: Any, user: User, django_assert_num_queries: Any, url: str, budget: int, rows: int
+) -> None:
+    # Arrange
+    api_client.force_authenticate(user=user)
+    seed_history(user, rows)
+
+    # Act
+    with django_assert_num_queries(budget):
+        response = api_client.get(url)
+
+    # Assert
+    assert response.status_code == status.HTTP_200_OK
@@ -4,7 +4,8 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import User
-from quests.models import Quest, Achievement
+from unittest.mock import patch
+from quests.models import Quest, Achievement, ImageJob
 from quests.views import QuestViewSet
 
 
@@ -92,9 +93,32 @@ class TestQuestAPI:
         # Assert
         assert response.status_code == status.HTTP_200_OK
         assert "quest" in response.data
-        assert "image_generated" in response.data
+        assert response.data["image_status"] == "pending"
         quest.refresh_from_db()
         assert Achievement.objects.filter(quest=quest).exists()
+        assert ImageJob.objects.filter(achievement__quest=quest, status="pending").exists()
+
+    def test__quest_complete__when_within_time__does_not_call_image_generator(
+        self, api_client: Any, user: User
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        quest = Quest.objects.create(
+            user=user,
+            title="Fast Complete",
+            planned_achievement_name="Speedy",
+            status="active",
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+
+        # Act
+        with patch("quests.jobs.generate_achievement_image") as mock_gen:
+            response = api_client.post(f"/api/quests/{quest.id}/complete/")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        mock_gen.assert_not_called()
+        assert response.data["quest"]["achievement"]["image_status"] == "pending"
 
     def test__quest_complete__when_insane_difficulty__creates_diamond_achievement(
         self, api_client: Any, user: User
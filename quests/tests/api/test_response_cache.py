@@ -0,0 +1,80 @@
+import pytest
+from typing import Any
+from datetime import timedelta
+from rest_framework import status
+from django.contrib.auth.models import User
+from django.utils import timezone
+from quests.models import Quest
+from prometheus_client import REGISTRY
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+def lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("quest_response_cache_lookups_total", {"result": result}) or 0.0
+
+
+@pytest.mark.django_db
+class TestListResponseCache:
+    def test__quest_list__when_requested_twice__serves_second_from_cache_with_one_query(
+        self, api_client: Any, user: User, django_assert_num_queries: Any
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+        first = api_client.get("/api/quests/")
+
+        # Act
+        with django_assert_num_queries(1):
+            second = api_client.get("/api/quests/")
+
+        # Assert
+        assert first["X-Cache"] == "MISS"
+        assert second["X-Cache"] == "HIT"
+        assert second.status_code == status.HTTP_200_OK
+        assert second.json() == first.json()
+
+    def test__quest_list__when_quest_restarted__serves_fresh_payload(self, api_client: Any, user: User) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        quest = Quest.objects.create(
+            user=user,
+            title="Q",
+            planned_achievement_name="A",
+            status="failed",
+            end_time=timezone.now() - timedelta(minutes=1),
+        )
+        api_client.get("/api/quests/")
+
+        # Act
+        api_client.post(f"/api/quests/{quest.id}/restart/")
+        response = api_client.get("/api/quests/")
+
+        # Assert
+        assert response["X-Cache"] == "MISS"
+        assert response.data[0]["status"] == "created"
+
+    def test__list__after_miss_and_hit__counts_lookups_on_metrics_registry(
+        self, api_client: Any, user: User, settings
+    ) -> None:
+        # Arrange
+        settings.METRICS_TOKEN = "scrape-secret"
+        api_client.force_authenticate(user=user)
+        Quest.objects.create(user=user, title="Q", planned_achievement_name="A")
+        hits_before = lookups("hit")
+        misses_before = lookups("miss")
+
+        # Act
+        api_client.get("/api/achievements/")
+        api_client.get("/api/achievements/")
+        exposition = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret").content.decode()
+
+        # Assert
+        assert lookups("hit") == hits_before + 1
+        assert lookups("miss") == misses_before + 1
+        assert 'quest_response_cache_lookups_total{result="hit"}' in exposition
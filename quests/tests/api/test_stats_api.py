@@ -0,0 +1,223 @@
+import pytest
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.utils import timezone
+from freezegun import freeze_time
+from rest_framework.test import APIClient
+from quests.expiry import expire_quests
+from quests.models import Achievement, Quest, UserQuestStats
+from quests.stats import compute_user_stats
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def create_quest(api_client: APIClient, difficulty: str = "medium") -> int:
+    response = api_client.post(
+        "/api/quests/",
+        {"title": "Stat", "planned_achievement_name": "N/A", "difficulty": difficulty},
+        format="json",
+    )
+    return response.data["id"]
+
+
+def stored_stats(user: User) -> dict[str, int]:
+    stats = UserQuestStats.objects.get(user=user)
+    return {field: getattr(stats, field) for field in compute_user_stats(user.id)}
+
+
+@contextmanager
+def concurrently(method: str, other_request: Callable[[], object]) -> Iterator[None]:
+    # Второй запрос успевает пройти, пока первый держит уже прочитанный квест
+    original = getattr(Quest, method)
+    calls = []
+
+    def racing(quest: Quest, *args: object) -> None:
+        if not calls:
+            calls.append(quest.pk)
+            other_request()
+        original(quest, *args)
+
+    with patch.object(Quest, method, autospec=True, side_effect=racing):
+        yield
+
+
+@pytest.mark.django_db
+class TestUserQuestStats:
+    def test__transitions__keep_counters_in_sync_with_rebuild(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        first = create_quest(api_client, "hard")
+        second = create_quest(api_client, "easy")
+        create_quest(api_client)
+
+        # Act
+        with freeze_time(timezone.now()) as frozen:
+            api_client.post(f"/api/quests/{first}/start/", {"duration_minutes": 30}, format="json")
+            frozen.tick(timedelta(minutes=10))
+            api_client.post(f"/api/quests/{first}/complete/")
+            api_client.post(f"/api/quests/{second}/start/", {"duration_minutes": 1}, format="json")
+            frozen.tick(timedelta(minutes=5))
+            api_client.post(f"/api/quests/{second}/complete/")
+
+        # Assert
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.status_created, stats.status_completed, stats.status_failed) == (1, 1, 1)
+        assert (stats.difficulty_easy, stats.difficulty_medium, stats.difficulty_hard) == (1, 1, 1)
+        assert stats.rarity_gold == 1
+        assert (stats.current_streak, stats.best_streak) == (0, 1)
+        assert stats.total_completed_seconds == 600
+        assert stored_stats(user) == compute_user_stats(user.id)
+
+    def test__restart_and_complete__continue_streak(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest_ids = [create_quest(api_client) for _ in range(2)]
+
+        # Act
+        for quest_id in quest_ids:
+            api_client.post(f"/api/quests/{quest_id}/start/", {"duration_minutes": 30}, format="json")
+            api_client.post(f"/api/quests/{quest_id}/complete/")
+
+        # Assert
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.current_streak, stats.best_streak) == (2, 2)
+
+    def test__expire_quests__moves_active_to_failed_and_resets_streak(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        done = create_quest(api_client)
+        api_client.post(f"/api/quests/{done}/start/", {"duration_minutes": 30}, format="json")
+        api_client.post(f"/api/quests/{done}/complete/")
+        late = create_quest(api_client)
+        api_client.post(f"/api/quests/{late}/start/", {"duration_minutes": 30}, format="json")
+        Quest.objects.filter(id=late).update(end_time=timezone.now() - timedelta(minutes=1))
+
+        # Act
+        expire_quests()
+
+        # Assert
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.status_active, stats.status_failed) == (0, 1)
+        assert (stats.current_streak, stats.best_streak) == (0, 1)
+
+    def test__batch__applies_streak_in_operation_order(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        ids = [create_quest(api_client) for _ in range(3)]
+        for quest_id in ids:
+            api_client.post(f"/api/quests/{quest_id}/start/", {"duration_minutes": 30}, format="json")
+        Quest.objects.filter(id=ids[1]).update(end_time=timezone.now() - timedelta(minutes=1))
+
+        # Act
+        api_client.post(
+            "/api/quests/batch/",
+            {"operations": [{"op": "complete", "id": quest_id} for quest_id in ids]},
+            format="json",
+        )
+
+        # Assert
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.status_completed, stats.status_failed) == (2, 1)
+        assert (stats.current_streak, stats.best_streak) == (1, 1)
+        assert stored_stats(user) == compute_user_stats(user.id)
+
+    def test__delete__decrements_current_counters(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest_id = create_quest(api_client, "insane")
+        api_client.post(f"/api/quests/{quest_id}/start/", {"duration_minutes": 30}, format="json")
+        api_client.post(f"/api/quests/{quest_id}/complete/")
+
+        # Act
+        api_client.delete(f"/api/quests/{quest_id}/")
+
+        # Assert
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.status_completed, stats.difficulty_insane, stats.rarity_diamond) == (0, 0, 0)
+        assert stats.best_streak == 1
+
+    def test__stats_endpoint__when_no_row__builds_it_from_quests(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        Quest.objects.create(user=user, title="Old", planned_achievement_name="N/A", status="completed")
+        Quest.objects.create(user=user, title="Old", planned_achievement_name="N/A", status="failed")
+
+        # Act
+        response = api_client.get("/api/stats/")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.data["status_completed"] == 1
+        assert response.data["completion_rate"] == 0.5
+        assert UserQuestStats.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+class TestConcurrentTransitions:
+    def test__start__when_double_clicked__counts_once(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest_id = create_quest(api_client)
+        url = f"/api/quests/{quest_id}/start/"
+
+        # Act
+        with concurrently("mark_started", lambda: api_client.post(url, format="json")):
+            response = api_client.post(url, format="json")
+
+        # Assert
+        assert response.status_code == 409
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.status_created, stats.status_active) == (0, 1)
+        assert stored_stats(user) == compute_user_stats(user.id)
+
+    def test__complete__when_expired_meanwhile__returns_conflict(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest_id = create_quest(api_client)
+        api_client.post(f"/api/quests/{quest_id}/start/", {"duration_minutes": 30}, format="json")
+        after_deadline = timezone.now() + timedelta(hours=1)
+
+        # Act
+        with concurrently("mark_completed", lambda: expire_quests(now=after_deadline)):
+            response = api_client.post(f"/api/quests/{quest_id}/complete/")
+
+        # Assert
+        assert response.status_code == 409
+        assert Quest.objects.get(pk=quest_id).status == "failed"
+        assert not Achievement.objects.filter(quest_id=quest_id).exists()
+        stats = UserQuestStats.objects.get(user=user)
+        assert (stats.status_active, stats.status_completed, stats.status_failed) == (0, 0, 1)
+        assert stored_stats(user) == compute_user_stats(user.id)
+
+    def test__update__when_difficulty_changed_meanwhile__returns_conflict(
+        self, api_client: APIClient, user: User
+    ) -> None:
+        # Arrange
+        quest_id = create_quest(api_client, "easy")
+        url = f"/api/quests/{quest_id}/"
+        stale = Quest.objects.get(pk=quest_id)
+        api_client.patch(url, {"difficulty": "hard"}, format="json")
+
+        # Act
+        with patch("quests.views.QuestViewSet.get_object", return_value=stale):
+            response = api_client.patch(url, {"difficulty": "medium"}, format="json")
+
+        # Assert
+        assert response.status_code == 409
+        assert Quest.objects.get(pk=quest_id).difficulty == "hard"
+        assert stored_stats(user) == compute_user_stats(user.id)
+
+    def test__update__does_not_overwrite_status_changed_meanwhile(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest_id = create_quest(api_client)
+        stale = Quest.objects.get(pk=quest_id)
+        api_client.post(f"/api/quests/{quest_id}/start/", format="json")
+
+        # Act
+        with patch("quests.views.QuestViewSet.get_object", return_value=stale):
+            response = api_client.patch(f"/api/quests/{quest_id}/", {"title": "Renamed"}, format="json")
+
+        # Assert
+        assert response.status_code == 200
+        quest = Quest.objects.get(pk=quest_id)
+        assert (quest.title, quest.status) == ("Renamed", "active")
@@ -0,0 +1,127 @@
+import pytest
+from io import StringIO
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.utils import timezone
+from quests.archive import is_archiving
+from quests.models import Quest, ArchivedQuest, Achievement, SpeculativeImage, UserQuestStats
+from quests.stats import compute_user_stats, rebuild_user_stats
+
+
+def finished_quest(user: User, days_ago: int, status: str = "completed", **kwargs) -> Quest:
+    end_time = timezone.now() - timedelta(days=days_ago)
+    return Quest.objects.create(
+        user=user,
+        title=f"Quest {days_ago}",
+        planned_achievement_name="Medal",
+        status=status,
+        start_time=end_time - timedelta(hours=1),
+        end_time=end_time,
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test__handle__when_finished_quest_is_old__moves_it_to_archive_with_same_id(user: User) -> None:
+    # Arrange
+    old = finished_quest(user, days_ago=400)
+    created_at = old.created_at
+
+    # Act
+    call_command("archive_quests", stdout=StringIO())
+
+    # Assert
+    assert not Quest.objects.filter(pk=old.pk).exists()
+    archived = ArchivedQuest.objects.get(pk=old.pk)
+    assert archived.title == old.title
+    assert archived.status == "completed"
+    assert archived.created_at == created_at
+
+
+@pytest.mark.django_db
+def test__handle__when_quest_recent_or_unfinished__leaves_it_in_hot_table(user: User) -> None:
+    # Arrange
+    recent = finished_quest(user, days_ago=10, status="failed")
+    active = finished_quest(user, days_ago=400, status="active")
+
+    # Act
+    call_command("archive_quests", stdout=StringIO())
+
+    # Assert
+    assert set(Quest.objects.values_list("id", flat=True)) == {recent.id, active.id}
+    assert not ArchivedQuest.objects.exists()
+
+
+@pytest.mark.django_db
+def test__handle__when_quest_has_achievement__relinks_it_to_archived_quest(user: User) -> None:
+    # Arrange
+    quest = finished_quest(user, days_ago=400)
+    achievement = Achievement.objects.create(user=user, quest=quest, name="Medal", image_status="done")
+
+    # Act
+    call_command("archive_quests", stdout=StringIO())
+
+    # Assert
+    achievement.refresh_from_db()
+    assert achievement.quest_id is None
+    assert achievement.archived_quest_id == quest.id
+    assert achievement.source_quest.title == quest.title
+
+
+@pytest.mark.django_db
+def test__handle__keeps_stats_and_rebuild_agrees(user: User) -> None:
+    # Arrange
+    for days_ago in (500, 400, 300):
+        quest = finished_quest(user, days_ago=days_ago)
+        Achievement.objects.create(user=user, quest=quest, name="Medal", rarity="gold")
+    finished_quest(user, days_ago=200, status="failed")
+    finished_quest(user, days_ago=1)
+    before = compute_user_stats(user.id)
+    rebuild_user_stats(user.id)
+
+    # Act
+    call_command("archive_quests", "--older-than-days", "100", stdout=StringIO())
+
+    # Assert
+    assert ArchivedQuest.objects.count() == 4
+    stats = UserQuestStats.objects.get(user=user)
+    assert stats.status_completed == 4
+    assert stats.status_failed == 1
+    assert stats.rarity_gold == 3
+    assert compute_user_stats(user.id) == before
+
+
+@pytest.mark.django_db
+def test__handle__with_batch_size__archives_in_batches(user: User) -> None:
+    # Arrange
+    for _ in range(5):
+        finished_quest(user, days_ago=400)
+    out = StringIO()
+
+    # Act
+    call_command("archive_quests", "--batch-size", "2", stdout=out)
+
+    # Assert
+    output = out.getvalue()
+    assert "Batch 3: archived 1 quest(s)" in output
+    assert "Archived 5 quest(s)" in output
+    assert not Quest.objects.exists()
+    assert ArchivedQuest.objects.count() == 5
+
+
+@pytest.mark.django_db
+def test__handle__when_quest_still_has_dependent_rows__cascades_them(user: User) -> None:
+    # Arrange
+    quest = finished_quest(user, days_ago=400)
+    SpeculativeImage.objects.create(quest=quest)
+
+    # Act
+    with patch("quests.archive.evict_speculative_images"):
+        call_command("archive_quests", stdout=StringIO())
+
+    # Assert
+    assert ArchivedQuest.objects.filter(pk=quest.pk).exists()
+    assert not SpeculativeImage.objects.exists()
+    assert not is_archiving()
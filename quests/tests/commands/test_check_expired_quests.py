@@ -1,4 +1,5 @@
 import pytest
+from io import StringIO
 from django.utils import timezone
 from datetime import timedelta
 from django.core.management import call_command
@@ -65,3 +66,31 @@ def test__handle__when_quest_is_completed_even_if_expired__remains_completed(use
     # Assert
     quest = Quest.objects.first()
     assert quest.status == "completed"
+
+
+@pytest.mark.django_db
+def test__handle__when_batch_size_given__expires_backlog_in_chunks(user: User) -> None:
+    # Arrange
+    expired_time = timezone.now() - timedelta(hours=1)
+    Quest.objects.bulk_create(
+        Quest(user=user, title=f"Expired {i}", planned_achievement_name="N/A", status="active", end_time=expired_time)
+        for i in range(5)
+    )
+    Quest.objects.create(
+        user=user,
+        title="Still Running",
+        planned_achievement_name="N/A",
+        status="active",
+        end_time=timezone.now() + timedelta(hours=1),
+    )
+    out = StringIO()
+
+    # Act
+    call_command("check_expired_quests", "--batch-size", "2", stdout=out)
+
+    # Assert
+    assert Quest.objects.filter(status="failed").count() == 5
+    assert Quest.objects.filter(status="active").count() == 1
+    output = out.getvalue()
+    assert output.count("Batch ") == 3
+    assert "Successfully marked 5 quest(s) as failed." in output
@@ -0,0 +1,21 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from quests.models import Quest, UserQuestStats
+
+
+@pytest.mark.django_db
+def test__rebuild_quest_stats__when_rows_missing__backfills_counters(user: User) -> None:
+    # Arrange
+    Quest.objects.create(user=user, title="Done", planned_achievement_name="N/A", status="completed")
+    out = StringIO()
+
+    # Act
+    call_command("rebuild_quest_stats", stdout=out)
+
+    # Assert
+    stats = UserQuestStats.objects.get(user=user)
+    assert stats.status_completed == 1
+    assert stats.current_streak == 1
+    assert "Rebuilt quest stats for 1 user(s)." in out.getvalue()
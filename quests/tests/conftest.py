@@ -1,7 +1,34 @@
+import io
 import pytest
+from PIL import Image
 from django.contrib.auth.models import User
+from django.core.cache import cache
 
 
 @pytest.fixture
 def user(db) -> User:
     return User.objects.create_user(username="testuser", password="password")
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path) -> None:
+    # Сгенерированные картинки не должны попадать в media/ репозитория
+    settings.MEDIA_ROOT = tmp_path / "media"
+
+
+@pytest.fixture(autouse=True)
+def image_cache_dir(settings, tmp_path) -> None:
+    settings.IMAGE_CACHE_DIR = tmp_path / "image_cache"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    # id пользователей и версии повторяются между тестами, закешированные ответы - нет
+    cache.clear()
+
+
+@pytest.fixture
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "gold").save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -1,6 +1,7 @@
 import pytest
 from django.contrib.auth.models import User
-from quests.models import Quest, Achievement
+from django.db import IntegrityError
+from quests.models import Quest, ArchivedQuest, Achievement
 
 
 @pytest.mark.django_db
@@ -18,3 +19,30 @@ def test__achievement_creation__when_valid_data__creates_with_correct_defaults(u
     assert achievement.quest == quest
     assert achievement.icon_key == "star"
     assert achievement.user == user
+
+
+@pytest.mark.django_db
+def test__achievement_creation__when_no_quest__violates_constraint(user: User) -> None:
+    # Act / Assert
+    with pytest.raises(IntegrityError):
+        Achievement.objects.create(user=user, name="Orphan")
+
+
+@pytest.mark.django_db
+def test__achievement_creation__when_both_quest_and_archived_quest__violates_constraint(user: User) -> None:
+    # Arrange
+    quest = Quest.objects.create(user=user, title="Hot", planned_achievement_name="A", status="completed")
+    archived = ArchivedQuest.objects.create(
+        id=quest.id + 1,
+        user=user,
+        title="Old",
+        planned_achievement_name="A",
+        difficulty="medium",
+        status="completed",
+        created_at=quest.created_at,
+        updated_at=quest.updated_at,
+    )
+
+    # Act / Assert
+    with pytest.raises(IntegrityError):
+        Achievement.objects.create(user=user, quest=quest, archived_quest=archived, name="Twice")
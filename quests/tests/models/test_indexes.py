@@ -0,0 +1,59 @@
+import re
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils import timezone
+from quests.models import Achievement, ImageJob, Quest, QuestEvent
+
+# "SCAN quests_quest" без "USING ... INDEX" - полный проход по таблице
+TABLE_SCAN_RE = re.compile(r"\bSCAN (?:TABLE )?quests_\w+(?! USING)(?:\s|$)")
+
+HOT_QUERIES = {
+    "quest_list": lambda user: Quest.objects.filter(user=user).order_by("-created_at", "-id"),
+    "active_quests_by_deadline": lambda user: Quest.objects.filter(user=user, status="active").order_by("end_time"),
+    "overdue_quests": lambda user: Quest.objects.filter(status="active", end_time__lt=timezone.now()),
+    "achievement_list": lambda user: Achievement.objects.filter(user=user).order_by("-awarded_at", "-id"),
+    "achievements_by_rarity": lambda user: Achievement.objects.filter(user=user, rarity="gold").order_by(
+        "-awarded_at"
+    ),
+    "pending_image_jobs": lambda user: ImageJob.objects.filter(status="pending").order_by("created_at", "id"),
+    "events_after_cursor": lambda user: QuestEvent.objects.filter(user=user, id__gt=0).order_by("id"),
+}
+
+
+def query_plan(queryset: QuerySet) -> str:
+    return queryset.explain()
+
+
+@pytest.fixture
+def populated(user: User) -> User:
+    # Немного данных, чтобы планировщик выбирал индекс не только по эвристикам пустых таблиц
+    other = User.objects.create_user(username="other", password="password")
+    now = timezone.now()
+    for owner in (user, other):
+        for i in range(20):
+            quest = Quest.objects.create(
+                user=owner, title=f"Q{i}", planned_achievement_name="N/A", status="active", end_time=now + timedelta(i)
+            )
+            if i % 2:
+                achievement = Achievement.objects.create(user=owner, quest=quest, name="A", rarity="gold")
+                ImageJob.objects.create(achievement=achievement)
+    return user
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN output is SQLite-specific")
+class TestHotQueryPlans:
+    @pytest.mark.parametrize("name", HOT_QUERIES)
+    def test__hot_query__uses_index_without_table_scan(self, populated: User, name: str) -> None:
+        # Arrange
+        queryset = HOT_QUERIES[name](populated)
+
+        # Act
+        plan = query_plan(queryset)
+
+        # Assert
+        assert not TABLE_SCAN_RE.search(plan), plan
+        assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from typing import Any
+from unittest.mock import AsyncMock, patch
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import AsyncClient, AsyncRequestFactory
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from quests.async_views import regenerate_image
+from quests.models import Quest, Achievement
+
+
+@pytest.fixture
+def api_client() -> APIClient:
+    return APIClient()
+
+
+@pytest.fixture
+def achievement(user: User) -> Achievement:
+    quest = Quest.objects.create(user=user, title="Q1", planned_achievement_name="A1", status="completed")
+    return Achievement.objects.create(user=user, quest=quest, name="A1")
+
+
+@pytest.mark.django_db
+class TestAsyncRegenerateImage:
+    def test__regenerate_image__when_owner__awaits_async_generator_and_saves_image(
+        self, api_client: APIClient, user: User, achievement: Achievement
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+
+        with patch("quests.async_views.agenerate_achievement_image", new_callable=AsyncMock) as mock_gen:
+            mock_gen.return_value = ContentFile(b"new_image_content")
+
+            # Act
+            response = api_client.post(f"/api/achievements/{achievement.id}/regenerate_image/")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] == achievement.id
+        achievement.refresh_from_db()
+        assert achievement.image.read() == b"new_image_content"
+        assert achievement.image_status == "done"
+        mock_gen.assert_awaited_once()
+
+    def test__regenerate_image__when_not_owner__returns_404(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        other_user = User.objects.create_user(username="other", password="password")
+        quest = Quest.objects.create(user=other_user, title="Q1", planned_achievement_name="A1", status="completed")
+        foreign = Achievement.objects.create(user=other_user, quest=quest, name="A1")
+        api_client.force_authenticate(user=user)
+
+        # Act
+        response = api_client.post(f"/api/achievements/{foreign.id}/regenerate_image/")
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test__regenerate_image__when_anonymous__returns_401(
+        self, api_client: APIClient, achievement: Achievement
+    ) -> None:
+        # Act
+        response = api_client.post(f"/api/achievements/{achievement.id}/regenerate_image/")
+
+        # Assert
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test__regenerate_image__when_generation_fails__returns_500(
+        self, api_client: APIClient, user: User, achievement: Achievement
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+
+        with patch("quests.async_views.agenerate_achievement_image", new_callable=AsyncMock) as mock_gen:
+            mock_gen.return_value = None
+
+            # Act
+            response = api_client.post(f"/api/achievements/{achievement.id}/regenerate_image/")
+
+        # Assert
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert "error" in response.json()
+
+    def test__regenerate_image__through_async_handler__authenticates_token_and_records_metrics(
+        self, user: User, achievement: Achievement
+    ) -> None:
+        # Arrange
+        token = Token.objects.create(user=user)
+        labels = {"route": "achievement-regenerate-image", "method": "POST"}
+        before = REGISTRY.get_sample_value("quest_http_request_db_queries_count", labels) or 0.0
+
+        async def post() -> Any:
+            return await AsyncClient(enforce_csrf_checks=True).post(
+                f"/api/achievements/{achievement.id}/regenerate_image/", headers={"Authorization": f"Token {token.key}"}
+            )
+
+        with patch("quests.async_views.agenerate_achievement_image", new_callable=AsyncMock) as mock_gen:
+            mock_gen.return_value = ContentFile(b"async_image")
+
+            # Act
+            response = async_to_sync(post)()
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert REGISTRY.get_sample_value("quest_http_request_db_queries_count", labels) == before + 1
+        assert REGISTRY.get_sample_value("quest_http_request_db_queries_sum", labels) > 0
+
+    def test__regenerate_image__when_clicked_twice__shares_one_generation(
+        self, user: User, achievement: Achievement
+    ) -> None:
+        # Arrange
+        calls = []
+
+        async def slow_generation(**kwargs: Any) -> ContentFile:
+            calls.append(kwargs)
+            await asyncio.sleep(0.05)
+            return ContentFile(b"shared_image")
+
+        def make_request() -> Any:
+            request = AsyncRequestFactory().post(f"/api/achievements/{achievement.id}/regenerate_image/")
+            request._force_auth_user = user
+            return request
+
+        async def double_click() -> list[Any]:
+            return await asyncio.gather(
+                regenerate_image(make_request(), achievement.id), regenerate_image(make_request(), achievement.id)
+            )
+
+        with patch("quests.async_views.agenerate_achievement_image", side_effect=slow_generation):
+            # Act
+            first, second = async_to_sync(double_click)()
+
+        # Assert
+        assert len(calls) == 1
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.content == second.content
+
+    def test__regenerate_image__when_generations_limit_reached__returns_429_with_retry_after(
+        self, api_client: APIClient, user: User, achievement: Achievement, settings: Any
+    ) -> None:
+        # Arrange
+        settings.IMAGE_REGENERATE_MAX_IN_FLIGHT = 0
+        settings.IMAGE_REGENERATE_RETRY_AFTER = 7
+        api_client.force_authenticate(user=user)
+
+        with patch("quests.async_views.agenerate_achievement_image", new_callable=AsyncMock) as mock_gen:
+            # Act
+            response = api_client.post(f"/api/achievements/{achievement.id}/regenerate_image/")
+
+        # Assert
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response["Retry-After"] == "7"
+        mock_gen.assert_not_awaited()
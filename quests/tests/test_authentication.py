@@ -0,0 +1,127 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from quests.checks import check_auth_token_cache
+
+
+@pytest.fixture
+def token(user: User) -> Token:
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def api_client(token: Token) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
+
+
+def count_queries(api_client: APIClient, url: str) -> tuple[int, int]:
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url)
+    return response.status_code, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    def test__request__when_token_cached__skips_token_query(self, api_client: APIClient) -> None:
+        # Arrange
+        _, cold_queries = count_queries(api_client, "/api/image-jobs/")
+
+        # Act
+        status_code, warm_queries = count_queries(api_client, "/api/image-jobs/")
+
+        # Assert
+        assert status_code == 200
+        assert warm_queries == cold_queries - 1
+
+    def test__request__when_token_deleted__returns_401(self, api_client: APIClient, token: Token) -> None:
+        # Arrange
+        api_client.get("/api/image-jobs/")
+        token.delete()
+
+        # Act
+        response = api_client.get("/api/image-jobs/")
+
+        # Assert
+        assert response.status_code == 401
+
+    def test__request__when_user_deactivated__returns_401(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        api_client.get("/api/image-jobs/")
+        user.is_active = False
+        user.save()
+
+        # Act
+        response = api_client.get("/api/image-jobs/")
+
+        # Assert
+        assert response.status_code == 401
+
+    def test__request__when_token_invalid__returns_401(self, api_client: APIClient) -> None:
+        # Arrange
+        api_client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        # Act
+        response = api_client.get("/api/image-jobs/")
+
+        # Assert
+        assert response.status_code == 401
+
+
+class TestAuthTokenCacheCheck:
+    @pytest.mark.parametrize(
+        "backend, workers, timeout, expected",
+        [
+            ("django.core.cache.backends.locmem.LocMemCache", 2, 60, ["quests.W001"]),
+            ("django.core.cache.backends.locmem.LocMemCache", 1, 60, []),
+            ("django.core.cache.backends.locmem.LocMemCache", 2, 0, []),
+            ("django.core.cache.backends.filebased.FileBasedCache", 2, 60, []),
+        ],
+    )
+    def test__check__when_cache_not_shared_by_workers__warns_that_token_cache_is_off(
+        self, settings, backend: str, workers: int, timeout: int, expected: list[str]
+    ) -> None:
+        # Arrange
+        settings.CACHES = {"default": {"BACKEND": backend, "LOCATION": "/tmp/quest-master-test-cache"}}
+        settings.WEB_CONCURRENCY = workers
+        settings.AUTH_TOKEN_CACHE_TIMEOUT = timeout
+
+        # Act
+        messages = check_auth_token_cache(None)
+
+        # Assert
+        assert [message.id for message in messages] == expected
+
+
+@pytest.mark.django_db
+def test__request__when_token_cache_disabled__queries_token_every_time(api_client: APIClient, settings) -> None:
+    # Arrange
+    settings.AUTH_TOKEN_CACHE_TIMEOUT = 0
+    _, cold_queries = count_queries(api_client, "/api/image-jobs/")
+
+    # Act
+    status_code, warm_queries = count_queries(api_client, "/api/image-jobs/")
+
+    # Assert
+    assert status_code == 200
+    assert warm_queries == cold_queries
+
+
+@pytest.mark.django_db
+def test__request__when_cache_per_process_and_several_workers__queries_token_every_time(
+    api_client: APIClient, settings
+) -> None:
+    # Arrange
+    settings.WEB_CONCURRENCY = 2
+    _, cold_queries = count_queries(api_client, "/api/image-jobs/")
+
+    # Act
+    status_code, warm_queries = count_queries(api_client, "/api/image-jobs/")
+
+    # Assert
+    assert status_code == 200
+    assert warm_queries == cold_queries
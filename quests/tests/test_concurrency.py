@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import pytest
+from asgiref.sync import async_to_sync
+from quests.concurrency import AsyncSingleFlight, InFlightLimiter, SingleFlight
+
+
+def test__single_flight__when_called_concurrently__runs_once_and_shares_result() -> None:
+    # Arrange
+    flights = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+    results = []
+
+    def generate() -> str:
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "image"
+
+    leader = threading.Thread(target=lambda: results.append(flights.do(7, generate)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flights.do(7, generate)))
+    follower.start()
+
+    # Act
+    release.set()
+    leader.join()
+    follower.join()
+
+    # Assert
+    assert calls == [1]
+    assert results == ["image", "image"]
+
+
+def test__single_flight__when_call_fails__raises_in_waiting_callers_too() -> None:
+    # Arrange
+    flights = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+    errors = []
+
+    def generate() -> str:
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def call() -> None:
+        try:
+            flights.do("a", generate)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+
+    # Act
+    release.set()
+    leader.join()
+    follower.join()
+
+    # Assert
+    assert errors == ["upstream down", "upstream down"]
+
+
+def test__single_flight__after_call_finishes__runs_next_call_again() -> None:
+    # Arrange
+    flights = SingleFlight()
+    results = iter(["first", "second"])
+
+    # Act
+    first = flights.do(1, lambda: next(results))
+    second = flights.do(1, lambda: next(results))
+
+    # Assert
+    assert (first, second) == ("first", "second")
+
+
+def test__async_single_flight__when_gathered__runs_once_per_key() -> None:
+    # Arrange
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def generate(key: int) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"image-{key}"
+
+    async def run() -> list[str]:
+        return await asyncio.gather(
+            flights.do(1, lambda: generate(1)), flights.do(1, lambda: generate(1)), flights.do(2, lambda: generate(2))
+        )
+
+    # Act
+    results = async_to_sync(run)()
+
+    # Assert
+    assert results == ["image-1", "image-1", "image-2"]
+    assert sorted(calls) == [1, 2]
+
+
+def test__async_single_flight__when_one_waiter_is_cancelled__call_still_completes_for_others() -> None:
+    # Arrange
+    flights = AsyncSingleFlight()
+
+    async def generate() -> str:
+        await asyncio.sleep(0.02)
+        return "image"
+
+    async def run() -> str:
+        first = asyncio.ensure_future(flights.do(1, generate))
+        second = asyncio.ensure_future(flights.do(1, generate))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    # Act
+    result = async_to_sync(run)()
+
+    # Assert
+    assert result == "image"
+
+
+def test__in_flight_limiter__when_full__refuses_until_released() -> None:
+    # Arrange
+    limiter = InFlightLimiter(limit=2)
+    assert limiter.try_acquire() and limiter.try_acquire()
+
+    # Act
+    refused = limiter.try_acquire()
+    limiter.release()
+    accepted = limiter.try_acquire()
+
+    # Assert
+    assert refused is False
+    assert accepted is True
+    assert limiter.in_flight == 2
@@ -0,0 +1,17 @@
+import pytest
+from django.db import connection
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite profile only")
+class TestSqliteProfile:
+    @pytest.mark.parametrize("pragma, expected", [("busy_timeout", 5000), ("synchronous", 1), ("temp_store", 2)])
+    def test__connection__applies_tuning_pragmas(self, pragma: str, expected: int) -> None:
+        # Arrange
+        cursor = connection.cursor()
+
+        # Act
+        cursor.execute(f"PRAGMA {pragma}")
+
+        # Assert
+        assert cursor.fetchone()[0] == expected
@@ -0,0 +1,273 @@
+import asyncio
+import pytest
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from quests.events import (
+    EventBroker,
+    broker,
+    events_after,
+    issue_stream_ticket,
+    publish_quest_events,
+    prune_events,
+    stream_events,
+)
+from quests.expiry import expire_quests
+from quests.models import Quest, QuestEvent
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def token(user: User) -> Token:
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture(autouse=True)
+def fast_stream(settings, monkeypatch) -> None:
+    settings.EVENT_STREAM_HEARTBEAT_SECONDS = 0.05
+    # Опросчик журнала проверяется напрямую через poll(), фоновый поток в тестах не нужен
+    monkeypatch.setattr(broker, "_start_poller", lambda: None)
+
+
+def read_frames(request, count: int) -> tuple[int, list[str]]:
+    async def consume() -> tuple[int, list[str]]:
+        response = await stream_events(request)
+        if response.status_code != 200:
+            return response.status_code, []
+        frames = []
+        stream = response.streaming_content
+        async for chunk in stream:
+            frames.append(chunk.decode())
+            if len(frames) == count:
+                break
+        await stream.aclose()
+        return response.status_code, frames
+
+    return async_to_sync(consume)()
+
+
+def make_quest(user: User, **kwargs) -> Quest:
+    return Quest.objects.create(user=user, title="Stream", planned_achievement_name="N/A", **kwargs)
+
+
+@pytest.mark.django_db
+class TestEventStream:
+    def test__stream__when_last_event_id_given__replays_newer_events(self, user: User, token: Token) -> None:
+        # Arrange
+        quest = make_quest(user)
+        publish_quest_events([quest])
+        first = QuestEvent.objects.get()
+        quest.status = "active"
+        publish_quest_events([quest])
+        request = RequestFactory().get(
+            "/api/events/", HTTP_AUTHORIZATION=f"Token {token.key}", HTTP_LAST_EVENT_ID=str(first.id)
+        )
+
+        # Act
+        status_code, frames = read_frames(request, 2)
+
+        # Assert
+        assert status_code == 200
+        assert frames[0].startswith("retry:")
+        assert frames[1].startswith(f"id: {first.id + 1}\nevent: quest.updated\n")
+        assert '"status": "active"' in frames[1]
+
+    def test__stream__when_no_last_event_id__skips_history_and_sends_heartbeat(self, user: User, token: Token) -> None:
+        # Arrange
+        publish_quest_events([make_quest(user)])
+        request = RequestFactory().get("/api/events/", {"ticket": issue_stream_ticket(user.id)})
+
+        # Act
+        _, frames = read_frames(request, 2)
+
+        # Assert
+        assert frames[1] == ": heartbeat\n\n"
+
+    def test__stream__when_other_users_events__does_not_leak_them(self, user: User, token: Token) -> None:
+        # Arrange
+        other = User.objects.create_user(username="other", password="password")
+        publish_quest_events([make_quest(other)])
+        request = RequestFactory().get("/api/events/", {"ticket": issue_stream_ticket(user.id), "last_event_id": "0"})
+
+        # Act
+        _, frames = read_frames(request, 2)
+
+        # Assert
+        assert frames[1] == ": heartbeat\n\n"
+
+    def test__stream__when_token_invalid__returns_401(self, user: User) -> None:
+        # Arrange
+        request = RequestFactory().get("/api/events/", HTTP_AUTHORIZATION="Token nope")
+
+        # Act
+        status_code, _ = read_frames(request, 1)
+
+        # Assert
+        assert status_code == 401
+
+    def test__stream__when_idle__reads_event_log_only_once(self, user: User, token: Token) -> None:
+        # Arrange
+        request = RequestFactory().get("/api/events/", HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        # Act
+        with patch("quests.events.events_after", wraps=events_after) as read_log:
+            _, frames = read_frames(request, 4)
+
+        # Assert
+        assert frames[1:] == [": heartbeat\n\n"] * 3
+        assert read_log.call_count == 1
+
+    def test__stream__when_api_token_in_query__returns_401(self, user: User, token: Token) -> None:
+        # Arrange
+        request = RequestFactory().get("/api/events/", {"token": token.key})
+
+        # Act
+        status_code, _ = read_frames(request, 1)
+
+        # Assert
+        assert status_code == 401
+
+    def test__stream__when_ticket_expired__returns_401(self, user: User, settings) -> None:
+        # Arrange
+        settings.EVENT_STREAM_TICKET_MAX_AGE = 60
+        with patch("time.time", return_value=time.time() - 120):
+            ticket = issue_stream_ticket(user.id)
+        request = RequestFactory().get("/api/events/", {"ticket": ticket})
+
+        # Act
+        status_code, _ = read_frames(request, 1)
+
+        # Assert
+        assert status_code == 401
+
+    def test__stream__when_ticket_tampered__returns_401(self, user: User) -> None:
+        # Arrange
+        other = User.objects.create_user(username="other", password="password")
+        ticket = issue_stream_ticket(user.id).replace(str(user.id), str(other.id), 1)
+        request = RequestFactory().get("/api/events/", {"ticket": ticket})
+
+        # Act
+        status_code, _ = read_frames(request, 1)
+
+        # Assert
+        assert status_code == 401
+
+    def test__ticket__when_posted__opens_the_stream(self, api_client: APIClient) -> None:
+        # Arrange
+        ticket = api_client.post("/api/events/ticket/").data["ticket"]
+        request = RequestFactory().get("/api/events/", {"ticket": ticket})
+
+        # Act
+        status_code, frames = read_frames(request, 1)
+
+        # Assert
+        assert status_code == 200
+        assert frames[0].startswith("retry:")
+
+    def test__ticket__when_anonymous__returns_401(self) -> None:
+        # Act
+        response = APIClient().post("/api/events/ticket/")
+
+        # Assert
+        assert response.status_code == 401
+
+    def test__stream__when_wsgi_mode__returns_204_for_ticket_and_stream(
+        self, api_client: APIClient, user: User, settings
+    ) -> None:
+        # Arrange
+        settings.SERVER_MODE = "wsgi"
+        request = RequestFactory().get("/api/events/", {"ticket": issue_stream_ticket(user.id)})
+
+        # Act
+        ticket_response = api_client.post("/api/events/ticket/")
+        status_code, _ = read_frames(request, 1)
+
+        # Assert
+        assert ticket_response.status_code == 204
+        assert status_code == 204
+
+
+@pytest.mark.django_db
+class TestEventPublishing:
+    def test__start__publishes_quest_updated_event(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest = make_quest(user)
+
+        # Act
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+
+        # Assert
+        event = QuestEvent.objects.get(user=user)
+        assert event.kind == "quest.updated"
+        assert event.payload["id"] == quest.id
+        assert event.payload["status"] == "active"
+
+    def test__expire_quests__publishes_failed_status(self, user: User) -> None:
+        # Arrange
+        quest = make_quest(user, status="active", end_time=timezone.now() - timedelta(minutes=1))
+
+        # Act
+        expire_quests()
+
+        # Assert
+        event = QuestEvent.objects.get(user=user)
+        assert event.payload == {
+            "id": quest.id,
+            "status": "failed",
+            "start_time": None,
+            "end_time": quest.end_time.isoformat(),
+        }
+
+    def test__prune_events__when_older_than_retention__deletes_them(self, user: User, settings) -> None:
+        # Arrange
+        settings.EVENT_RETENTION_SECONDS = 60
+        publish_quest_events([make_quest(user)])
+
+        # Act
+        deleted = prune_events(now=timezone.now() + timedelta(minutes=2))
+
+        # Assert
+        assert deleted == 1
+        assert not QuestEvent.objects.exists()
+
+
+@pytest.mark.django_db
+class TestEventBroker:
+    def test__poll__when_event_published_elsewhere__wakes_only_that_users_streams(self, user: User) -> None:
+        # Arrange
+        other = User.objects.create_user(username="other", password="password")
+        quest = make_quest(user)
+        event_broker = EventBroker()
+
+        async def poll_after_publish() -> tuple[bool, bool]:
+            _, own = event_broker.subscribe(user.id)
+            _, others = event_broker.subscribe(other.id)
+            await sync_to_async(event_broker.poll)()
+            own.clear()
+            others.clear()
+            # Как будто событие записал планировщик: on_commit этого процесса не срабатывает
+            await sync_to_async(publish_quest_events)([quest])
+
+            # Act
+            await sync_to_async(event_broker.poll)()
+            await asyncio.sleep(0)
+            return own.is_set(), others.is_set()
+
+        with patch.object(EventBroker, "_start_poller"):
+            own_woken, others_woken = async_to_sync(poll_after_publish)()
+
+        # Assert
+        assert own_woken
+        assert not others_woken
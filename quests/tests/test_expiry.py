@@ -0,0 +1,113 @@
+import socket
+import time
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.utils import timezone
+from quests.models import Quest
+from quests.expiry import ExpiryScheduler, notify_deadline
+
+
+def make_active_quest(user: User, end_time) -> Quest:
+    return Quest.objects.create(
+        user=user, title="Timed", planned_achievement_name="N/A", status="active", end_time=end_time
+    )
+
+
+@pytest.mark.django_db
+class TestExpiryScheduler:
+    def test__refresh__when_quests_outside_horizon__loads_only_upcoming_deadlines(self, user: User) -> None:
+        # Arrange
+        now = timezone.now()
+        soon = make_active_quest(user, now + timedelta(minutes=1))
+        make_active_quest(user, now + timedelta(hours=5))
+        scheduler = ExpiryScheduler(horizon=timedelta(minutes=10))
+
+        # Act
+        scheduler.refresh(now)
+
+        # Assert
+        assert scheduler.next_deadline == soon.end_time
+        assert list(scheduler._deadlines) == [soon.id]
+
+    def test__sweep_images__runs_once_per_sweep_interval(self, settings) -> None:
+        # Arrange
+        settings.ORPHAN_IMAGE_SWEEP_INTERVAL_SECONDS = 3600
+        now = timezone.now()
+        scheduler = ExpiryScheduler()
+
+        # Act
+        with patch("quests.expiry.sweep_orphan_images") as sweep:
+            scheduler.sweep_images(now)
+            scheduler.sweep_images(now + timedelta(minutes=30))
+            scheduler.sweep_images(now + timedelta(hours=1))
+
+        # Assert
+        assert sweep.call_count == 2
+
+    def test__expire_due__when_deadline_passed__marks_only_due_quest_failed(self, user: User) -> None:
+        # Arrange
+        now = timezone.now()
+        due = make_active_quest(user, now - timedelta(seconds=1))
+        pending = make_active_quest(user, now + timedelta(minutes=1))
+        scheduler = ExpiryScheduler()
+        scheduler.refresh(now)
+
+        # Act
+        expired = scheduler.expire_due(now)
+
+        # Assert
+        assert expired == 1
+        due.refresh_from_db()
+        pending.refresh_from_db()
+        assert due.status == "failed"
+        assert pending.status == "active"
+        assert scheduler.next_deadline == pending.end_time
+
+    def test__expire_due__when_quest_restarted_after_scheduling__leaves_it_alone(self, user: User) -> None:
+        # Arrange
+        now = timezone.now()
+        quest = make_active_quest(user, now - timedelta(seconds=1))
+        scheduler = ExpiryScheduler()
+        scheduler.schedule(quest.id, quest.end_time)
+        Quest.objects.filter(pk=quest.pk).update(status="created", start_time=None, end_time=None)
+
+        # Act
+        expired = scheduler.expire_due(now)
+
+        # Assert
+        assert expired == 0
+        quest.refresh_from_db()
+        assert quest.status == "created"
+
+    def test__handle_message__when_deadline_dropped__forgets_quest(self, user: User) -> None:
+        # Arrange
+        scheduler = ExpiryScheduler()
+        scheduler.schedule(42, timezone.now() + timedelta(minutes=1))
+
+        # Act
+        scheduler.handle_message(b'{"quest": 42, "end_time": null}')
+
+        # Assert
+        assert scheduler.next_deadline is None
+
+    def test__notify_deadline__when_scheduler_listening__delivers_new_deadline(self, user: User, settings) -> None:
+        # Arrange
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        probe.bind(("127.0.0.1", 0))
+        address = f"127.0.0.1:{probe.getsockname()[1]}"
+        probe.close()
+        settings.EXPIRY_SCHEDULER_ADDRESS = address
+        scheduler = ExpiryScheduler(listen_address=address)
+        quest = make_active_quest(user, timezone.now() + timedelta(minutes=1))
+
+        # Act
+        notify_deadline(quest)
+        deadline = time.monotonic() + 2
+        while scheduler.next_deadline is None and time.monotonic() < deadline:
+            scheduler._wait(0.1)
+        scheduler.close()
+
+        # Assert
+        assert scheduler.next_deadline == quest.end_time
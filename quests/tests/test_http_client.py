@@ -0,0 +1,328 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncIterator, Iterator
+import httpx
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+from asgiref.sync import async_to_sync
+from quests.http_client import AsyncPooledHttpClient, CircuitBreaker, CircuitOpenError, PooledHttpClient
+
+
+class StubUpstream:
+    """Local stand-in for the image API that replays a scripted list of responses."""
+
+    def __init__(self) -> None:
+        self.responses: list[tuple[int, float]] = []
+        self.requests = 0
+        self.client_ports: set[int] = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                stub.requests += 1
+                stub.client_ports.add(self.client_address[1])
+                status, delay = stub.responses.pop(0) if stub.responses else (200, 0)
+                time.sleep(delay)
+                body = b"image"
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/image"
+
+    def __enter__(self) -> "StubUpstream":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def upstream() -> Iterator[StubUpstream]:
+    with StubUpstream() as stub:
+        yield stub
+
+
+def make_client(**kwargs: object) -> PooledHttpClient:
+    options = {"connect_timeout": 1.0, "read_timeout": 1.0, "backoff_base": 0, "backoff_max": 0}
+    options.update(kwargs)
+    return PooledHttpClient(**options)
+
+
+def test__get__when_called_repeatedly__reuses_keep_alive_connection(upstream: StubUpstream) -> None:
+    # Arrange
+    client = make_client()
+
+    # Act
+    for _ in range(3):
+        assert client.get(upstream.url).content == b"image"
+
+    # Assert
+    assert upstream.requests == 3
+    assert len(upstream.client_ports) == 1
+
+
+def test__get__when_upstream_returns_503__retries_until_success(upstream: StubUpstream) -> None:
+    # Arrange
+    upstream.responses = [(503, 0), (503, 0), (200, 0)]
+    client = make_client(max_retries=2)
+
+    # Act
+    response = client.get(upstream.url)
+
+    # Assert
+    assert response.status_code == 200
+    assert upstream.requests == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test__get__when_upstream_returns_404__does_not_retry(upstream: StubUpstream) -> None:
+    # Arrange
+    upstream.responses = [(404, 0)]
+    client = make_client(max_retries=2)
+
+    # Act / Assert
+    with pytest.raises(requests.HTTPError):
+        client.get(upstream.url)
+    assert upstream.requests == 1
+
+
+def test__get__when_read_times_out__raises_timeout(upstream: StubUpstream) -> None:
+    # Arrange
+    upstream.responses = [(200, 0.5)]
+    client = make_client(read_timeout=0.1, max_retries=0)
+
+    # Act / Assert
+    with pytest.raises(requests.Timeout):
+        client.get(upstream.url)
+
+
+def test__get__when_failures_reach_threshold__fails_fast_without_calling_upstream(upstream: StubUpstream) -> None:
+    # Arrange
+    upstream.responses = [(503, 0), (503, 0)]
+    client = make_client(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.get(upstream.url)
+
+    # Act / Assert
+    with pytest.raises(CircuitOpenError):
+        client.get(upstream.url)
+    assert upstream.requests == 2
+
+
+def test__circuit_breaker__when_reset_timeout_passes__allows_single_trial_call() -> None:
+    # Arrange
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow_request() is False
+
+    # Act
+    now[0] = 10.0
+    first_trial = breaker.allow_request()
+    second_trial = breaker.allow_request()
+    breaker.record_success()
+
+    # Assert
+    assert first_trial is True
+    assert second_trial is False
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test__get__when_half_open_trial_raises_unexpected_error__releases_trial(upstream: StubUpstream) -> None:
+    # Arrange
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10.0
+    client = make_client(breaker=breaker, max_retries=0)
+
+    # Act
+    with patch.object(client.session, "get", side_effect=requests.TooManyRedirects("loop")):
+        with pytest.raises(requests.TooManyRedirects):
+            client.get(upstream.url)
+    now[0] = 20.0
+    response = client.get(upstream.url)
+
+    # Assert
+    assert response.status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def streamed(chunks: Iterator[bytes]) -> MagicMock:
+    response = MagicMock(status_code=200, headers={})
+    response.iter_content.return_value = chunks
+    return response
+
+
+def test__download__when_body_breaks_off__records_failure() -> None:
+    # Arrange
+    def body() -> Iterator[bytes]:
+        yield b"\x89PNG"
+        raise requests.exceptions.ChunkedEncodingError("connection reset")
+
+    client = make_client(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+
+    # Act
+    with patch.object(client.session, "get", return_value=streamed(body())):
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            client.download("http://upstream.test/image", None, max_bytes=1024)
+
+    # Assert
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def test__download__when_body_outlasts_deadline__raises_timeout_and_records_failure() -> None:
+    # Arrange
+    def body() -> Iterator[bytes]:
+        while True:
+            time.sleep(0.02)
+            yield b"x"
+
+    client = make_client(
+        max_retries=0, download_timeout=0.1, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    )
+
+    # Act
+    with patch.object(client.session, "get", return_value=streamed(body())):
+        with pytest.raises(requests.Timeout):
+            client.download("http://upstream.test/image", None, max_bytes=1024)
+
+    # Assert
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def scripted_transport(statuses: list[int], calls: list[str]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(statuses.pop(0) if statuses else 200, content=b"image")
+
+    return httpx.MockTransport(handler)
+
+
+def async_get(client: AsyncPooledHttpClient, url: str) -> httpx.Response:
+    async def call() -> httpx.Response:
+        try:
+            return await client.get(url)
+        finally:
+            await client.aclose()
+
+    return async_to_sync(call)()
+
+
+def test__async_get__when_upstream_returns_503__retries_until_success() -> None:
+    # Arrange
+    calls: list[str] = []
+    client = AsyncPooledHttpClient(
+        max_retries=2, backoff_base=0, backoff_max=0, transport=scripted_transport([503, 503, 200], calls)
+    )
+
+    # Act
+    response = async_get(client, "http://upstream.test/image")
+
+    # Assert
+    assert response.content == b"image"
+    assert len(calls) == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test__async_get__when_upstream_returns_404__does_not_retry() -> None:
+    # Arrange
+    calls: list[str] = []
+    client = AsyncPooledHttpClient(max_retries=2, backoff_base=0, transport=scripted_transport([404], calls))
+
+    # Act / Assert
+    with pytest.raises(httpx.HTTPStatusError):
+        async_get(client, "http://upstream.test/image")
+    assert len(calls) == 1
+
+
+def test__async_get__when_breaker_is_open__fails_fast_without_calling_upstream() -> None:
+    # Arrange
+    calls: list[str] = []
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    client = AsyncPooledHttpClient(breaker=breaker, transport=scripted_transport([], calls))
+
+    # Act / Assert
+    with pytest.raises(CircuitOpenError):
+        async_get(client, "http://upstream.test/image")
+    assert calls == []
+
+
+def test__async_get__when_half_open_trial_raises_unexpected_error__releases_trial() -> None:
+    # Arrange
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 10.0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise ValueError("bad header")
+
+    client = AsyncPooledHttpClient(breaker=breaker, max_retries=0, transport=httpx.MockTransport(handler))
+
+    # Act
+    with pytest.raises(ValueError):
+        async_get(client, "http://upstream.test/image")
+
+    # Assert
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] = 20.0
+    assert breaker.allow_request() is True
+
+
+def async_download(client: AsyncPooledHttpClient, url: str) -> object:
+    async def call() -> object:
+        try:
+            return await client.download(url, None, max_bytes=1024)
+        finally:
+            await client.aclose()
+
+    return async_to_sync(call)()
+
+
+def test__async_download__when_body_breaks_off__records_failure() -> None:
+    # Arrange
+    async def body() -> AsyncIterator[bytes]:
+        yield b"\x89PNG"
+        raise httpx.ReadError("connection reset")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    client = AsyncPooledHttpClient(breaker=breaker, max_retries=0, transport=transport)
+
+    # Act / Assert
+    with pytest.raises(httpx.ReadError):
+        async_download(client, "http://upstream.test/image")
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test__async_download__when_body_outlasts_deadline__raises_timeout_and_records_failure() -> None:
+    # Arrange
+    async def body() -> AsyncIterator[bytes]:
+        while True:
+            await asyncio.sleep(0.02)
+            yield b"x"
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    client = AsyncPooledHttpClient(breaker=breaker, max_retries=0, download_timeout=0.1, transport=transport)
+
+    # Act / Assert
+    with pytest.raises(httpx.ReadTimeout):
+        async_download(client, "http://upstream.test/image")
+    assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,82 @@
+import io
+import os
+from pathlib import Path
+from prometheus_client import REGISTRY
+from quests.image_cache import ImageCache
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test__make_key__when_any_parameter_differs__returns_different_key() -> None:
+    # Arrange
+    base = ImageCache.make_key("prompt", 1, "model", 1024, 1024)
+
+    # Act
+    variants = [
+        ImageCache.make_key("prompt!", 1, "model", 1024, 1024),
+        ImageCache.make_key("prompt", 2, "model", 1024, 1024),
+        ImageCache.make_key("prompt", 1, "other", 1024, 1024),
+        ImageCache.make_key("prompt", 1, "model", 512, 1024),
+        ImageCache.make_key("prompt", 1, "model", 1024, 512),
+    ]
+
+    # Assert
+    assert base == ImageCache.make_key("prompt", 1, "model", 1024, 1024)
+    assert base not in variants
+    assert len(set(variants)) == len(variants)
+
+
+def test__set_file__when_read_back_with_open__streams_same_bytes_and_rewinds_source(tmp_path: Path) -> None:
+    # Arrange
+    cache = ImageCache(tmp_path, max_bytes=1024)
+    source = io.BytesIO(b"image")
+    hits_before = sample("quest_image_cache_lookups_total", result="hit")
+    misses_before = sample("quest_image_cache_lookups_total", result="miss")
+
+    # Act
+    cache.set_file("a" * 64, source, size=5)
+    entry = cache.open("a" * 64)
+
+    # Assert
+    with entry:
+        assert entry.read() == b"image"
+    assert source.tell() == 0
+    assert cache.open("b" * 64) is None
+    assert sample("quest_image_cache_lookups_total", result="hit") == hits_before + 1
+    assert sample("quest_image_cache_lookups_total", result="miss") == misses_before + 1
+
+
+def test__set_file__when_larger_than_capacity__skips_caching(tmp_path: Path) -> None:
+    # Arrange
+    cache = ImageCache(tmp_path, max_bytes=3)
+
+    # Act
+    cache.set_file("a" * 64, io.BytesIO(b"too large"), size=9)
+
+    # Assert
+    assert cache.open("a" * 64) is None
+
+
+def test__set_file__when_over_capacity__evicts_least_recently_used(tmp_path: Path) -> None:
+    # Arrange
+    cache = ImageCache(tmp_path, max_bytes=10)
+    old_key, recent_key, new_key = "a" * 64, "b" * 64, "c" * 64
+    cache.set_file(old_key, io.BytesIO(b"1234"), size=4)
+    cache.set_file(recent_key, io.BytesIO(b"5678"), size=4)
+    os.utime(cache._path(old_key), (1, 1))
+    os.utime(cache._path(recent_key), (2, 2))
+    cache.open(old_key).close()  # old_key becomes the most recently used entry
+    evictions_before = sample("quest_image_cache_evictions_total")
+
+    # Act
+    cache.set_file(new_key, io.BytesIO(b"9012"), size=4)
+
+    # Assert
+    assert cache.open(recent_key) is None
+    with cache.open(old_key) as entry:
+        assert entry.read() == b"1234"
+    with cache.open(new_key) as entry:
+        assert entry.read() == b"9012"
+    assert sample("quest_image_cache_evictions_total") == evictions_before + 1
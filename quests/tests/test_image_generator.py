@@ -1,18 +1,39 @@
+import hashlib
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
-from django.core.files.base import ContentFile
-from quests.image_generator import generate_achievement_image, WIDTH_IMAGE_SIZE, HEIGHT_IMAGE_SIZE
+from unittest.mock import patch, AsyncMock, MagicMock
+from asgiref.sync import async_to_sync
+from quests.http_client import AsyncPooledHttpClient, PooledHttpClient
+from quests.image_files import DownloadedImage
+from quests.image_generator import (
+    agenerate_achievement_image,
+    generate_achievement_image,
+    WIDTH_IMAGE_SIZE,
+    HEIGHT_IMAGE_SIZE,
+)
+
+
+def streamed_response(body: bytes, headers: dict | None = None) -> MagicMock:
+    response = MagicMock(status_code=200, headers=headers or {})
+    response.iter_content.return_value = [body[i:i + 16] for i in range(0, len(body), 16)]
+    return response
+
+
+def session_get(mock_client: MagicMock) -> MagicMock:
+    # Настоящий клиент с подменённой сессией: чтение тела и брейкер работают как в проде
+    client = PooledHttpClient(max_retries=0)
+    client.session = MagicMock()
+    mock_client.return_value = client
+    return client.session.get
 
 
 @pytest.mark.django_db
 class TestImageGenerator:
-    @patch("quests.image_generator.requests.get")
-    def test_generate_image_success(self, mock_get):
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_success(self, mock_client, png_bytes):
         # Arrange
-        mock_response = MagicMock()
-        mock_response.content = b"fake_image_data"
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        mock_get = session_get(mock_client)
+        mock_get.return_value = streamed_response(png_bytes)
 
         # Act
         result = generate_achievement_image(
@@ -22,8 +43,10 @@ class TestImageGenerator:
         )
 
         # Assert
-        assert isinstance(result, ContentFile)
-        assert result.read() == b"fake_image_data"
+        assert isinstance(result, DownloadedImage)
+        assert result.read() == png_bytes
+        assert result.sha256 == hashlib.sha256(png_bytes).hexdigest()
+        assert result.extension == "png"
         mock_get.assert_called_once()
 
         args, kwargs = mock_get.call_args
@@ -32,13 +55,11 @@ class TestImageGenerator:
         assert kwargs["params"]["width"] == WIDTH_IMAGE_SIZE
         assert kwargs["params"]["height"] == HEIGHT_IMAGE_SIZE
 
-    @patch("quests.image_generator.requests.get")
-    def test_generate_image_with_custom_seed(self, mock_get):
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_with_custom_seed(self, mock_client, png_bytes):
         # Arrange
-        mock_response = MagicMock()
-        mock_response.content = b"fake_image_data"
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        mock_get = session_get(mock_client)
+        mock_get.return_value = streamed_response(png_bytes)
 
         # Act
         custom_seed = 1234
@@ -50,16 +71,17 @@ class TestImageGenerator:
         )
 
         # Assert
-        assert isinstance(result, ContentFile)
+        assert isinstance(result, DownloadedImage)
         args, kwargs = mock_get.call_args
         assert kwargs["params"]["seed"] == custom_seed
 
-    @patch("quests.image_generator.requests.get")
-    def test_generate_image_api_failure(self, mock_get):
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_api_failure(self, mock_client):
         # Arrange
-        mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = Exception("API Error")
-        mock_get.return_value = mock_response
+        mock_get = session_get(mock_client)
+        from requests.exceptions import HTTPError
+
+        mock_get.side_effect = HTTPError("API Error")
 
         # Act
         result = generate_achievement_image(
@@ -71,9 +93,10 @@ class TestImageGenerator:
         # Assert
         assert result is None
 
-    @patch("quests.image_generator.requests.get")
-    def test_generate_image_timeout(self, mock_get):
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_timeout(self, mock_client):
         # Arrange
+        mock_get = session_get(mock_client)
         from requests.exceptions import Timeout
 
         mock_get.side_effect = Timeout("Request timed out")
@@ -87,3 +110,127 @@ class TestImageGenerator:
 
         # Assert
         assert result is None
+
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_same_prompt_served_from_cache(self, mock_client, png_bytes):
+        # Arrange
+        mock_get = session_get(mock_client)
+        mock_get.return_value = streamed_response(png_bytes)
+        kwargs = {"quest_title": "Run", "quest_description": "5k", "achievement_name": "Runner"}
+
+        # Act
+        first = generate_achievement_image(**kwargs)
+        second = generate_achievement_image(**kwargs)
+
+        # Assert
+        assert first.read() == second.read() == png_bytes
+        mock_get.assert_called_once()
+
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_different_seed_not_served_from_cache(self, mock_client, png_bytes):
+        # Arrange
+        mock_get = session_get(mock_client)
+        mock_get.return_value = streamed_response(png_bytes)
+        kwargs = {"quest_title": "Run", "quest_description": "5k", "achievement_name": "Runner"}
+
+        # Act
+        generate_achievement_image(**kwargs, seed=1)
+        generate_achievement_image(**kwargs, seed=2)
+
+        # Assert
+        assert mock_get.call_count == 2
+
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_when_body_not_an_image_returns_none_and_caches_nothing(self, mock_client, png_bytes):
+        # Arrange
+        mock_get = session_get(mock_client)
+        mock_get.return_value = streamed_response(b"<html>rate limited</html>")
+        kwargs = {"quest_title": "Run", "quest_description": "5k", "achievement_name": "Runner", "seed": 3}
+
+        # Act
+        result = generate_achievement_image(**kwargs)
+        mock_get.return_value = streamed_response(png_bytes)
+        retried = generate_achievement_image(**kwargs)
+
+        # Assert
+        assert result is None
+        assert retried.read() == png_bytes
+        assert mock_get.call_count == 2
+        assert mock_get.return_value.close.called
+
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_when_declared_size_over_limit_returns_none(
+        self, mock_client, png_bytes, settings
+    ):
+        # Arrange
+        settings.IMAGE_MAX_BYTES = 1024
+        response = streamed_response(png_bytes, headers={"Content-Length": "4096"})
+        session_get(mock_client).return_value = response
+
+        # Act
+        result = generate_achievement_image("Run", "5k", "Runner")
+
+        # Assert
+        assert result is None
+        response.close.assert_called_once()
+
+    @patch("quests.image_generator.get_image_http_client")
+    def test_generate_image_when_body_grows_over_limit_returns_none(self, mock_client, png_bytes, settings):
+        # Arrange
+        settings.IMAGE_MAX_BYTES = len(png_bytes) - 1
+        session_get(mock_client).return_value = streamed_response(png_bytes)
+
+        # Act
+        result = generate_achievement_image("Run", "5k", "Runner")
+
+        # Assert
+        assert result is None
+
+    @patch("quests.image_generator.get_async_image_http_client")
+    def test_agenerate_image_streams_body_and_shares_file_cache_with_sync_path(self, mock_client, png_bytes):
+        # Arrange
+        requests_seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests_seen.append(request)
+            return httpx.Response(200, content=png_bytes)
+
+        client = AsyncPooledHttpClient(max_retries=0, transport=httpx.MockTransport(handler))
+        mock_client.return_value = client
+        kwargs = {"quest_title": "Run", "quest_description": "5k", "achievement_name": "Runner", "seed": 7}
+
+        # Act
+        first = async_to_sync(agenerate_achievement_image)(**kwargs)
+        with patch("quests.image_generator.get_image_http_client") as sync_client:
+            second = generate_achievement_image(**kwargs)
+
+        # Assert
+        assert first.read() == second.read() == png_bytes
+        assert first.sha256 == second.sha256 == hashlib.sha256(png_bytes).hexdigest()
+        assert len(requests_seen) == 1
+        sync_client.return_value.download.assert_not_called()
+
+    @patch("quests.image_generator.get_async_image_http_client")
+    def test_agenerate_image_when_body_not_an_image_returns_none(self, mock_client):
+        # Arrange
+        client = AsyncPooledHttpClient(
+            max_retries=0, transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"oops"))
+        )
+        mock_client.return_value = client
+
+        # Act
+        result = async_to_sync(agenerate_achievement_image)("Run", "5k", "Runner")
+
+        # Assert
+        assert result is None
+
+    @patch("quests.image_generator.get_async_image_http_client")
+    def test_agenerate_image_when_upstream_fails_returns_none(self, mock_client):
+        # Arrange
+        mock_client.return_value.download = AsyncMock(side_effect=httpx.ConnectError("boom"))
+
+        # Act
+        result = async_to_sync(agenerate_achievement_image)("Run", "5k", "Runner")
+
+        # Assert
+        assert result is None
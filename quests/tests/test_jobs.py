@@ -0,0 +1,233 @@
+import hashlib
+import os
+import pytest
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework import status
+from quests.archive import archive_quests
+from quests.models import Quest, Achievement, ImageJob
+from quests.jobs import enqueue_image_job, claim_next_job, process_next_job, save_achievement_image, sweep_orphan_images
+
+
+@pytest.fixture
+def achievement(user: User) -> Achievement:
+    quest = Quest.objects.create(user=user, title="Q1", planned_achievement_name="A1", status="completed")
+    return Achievement.objects.create(user=user, quest=quest, name="A1")
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestImageJobs:
+    def test__process_next_job__when_generation_succeeds__saves_image_and_marks_done(
+        self, achievement: Achievement
+    ) -> None:
+        # Arrange
+        job = enqueue_image_job(achievement)
+
+        # Act
+        with patch("quests.jobs.generate_achievement_image") as mock_gen:
+            mock_gen.return_value = ContentFile(b"image_bytes")
+            processed = process_next_job()
+
+        # Assert
+        assert processed is True
+        job.refresh_from_db()
+        achievement.refresh_from_db()
+        assert job.status == "done"
+        assert job.finished_at is not None
+        assert achievement.image_status == "done"
+        assert achievement.image.size > 0
+
+    def test__process_next_job__when_generation_fails__requeues_until_max_attempts(
+        self, achievement: Achievement
+    ) -> None:
+        # Arrange
+        job = enqueue_image_job(achievement)
+
+        # Act
+        with patch("quests.jobs.generate_achievement_image", return_value=None):
+            for _ in range(ImageJob.MAX_ATTEMPTS):
+                process_next_job()
+
+        # Assert
+        job.refresh_from_db()
+        achievement.refresh_from_db()
+        assert job.status == "failed"
+        assert job.attempts == ImageJob.MAX_ATTEMPTS
+        assert achievement.image_status == "failed"
+        assert process_next_job() is False
+
+    def test__claim_next_job__when_job_already_claimed__returns_next_pending(self, achievement: Achievement) -> None:
+        # Arrange
+        first = enqueue_image_job(achievement)
+        second = enqueue_image_job(achievement)
+
+        # Act
+        claimed_first = claim_next_job()
+        claimed_second = claim_next_job()
+
+        # Assert
+        assert claimed_first.id == first.id
+        assert claimed_second.id == second.id
+        assert claim_next_job() is None
+
+    def test__image_job_list__when_other_users_jobs_exist__returns_only_own(
+        self, api_client: Any, user: User, achievement: Achievement
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        other_user = User.objects.create_user(username="other", password="password")
+        other_quest = Quest.objects.create(user=other_user, title="Q2", planned_achievement_name="A2")
+        other_achievement = Achievement.objects.create(user=other_user, quest=other_quest, name="A2")
+        own_job = enqueue_image_job(achievement)
+        enqueue_image_job(other_achievement)
+
+        # Act
+        response = api_client.get(f"/api/image-jobs/?achievement={achievement.id}")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert [job["id"] for job in response.data] == [own_job.id]
+        assert response.data[0]["status"] == "pending"
+
+
+@pytest.mark.django_db
+class TestSaveAchievementImage:
+    def test__save__names_file_by_content_hash(self, achievement: Achievement) -> None:
+        # Act
+        save_achievement_image(achievement, ContentFile(b"image", name="ignored.png"))
+
+        # Assert
+        achievement.refresh_from_db()
+        assert achievement.image.name == f"achievements/{hashlib.sha256(b'image').hexdigest()}.png"
+        assert achievement.image_status == "done"
+
+    def test__save__when_another_achievement_has_same_bytes__shares_one_file(
+        self, achievement: Achievement, user: User
+    ) -> None:
+        # Arrange
+        quest = Quest.objects.create(user=user, title="Q2", planned_achievement_name="A2", status="completed")
+        twin = Achievement.objects.create(user=user, quest=quest, name="A2")
+
+        # Act
+        save_achievement_image(achievement, ContentFile(b"same"))
+        save_achievement_image(twin, ContentFile(b"same"))
+
+        # Assert
+        assert twin.image.name == achievement.image.name
+        assert default_storage.listdir("achievements")[1] == [os.path.basename(achievement.image.name)]
+
+    def test__save__when_replacing_shared_image__keeps_file_for_other_achievement(
+        self, achievement: Achievement, user: User
+    ) -> None:
+        # Arrange
+        quest = Quest.objects.create(user=user, title="Q2", planned_achievement_name="A2", status="completed")
+        twin = Achievement.objects.create(user=user, quest=quest, name="A2")
+        save_achievement_image(achievement, ContentFile(b"same"))
+        save_achievement_image(twin, ContentFile(b"same"))
+        shared_name = achievement.image.name
+
+        # Act
+        save_achievement_image(achievement, ContentFile(b"new"))
+
+        # Assert
+        assert achievement.image.name != shared_name
+        assert default_storage.exists(shared_name)
+        twin.refresh_from_db()
+        assert twin.image.name == shared_name
+
+    def test__save__when_quest_archived_meanwhile__keeps_archive_link(self, user: User) -> None:
+        # Arrange
+        ended = timezone.now() - timedelta(days=1)
+        quest = Quest.objects.create(
+            user=user, title="Q", planned_achievement_name="A", status="completed", end_time=ended
+        )
+        Achievement.objects.create(user=user, quest=quest, name="A")
+        achievement = Achievement.objects.get(quest=quest)
+        archive_quests(before=timezone.now())
+
+        # Act
+        save_achievement_image(achievement, ContentFile(b"late"))
+
+        # Assert
+        achievement.refresh_from_db()
+        assert achievement.quest_id is None
+        assert achievement.archived_quest_id == quest.id
+        assert achievement.image_status == "done"
+
+    def test__save__when_replacing_image__leaves_old_file_to_the_sweep(self, achievement: Achievement) -> None:
+        # Arrange
+        save_achievement_image(achievement, ContentFile(b"old"))
+        old_name = achievement.image.name
+
+        # Act
+        save_achievement_image(achievement, ContentFile(b"new"))
+
+        # Assert
+        assert default_storage.exists(old_name)
+        assert default_storage.exists(achievement.image.name)
+
+
+@pytest.mark.django_db
+class TestSweepOrphanImages:
+    def test__sweep__when_orphan_younger_than_grace__keeps_it(self, achievement: Achievement) -> None:
+        # Arrange
+        save_achievement_image(achievement, ContentFile(b"old"))
+        old_name = achievement.image.name
+        save_achievement_image(achievement, ContentFile(b"new"))
+
+        # Act
+        deleted = sweep_orphan_images()
+
+        # Assert
+        assert deleted == 0
+        assert default_storage.exists(old_name)
+
+    def test__sweep__when_replaced_image_still_shared__keeps_it(self, achievement: Achievement, user: User) -> None:
+        # Arrange
+        quest = Quest.objects.create(user=user, title="Q2", planned_achievement_name="A2", status="completed")
+        twin = Achievement.objects.create(user=user, quest=quest, name="A2")
+        save_achievement_image(achievement, ContentFile(b"same"))
+        save_achievement_image(twin, ContentFile(b"same"))
+        shared_name = achievement.image.name
+        save_achievement_image(achievement, ContentFile(b"new"))
+
+        # Act
+        sweep_orphan_images(now=timezone.now() + timedelta(hours=2))
+
+        # Assert
+        assert default_storage.exists(shared_name)
+        assert default_storage.exists(achievement.image.name)
+
+    def test__save__when_reusing_old_orphan__refreshes_it_so_sweep_keeps_it(
+        self, achievement: Achievement, user: User
+    ) -> None:
+        # Arrange
+        save_achievement_image(achievement, ContentFile(b"reused"))
+        name = achievement.image.name
+        save_achievement_image(achievement, ContentFile(b"new"))
+        hours_ago = (timezone.now() - timedelta(hours=2)).timestamp()
+        os.utime(default_storage.path(name), (hours_ago, hours_ago))
+        quest = Quest.objects.create(user=user, title="Q2", planned_achievement_name="A2", status="completed")
+        twin = Achievement.objects.create(user=user, quest=quest, name="A2")
+
+        # Act
+        save_achievement_image(twin, ContentFile(b"reused"))
+        # Как если бы sweep прочитал ссылки до коммита twin: файл спасает только свежий mtime
+        Achievement.objects.filter(pk=twin.pk).update(image="")
+        deleted = sweep_orphan_images()
+
+        # Assert
+        assert deleted == 0
+        assert default_storage.exists(name)
@@ -0,0 +1,160 @@
+import pytest
+from typing import Any
+from pathlib import Path
+from django.conf import settings
+from django.test import Client
+
+VERSIONED_NAME = "achievements/achievement_1_1_0123456789ab.png"
+
+
+@pytest.fixture
+def media_file() -> Any:
+    def write(name: str, content: bytes = b"0123456789") -> Path:
+        path = Path(settings.MEDIA_ROOT) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def client() -> Client:
+    return Client()
+
+
+def test__serve_media__when_name_is_content_versioned__returns_immutable_with_etag(
+    client: Client, media_file: Any
+) -> None:
+    # Arrange
+    media_file(VERSIONED_NAME)
+
+    # Act
+    response = client.get(f"/media/{VERSIONED_NAME}")
+
+    # Assert
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == b"0123456789"
+    assert response["ETag"].startswith('"')
+    assert "immutable" in response["Cache-Control"]
+    assert response["Accept-Ranges"] == "bytes"
+
+
+@pytest.mark.parametrize(
+    "name", ["achievements/" + "ab" * 32 + ".png", "achievements/renditions/" + "ab" * 32 + "_256.webp"]
+)
+def test__serve_media__when_name_is_content_hash__returns_immutable(
+    client: Client, media_file: Any, name: str
+) -> None:
+    # Arrange
+    media_file(name)
+
+    # Act
+    response = client.get(f"/media/{name}")
+
+    # Assert
+    assert response.status_code == 200
+    assert "immutable" in response["Cache-Control"]
+
+
+def test__serve_media__when_name_not_versioned__requires_revalidation(client: Client, media_file: Any) -> None:
+    # Arrange
+    media_file("achievements/legacy.png")
+
+    # Act
+    response = client.get("/media/achievements/legacy.png")
+
+    # Assert
+    assert response.status_code == 200
+    assert "immutable" not in response["Cache-Control"]
+    assert "no-cache" in response["Cache-Control"]
+
+
+def test__serve_media__when_if_none_match_matches__returns_304(client: Client, media_file: Any) -> None:
+    # Arrange
+    media_file(VERSIONED_NAME)
+    etag = client.get(f"/media/{VERSIONED_NAME}")["ETag"]
+
+    # Act
+    response = client.get(f"/media/{VERSIONED_NAME}", HTTP_IF_NONE_MATCH=etag)
+
+    # Assert
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert response.content == b""
+
+
+def test__serve_media__when_file_content_changes__etag_changes(client: Client, media_file: Any) -> None:
+    # Arrange
+    path = media_file("achievements/legacy.png", b"old")
+    old_etag = client.get("/media/achievements/legacy.png")["ETag"]
+    path.write_bytes(b"new content")
+
+    # Act
+    response = client.get("/media/achievements/legacy.png", HTTP_IF_NONE_MATCH=old_etag)
+
+    # Assert
+    assert response.status_code == 200
+    assert response["ETag"] != old_etag
+
+
+@pytest.mark.parametrize(
+    "range_header,expected_body,expected_content_range",
+    [
+        ("bytes=2-5", b"2345", "bytes 2-5/10"),
+        ("bytes=7-", b"789", "bytes 7-9/10"),
+        ("bytes=-3", b"789", "bytes 7-9/10"),
+        ("bytes=8-100", b"89", "bytes 8-9/10"),
+    ],
+)
+def test__serve_media__when_range_requested__returns_partial_content(
+    client: Client, media_file: Any, range_header: str, expected_body: bytes, expected_content_range: str
+) -> None:
+    # Arrange
+    media_file(VERSIONED_NAME)
+
+    # Act
+    response = client.get(f"/media/{VERSIONED_NAME}", HTTP_RANGE=range_header)
+
+    # Assert
+    assert response.status_code == 206
+    assert b"".join(response.streaming_content) == expected_body
+    assert response["Content-Range"] == expected_content_range
+
+
+def test__serve_media__when_range_unsatisfiable__returns_416(client: Client, media_file: Any) -> None:
+    # Arrange
+    media_file(VERSIONED_NAME)
+
+    # Act
+    response = client.get(f"/media/{VERSIONED_NAME}", HTTP_RANGE="bytes=50-60")
+
+    # Assert
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */10"
+
+
+def test__serve_media__when_path_escapes_media_root__returns_404(client: Client, media_file: Any) -> None:
+    # Act
+    response = client.get("/media/..%2F..%2Fmanage.py")
+
+    # Assert
+    assert response.status_code == 404
+
+
+def test__serve_media__when_accel_redirect_enabled__offloads_body_to_proxy(
+    client: Client, media_file: Any, settings: Any
+) -> None:
+    # Arrange
+    settings.MEDIA_SENDFILE_HEADER = "X-Accel-Redirect"
+    settings.MEDIA_SENDFILE_PREFIX = "/protected-media/"
+    media_file(VERSIONED_NAME)
+
+    # Act
+    response = client.get(f"/media/{VERSIONED_NAME}")
+
+    # Assert
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == f"/protected-media/{VERSIONED_NAME}"
+    assert response.content == b""
+    assert "immutable" in response["Cache-Control"]
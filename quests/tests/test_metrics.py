@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from quests.image_files import spool_image
+from quests.image_generator import generate_achievement_image
+from quests.models import Quest
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def metrics_token(settings) -> str:
+    settings.METRICS_TOKEN = "scrape-secret"
+    return settings.METRICS_TOKEN
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    def test__request__records_latency_and_queries_by_route_name(self, api_client: APIClient, user: User) -> None:
+        # Arrange
+        quest = Quest.objects.create(user=user, title="Metered", planned_achievement_name="N/A")
+        labels = {"route": "quest-start", "method": "POST"}
+        before = sample("quest_http_request_duration_seconds_count", status="200", **labels)
+        queries_before = sample("quest_http_request_db_queries_sum", **labels)
+
+        # Act
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+
+        # Assert
+        assert sample("quest_http_request_duration_seconds_count", status="200", **labels) == before + 1
+        assert sample("quest_http_request_db_queries_sum", **labels) > queries_before
+
+    def test__metrics__exposes_prometheus_text(self, api_client: APIClient, metrics_token: str) -> None:
+        # Arrange
+        api_client.get("/api/quests/")
+
+        # Act
+        response = api_client.get("/metrics", HTTP_AUTHORIZATION=f"Bearer {metrics_token}")
+
+        # Assert
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        body = response.content.decode()
+        assert 'quest_http_request_duration_seconds_count{method="GET",route="quest-list",status="200"}' in body
+        assert 'quest_http_response_size_bytes_count{method="GET",route="quest-list"}' in body
+
+
+@pytest.mark.django_db
+class TestMetricsAccess:
+    @pytest.mark.parametrize("authorization", [None, "Bearer wrong", "Token scrape-secret"])
+    def test__metrics__when_token_missing_or_wrong__returns_401(self, metrics_token: str, authorization) -> None:
+        # Arrange
+        headers = {"HTTP_AUTHORIZATION": authorization} if authorization else {}
+
+        # Act
+        response = APIClient().get("/metrics", **headers)
+
+        # Assert
+        assert response.status_code == 401
+        assert response["WWW-Authenticate"].startswith("Bearer")
+
+    def test__metrics__when_token_not_configured__returns_404(self, settings) -> None:
+        # Arrange
+        settings.METRICS_TOKEN = ""
+
+        # Act
+        response = APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+
+        # Assert
+        assert response.status_code == 404
+
+
+class TestImageGenerationMetrics:
+    @patch("quests.image_generator.get_image_http_client")
+    def test__generate__when_upstream_succeeds__counts_success(self, mock_client, png_bytes: bytes) -> None:
+        # Arrange
+        mock_client.return_value.download.side_effect = lambda url, params, limit: spool_image([png_bytes], limit)
+        before = sample("quest_image_generations_total", outcome="success")
+
+        # Act
+        generate_achievement_image("Title", "Description", "Metric Name", seed=1)
+
+        # Assert
+        assert sample("quest_image_generations_total", outcome="success") == before + 1
+        assert sample("quest_image_generation_duration_seconds_count", outcome="success") >= 1
+
+    @patch("quests.image_generator.get_image_http_client")
+    def test__generate__when_cached__counts_cache_hit(self, mock_client, png_bytes: bytes) -> None:
+        # Arrange
+        mock_client.return_value.download.side_effect = lambda url, params, limit: spool_image([png_bytes], limit)
+        generate_achievement_image("Title", "Description", "Cached Name", seed=2)
+        before = sample("quest_image_generations_total", outcome="cache_hit")
+
+        # Act
+        generate_achievement_image("Title", "Description", "Cached Name", seed=2)
+
+        # Assert
+        assert sample("quest_image_generations_total", outcome="cache_hit") == before + 1
@@ -0,0 +1,175 @@
+import pytest
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from quests.expiry import expire_quests
+from quests.jobs import claim_next_speculative_image, enqueue_image_job, process_next_job, run_speculative_image
+from quests.models import Quest, Achievement, ImageJob, SpeculativeImage
+
+
+@pytest.fixture(autouse=True)
+def speculative_images(settings: Any) -> None:
+    settings.SPECULATIVE_IMAGES = True
+
+
+@pytest.fixture
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def quest(user: User) -> Quest:
+    return Quest.objects.create(user=user, title="Run", description="5k", planned_achievement_name="Runner")
+
+
+def start_and_render(api_client: APIClient, quest: Quest) -> SpeculativeImage:
+    api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+    with patch("quests.jobs.generate_achievement_image", return_value=ContentFile(b"early_image")):
+        process_next_job()
+    return SpeculativeImage.objects.get(quest=quest)
+
+
+@pytest.mark.django_db
+class TestSpeculativeImages:
+    def test__start__when_enabled__queues_render_of_planned_achievement(
+        self, api_client: APIClient, quest: Quest
+    ) -> None:
+        # Act
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+
+        # Assert
+        assert SpeculativeImage.objects.get(quest=quest).status == "pending"
+
+    def test__start__when_disabled__queues_nothing(self, api_client: APIClient, quest: Quest, settings: Any) -> None:
+        # Arrange
+        settings.SPECULATIVE_IMAGES = False
+
+        # Act
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+
+        # Assert
+        assert not SpeculativeImage.objects.exists()
+
+    def test__process_next_job__when_image_job_waiting__runs_it_before_speculative_render(
+        self, api_client: APIClient, quest: Quest, user: User
+    ) -> None:
+        # Arrange
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+        done = Quest.objects.create(user=user, title="Done", planned_achievement_name="D", status="completed")
+        job = enqueue_image_job(Achievement.objects.create(user=user, quest=done, name="D"))
+
+        # Act
+        with patch("quests.jobs.generate_achievement_image", return_value=ContentFile(b"image")) as mock_gen:
+            process_next_job()
+
+        # Assert
+        job.refresh_from_db()
+        assert job.status == "done"
+        assert SpeculativeImage.objects.get(quest=quest).status == "pending"
+        assert mock_gen.call_args.kwargs["achievement_name"] == "D"
+
+    def test__complete__when_render_ready__attaches_it_without_image_job(
+        self, api_client: APIClient, quest: Quest, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        asset = start_and_render(api_client, quest)
+        assert asset.status == "done"
+        early_name = asset.image.name
+
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(f"/api/quests/{quest.id}/complete/")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["image_status"] == "done"
+        assert response.data["image_job"] is None
+        achievement = Achievement.objects.get(quest=quest)
+        assert achievement.image.read() == b"early_image"
+        assert not ImageJob.objects.exists()
+        assert not SpeculativeImage.objects.exists()
+        assert not default_storage.exists(early_name)
+
+    def test__complete__when_quest_edited_after_render__queues_image_job_instead(
+        self, api_client: APIClient, quest: Quest
+    ) -> None:
+        # Arrange
+        start_and_render(api_client, quest)
+        api_client.patch(f"/api/quests/{quest.id}/", {"title": "Run faster"}, format="json")
+
+        # Act
+        response = api_client.post(f"/api/quests/{quest.id}/complete/")
+
+        # Assert
+        assert response.data["image_status"] == "pending"
+        assert ImageJob.objects.filter(pk=response.data["image_job"]).exists()
+        assert not SpeculativeImage.objects.exists()
+
+    def test__expire_quests__evicts_render_and_its_file(
+        self, api_client: APIClient, quest: Quest, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        asset = start_and_render(api_client, quest)
+
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            expire_quests(now=timezone.now() + timedelta(hours=1))
+
+        # Assert
+        assert not SpeculativeImage.objects.exists()
+        assert not default_storage.exists(asset.image.name)
+
+    def test__expire_quests__when_flag_turned_off_after_render__still_evicts_it(
+        self, api_client: APIClient, quest: Quest, settings: Any, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        asset = start_and_render(api_client, quest)
+        settings.SPECULATIVE_IMAGES = False
+
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            expire_quests(now=timezone.now() + timedelta(hours=1))
+
+        # Assert
+        assert not SpeculativeImage.objects.exists()
+        assert not default_storage.exists(asset.image.name)
+
+    def test__run_speculative_image__when_quest_restarted_meanwhile__discards_the_file(
+        self, api_client: APIClient, quest: Quest
+    ) -> None:
+        # Arrange
+        api_client.post(f"/api/quests/{quest.id}/start/", {"duration_minutes": 30}, format="json")
+        asset = claim_next_speculative_image()
+        SpeculativeImage.objects.filter(pk=asset.pk).delete()
+
+        # Act
+        with patch("quests.jobs.generate_achievement_image", return_value=ContentFile(b"late_image")):
+            run_speculative_image(asset)
+
+        # Assert
+        assert not default_storage.exists("speculative") or not default_storage.listdir("speculative")[1]
+
+    def test__batch__when_complete_finds_quest_expired__evicts_render(
+        self, api_client: APIClient, quest: Quest
+    ) -> None:
+        # Arrange
+        start_and_render(api_client, quest)
+        Quest.objects.filter(pk=quest.pk).update(end_time=timezone.now() - timedelta(minutes=1))
+
+        # Act
+        response = api_client.post(
+            "/api/quests/batch/", {"operations": [{"op": "complete", "id": quest.id}]}, format="json"
+        )
+
+        # Assert
+        assert response.data["results"][0]["status"] == status.HTTP_400_BAD_REQUEST
+        assert not SpeculativeImage.objects.exists()
+        assert not Achievement.objects.exists()
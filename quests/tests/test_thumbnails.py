@@ -0,0 +1,198 @@
+import pytest
+from io import BytesIO
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from rest_framework import status
+from quests.models import Quest, Achievement
+from quests.jobs import save_achievement_image, sweep_orphan_images
+from quests.thumbnails import RENDITION_FORMATS
+
+
+def png_bytes(size: int = 1024, color: str = "red") -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (size, size), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def achievement(user: User) -> Achievement:
+    quest = Quest.objects.create(user=user, title="Q1", planned_achievement_name="A1", status="completed")
+    return Achievement.objects.create(user=user, quest=quest, name="A1")
+
+
+@pytest.fixture
+def api_client() -> Any:
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestAchievementRenditions:
+    def test__save__when_image_saved__builds_webp_renditions_of_each_size(
+        self, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            achievement.image.save("trophy.png", ContentFile(png_bytes()), save=True)
+
+        # Assert
+        achievement.refresh_from_db()
+        assert achievement.renditions["source"] == achievement.image.name
+        assert set(achievement.renditions["webp"]) == {"128", "256", "512"}
+        storage = achievement.image.storage
+        with storage.open(achievement.renditions["webp"]["256"]) as rendition:
+            with Image.open(rendition) as image:
+                assert image.format == "WEBP"
+                assert image.size == (256, 256)
+
+    def test__save__when_source_smaller_than_size__does_not_upscale(
+        self, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            achievement.image.save("small.png", ContentFile(png_bytes(size=200)), save=True)
+
+        # Assert
+        assert set(achievement.renditions["webp"]) == {"128"}
+
+    def test__save__inside_transaction__builds_renditions_only_after_commit(
+        self, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Act
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            achievement.image.save("trophy.png", ContentFile(png_bytes()), save=True)
+            renditions_in_transaction = dict(achievement.renditions)
+            files_in_transaction = achievement.image.storage.exists("achievements/renditions")
+        for callback in callbacks:
+            callback()
+
+        # Assert
+        assert renditions_in_transaction == {"source": achievement.image.name}
+        assert not files_in_transaction
+        assert set(achievement.renditions["webp"]) == {"128", "256", "512"}
+        achievement.refresh_from_db()
+        assert set(achievement.renditions["webp"]) == {"128", "256", "512"}
+
+    def test__save__when_image_is_not_decodable__keeps_original_without_renditions(
+        self, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            achievement.image.save("broken.png", ContentFile(b"not an image"), save=True)
+
+        # Assert
+        assert achievement.image.size > 0
+        assert achievement.renditions == {"source": achievement.image.name}
+
+    def test__save_achievement_image__when_image_replaced__rebuilds_renditions(
+        self, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes(color="red")))
+        storage = achievement.image.storage
+        with storage.open(achievement.renditions["webp"]["128"]) as rendition:
+            old_pixel = Image.open(rendition).convert("RGB").getpixel((0, 0))
+
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes(color="blue")))
+
+        # Assert
+        with storage.open(achievement.renditions["webp"]["128"]) as rendition:
+            new_pixel = Image.open(rendition).convert("RGB").getpixel((0, 0))
+        assert old_pixel[0] > 200
+        assert new_pixel[2] > 200
+
+    def test__save_achievement_image__when_image_shared__reuses_renditions_and_keeps_them_on_replace(
+        self, achievement: Achievement, user: User, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        quest = Quest.objects.create(user=user, title="Q2", planned_achievement_name="A2", status="completed")
+        twin = Achievement.objects.create(user=user, quest=quest, name="A2")
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes()))
+        storage = achievement.image.storage
+
+        # Act
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(twin, ContentFile(png_bytes()))
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes(color="blue")))
+
+        # Assert
+        twin.refresh_from_db()
+        assert set(twin.renditions["webp"]) == {"128", "256", "512"}
+        assert all(storage.exists(name) for name in twin.renditions["webp"].values())
+        # Две разные картинки - два набора превью, у общей картинки он один
+        assert len(storage.listdir("achievements/renditions")[1]) == 2 * 3 * len(RENDITION_FORMATS)
+
+    def test__save_achievement_image__when_same_image_saved_concurrently__keeps_hash_name(
+        self, achievement: Achievement, user: User, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        quest = Quest.objects.create(user=user, title="Q2", planned_achievement_name="A2", status="completed")
+        twin = Achievement.objects.create(user=user, quest=quest, name="A2")
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes()))
+        storage = achievement.image.storage
+        exists, checked = storage.exists, []
+
+        def racing_exists(name: str) -> bool:
+            # Первая проверка отвечает "нет", как у воркера, проверившего раньше, чем первый дописал файл
+            checked.append(name)
+            return len(checked) > 1 and exists(name)
+
+        # Act
+        with patch.object(storage, "exists", side_effect=racing_exists):
+            with django_capture_on_commit_callbacks(execute=True):
+                save_achievement_image(twin, ContentFile(png_bytes()))
+
+        # Assert
+        twin.refresh_from_db()
+        assert twin.image.name == achievement.image.name
+        assert storage.listdir("achievements")[1] == [achievement.image.name.rsplit("/", 1)[1]]
+
+    def test__sweep__when_replaced_image_past_grace__deletes_it_and_its_renditions(
+        self, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes()))
+        old_name, old_renditions = achievement.image.name, list(achievement.renditions["webp"].values())
+        with django_capture_on_commit_callbacks(execute=True):
+            save_achievement_image(achievement, ContentFile(png_bytes(color="blue")))
+        storage = achievement.image.storage
+
+        # Act
+        deleted = sweep_orphan_images(now=timezone.now() + timedelta(hours=2))
+
+        # Assert
+        assert deleted == 1 + len(old_renditions) * len(RENDITION_FORMATS)
+        assert not storage.exists(old_name)
+        assert not any(storage.exists(name) for name in old_renditions)
+        assert storage.exists(achievement.image.name)
+        assert all(storage.exists(name) for name in achievement.renditions["webp"].values())
+
+    def test__achievement_list__when_renditions_exist__exposes_absolute_urls(
+        self, api_client: Any, user: User, achievement: Achievement, django_capture_on_commit_callbacks: Any
+    ) -> None:
+        # Arrange
+        api_client.force_authenticate(user=user)
+        with django_capture_on_commit_callbacks(execute=True):
+            achievement.image.save("trophy.png", ContentFile(png_bytes()), save=True)
+
+        # Act
+        response = api_client.get("/api/achievements/")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        webp = response.data[0]["image_renditions"]["webp"]
+        assert set(webp) == {"128", "256", "512"}
+        assert webp["128"].startswith("http://testserver/media/achievements/renditions/")
@@ -0,0 +1,5 @@
+from quest_service import urls
+from quests.async_views import regenerate_image
+
+# Корневой URLconf без ASGI-маршрутов: так тесты проверяют DRF-экшены, которые обслуживают WSGI-режим
+urlpatterns = [pattern for pattern in urls.urlpatterns if getattr(pattern, "callback", None) is not regenerate_image]
@@ -0,0 +1,91 @@
+import logging
+import os
+import re
+from io import BytesIO
+from PIL import Image, features
+from django.core.files.base import ContentFile
+from django.db.models.fields.files import FieldFile
+
+logger = logging.getLogger(__name__)
+
+RENDITION_SIZES = (128, 256, 512)
+# Картинки ачивок хранятся под SHA-256 содержимого (см. save_achievement_image)
+CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+RENDITION_DIR = "achievements/renditions"
+
+# (format name for Pillow, file extension, save options)
+RENDITION_FORMATS = [("WEBP", "webp", {"quality": 80, "method": 4})]
+if features.check("avif"):
+    RENDITION_FORMATS.append(("AVIF", "avif", {"quality": 60}))
+
+
+def build_renditions(image: FieldFile) -> dict:
+    """Renders downscaled copies of an achievement image for the gallery.
+
+    Returns ``{"source": <image name>, "webp": {"128": <name>, ...}, ...}``.
+    ``source`` lets the model tell whether the renditions are still current.
+    """
+    renditions: dict = {"source": image.name}
+    stem = os.path.splitext(os.path.basename(image.name))[0]
+
+    existing = _existing_renditions(image, stem)
+    if existing is not None:
+        # Та же картинка (имя - хеш содержимого) уже есть у другой ачивки: её превью подходят как есть
+        renditions.update(existing)
+        return renditions
+
+    try:
+        with image.storage.open(image.name, "rb") as source_file:
+            with Image.open(source_file) as source:
+                source.load()
+                source = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cannot build renditions for {image.name}: {e}")
+        return renditions
+
+    for pil_format, extension, options in RENDITION_FORMATS:
+        names = {}
+        for size in RENDITION_SIZES:
+            # Never upscale: a 256px source gets no 512px rendition
+            if size > max(source.size):
+                continue
+            thumbnail = source.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            buffer = BytesIO()
+            thumbnail.save(buffer, pil_format, **options)
+            name = f"{RENDITION_DIR}/{stem}_{size}.{extension}"
+            names[str(size)] = image.storage.save(name, ContentFile(buffer.getvalue()))
+        renditions[extension] = names
+
+    return renditions
+
+
+def _existing_renditions(image: FieldFile, stem: str) -> dict | None:
+    if not CONTENT_HASH_RE.match(stem):
+        return None
+    found = {}
+    for _, extension, _ in RENDITION_FORMATS:
+        names = {
+            str(size): name
+            for size in RENDITION_SIZES
+            if image.storage.exists(name := f"{RENDITION_DIR}/{stem}_{size}.{extension}")
+        }
+        if not names:
+            return None
+        found[extension] = names
+    for names in found.values():
+        for name in names.values():
+            touch_file(image.storage, name)
+    return found
+
+
+def touch_file(storage, name: str) -> None:
+    """Marks a reused file as fresh, so sweep_orphan_images leaves it alone for the grace period."""
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        return
+    try:
+        os.utime(path)
+    except OSError:
+        pass
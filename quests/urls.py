@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import QuestViewSet, AchievementViewSet
+from .views import QuestViewSet, AchievementViewSet, ImageJobViewSet, UserQuestStatsView, EventStreamTicketView
 
 router = DefaultRouter()
 router.register(r"quests", QuestViewSet, basename="quest")
 router.register(r"achievements", AchievementViewSet, basename="achievement")
+router.register(r"image-jobs", ImageJobViewSet, basename="image-job")
 
 urlpatterns = [
+    path("stats/", UserQuestStatsView.as_view(), name="user-quest-stats"),
+    path("events/ticket/", EventStreamTicketView.as_view(), name="events-ticket"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,66 @@
+import hashlib
+from typing import Any, Iterable
+from django.db.models import F
+from rest_framework import status
+from rest_framework.response import Response
+from .models import UserDataVersion
+from .response_cache import get_cached_payload, set_cached_payload
+
+
+def get_user_version(user_id: int) -> int | None:
+    return UserDataVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first()
+
+
+def bump_user_versions(user_ids: Iterable[int], create_missing: bool = False) -> None:
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    updated = UserDataVersion.objects.filter(user_id__in=user_ids).update(version=F("version") + 1)
+    if create_missing and updated < len(user_ids):
+        # Первая запись пользователя; ignore_conflicts на случай параллельного создания
+        UserDataVersion.objects.bulk_create(
+            [UserDataVersion(user_id=user_id, version=1) for user_id in user_ids], ignore_conflicts=True
+        )
+
+
+def list_etag(request: Any, version: int) -> str:
+    # Query string входит в ETag: фильтры и курсоры дают разные ответы при одной версии
+    raw = f"{request.user.id}:{version}:{request.get_full_path()}:{request.headers.get('Accept', '')}"
+    return f'W/"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+class ConditionalListMixin:
+    """Answers list requests with 304 while the user's data version is unchanged.
+
+    A matching If-None-Match costs one primary-key lookup instead of the list
+    query and serialization. Other requests are served from a cache of
+    serialized payloads keyed on the same ETag, so any bump of the version
+    (start, complete, restart, regenerate, expiry...) invalidates exactly that
+    user's cached lists.
+    """
+
+    def list(self, request: Any, *args: Any, **kwargs: Any) -> Response:
+        version = get_user_version(request.user.id)
+        if version is None:
+            # Нет версии - нечем подтвердить актуальность, ETag не выдаём
+            return super().list(request, *args, **kwargs)
+
+        etag = list_etag(request, version)
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            payload = get_cached_payload(etag)
+            if payload is not None:
+                response = Response(payload)
+                response["X-Cache"] = "HIT"
+            else:
+                response = super().list(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    set_cached_payload(etag, response.data)
+                response["X-Cache"] = "MISS"
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
@@ -1,113 +1,259 @@
 import logging
-import os
 from typing import Any
-from rest_framework import viewsets, status, decorators
+from rest_framework import viewsets, status, decorators, views
+from rest_framework.exceptions import APIException, Throttled, ValidationError
 from rest_framework.response import Response
-from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
 from django.db.models.query import QuerySet
-from .models import Quest, Achievement
-from .serializers import QuestSerializer, AchievementSerializer
+from django.utils import timezone
+from .models import (
+    Quest,
+    ArchivedQuest,
+    Achievement,
+    ImageJob,
+    UserQuestStats,
+    QuestTransitionError,
+    QuestExpiredError,
+)
+from .serializers import (
+    QuestSerializer,
+    ArchivedQuestSerializer,
+    AchievementSerializer,
+    ImageJobSerializer,
+    UserQuestStatsSerializer,
+    requested_fields,
+)
+from .filters import ChoiceAndRangeFilter, KeysetOrderingFilter
+from .pagination import QuestCursorPagination, AchievementCursorPagination
 import random
 from .image_generator import generate_achievement_image
+from .jobs import enqueue_image_job, save_achievement_image
+from .expiry import notify_deadline
+from .events import issue_stream_ticket, publish_quest_events, streaming_enabled
+from .versioning import ConditionalListMixin, bump_user_versions
+from .concurrency import get_regenerate_limiter, regenerate_flights
+from .batch import MAX_BATCH_OPERATIONS, run_batch
+from .stats import StatsDelta, apply_stats_delta, rebuild_user_stats
+from .speculative import attach_speculative_image, evict_speculative_images, queue_speculative_images
 
 logger = logging.getLogger(__name__)
 
+QUEST_CHANGED_ERROR = "Quest was changed by another request, reload it and try again."
+
 
-class QuestViewSet(viewsets.ModelViewSet):
+class QuestChanged(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = QUEST_CHANGED_ERROR
+    default_code = "conflict"
+
+
+class QuestViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = QuestSerializer
+    pagination_class = QuestCursorPagination
+    filter_backends = [ChoiceAndRangeFilter, KeysetOrderingFilter]
+    filter_choices = {
+        "status": ("status", Quest.STATUS_CHOICES),
+        "difficulty": ("difficulty", Quest.DIFFICULTY_CHOICES),
+    }
+    filter_ranges = {"created": "created_at", "end": "end_time"}
+    ordering_fields = ["created_at", "updated_at", "title"]
     DEFAULT_DURATION_MINUTES = 60
 
-    def get_queryset(self) -> QuerySet[Quest]:
-        # Каждый пользователь видит только свои квесты
-        return Quest.objects.filter(user=self.request.user)
+    def get_queryset(self) -> QuerySet[Quest] | QuerySet[ArchivedQuest]:
+        # Каждый пользователь видит только свои квесты; ачивка подтягивается тем же запросом, если её просят
+        model = ArchivedQuest if self.serves_archive else Quest
+        queryset = model.objects.filter(user=self.request.user)
+        fields = requested_fields(self.request)
+        if fields is None or "achievement" in fields:
+            queryset = queryset.select_related("achievement")
+        return queryset
+
+    def get_serializer_class(self) -> type[QuestSerializer]:
+        return ArchivedQuestSerializer if self.serves_archive else QuestSerializer
+
+    @property
+    def serves_archive(self) -> bool:
+        """?archived=true on list/retrieve reads ArchivedQuest (see quests/archive.py) instead of the hot table.
+
+        Archived quests are finished and read-only, so the other actions never see them.
+        """
+        if self.action not in ("list", "retrieve"):
+            return False
+        raw = self.request.query_params.get("archived", "false").lower()
+        if raw not in ("true", "false"):
+            raise ValidationError({"archived": "Expected true or false."})
+        return raw == "true"
+
+    @transaction.atomic
+    def perform_create(self, serializer: QuestSerializer) -> None:
+        quest = serializer.save()
+        delta = StatsDelta()
+        delta.quest_added(quest)
+        apply_stats_delta(quest.user_id, delta)
+
+    @transaction.atomic
+    def perform_update(self, serializer: QuestSerializer) -> None:
+        old_difficulty = serializer.instance.difficulty
+        new_difficulty = serializer.validated_data.get("difficulty", old_difficulty)
+        if new_difficulty != old_difficulty:
+            # Условный UPDATE: из двух параллельных смен сложности счётчики поправит только первая
+            changed = Quest.objects.filter(pk=serializer.instance.pk, difficulty=old_difficulty).update(
+                difficulty=new_difficulty
+            )
+            if not changed:
+                raise QuestChanged()
+            delta = StatsDelta()
+            delta.difficulty_changed(old_difficulty, new_difficulty)
+            apply_stats_delta(serializer.instance.user_id, delta)
+        serializer.save()
 
     @decorators.action(detail=True, methods=["post"])
     def start(self, request: Any, pk: Any = None) -> Response:
         quest = self.get_object()
-        if quest.status != "created":
-            return Response({"error": "Quest is already started or finished"}, status=status.HTTP_400_BAD_REQUEST)
+        old_status = quest.status
 
         # Устанавливаем статус и время (например, на 24 часа, если не передано иное)
         duration_minutes = request.data.get("duration_minutes", self.DEFAULT_DURATION_MINUTES)
-        quest.status = "active"
-        quest.start_time = timezone.now()
-        quest.end_time = quest.start_time + timezone.timedelta(minutes=int(duration_minutes))
-        quest.save()
+        try:
+            quest.mark_started(duration_minutes)
+        except QuestTransitionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if not self._save_transition(quest, old_status):
+                return Response({"error": QUEST_CHANGED_ERROR}, status=status.HTTP_409_CONFLICT)
+            self._record_transition(quest, old_status)
+            queue_speculative_images([quest])
+        notify_deadline(quest)
 
         return Response(QuestSerializer(quest).data)
 
     @decorators.action(detail=True, methods=["post"])
     def complete(self, request: Any, pk: Any = None) -> Response:
         quest = self.get_object()
+        old_status = quest.status
 
-        # Проверяем "лениво", не истек ли квест прямо сейчас
-        if quest.is_expired:
-            quest.status = "failed"
-            quest.save()
-            return Response({"error": "Quest time has expired"}, status=status.HTTP_400_BAD_REQUEST)
-
-        if quest.status != "active":
-            return Response({"error": "Quest must be active to complete"}, status=status.HTTP_400_BAD_REQUEST)
-
-        quest.status = "completed"
-        quest.save()
-
-        # Маппинг сложности квеста в редкость ачивки
-        difficulty_to_rarity = {
-            "easy": "bronze",
-            "medium": "silver",
-            "hard": "gold",
-            "insane": "diamond",
-        }
-        rarity = difficulty_to_rarity.get(quest.difficulty, "silver")
-
-        # Создаем ачивку с учетом редкости
-        achievement = Achievement.objects.create(
-            user=request.user, quest=quest, name=quest.planned_achievement_name, rarity=rarity
-        )
-
-        image_generated = False
         try:
-            image_content = generate_achievement_image(
-                quest_title=quest.title,
-                quest_description=quest.description,
-                achievement_name=quest.planned_achievement_name,
+            quest.mark_completed()
+        except QuestExpiredError as e:
+            with transaction.atomic():
+                # Если квест уже провалил expire_quests, счётчики поправлены там
+                if self._save_transition(quest, old_status):
+                    self._record_transition(quest, old_status)
+                    evict_speculative_images([quest.id])
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except QuestTransitionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if not self._save_transition(quest, old_status):
+                return Response({"error": QUEST_CHANGED_ERROR}, status=status.HTTP_409_CONFLICT)
+
+            # Создаем ачивку с учетом редкости
+            rarity = Achievement.RARITY_BY_DIFFICULTY.get(quest.difficulty, "silver")
+            achievement = Achievement.objects.create(
+                user=request.user, quest=quest, name=quest.planned_achievement_name, rarity=rarity
             )
-            if image_content:
-                # Сохраняем изображение с уникальным именем
-                filename = f"achievement_{achievement.id}_{quest.id}.png"
-                achievement.image.save(filename, image_content, save=True)
-                image_generated = True
-        except Exception as e:
-            # Логируем ошибку, но не прерываем создание достижения
-            logger.error(f"Failed to generate image for achievement {achievement.id}: {e}")
+            self._record_transition(quest, old_status, achievement)
 
-        return Response({"quest": QuestSerializer(quest).data, "image_generated": image_generated})
+            # Картинка, отрисованная заранее, прикрепляется сразу; иначе рисуется в фоне (см. run_image_worker)
+            job = None if attach_speculative_image(achievement) else enqueue_image_job(achievement)
+
+        return Response(
+            {
+                "quest": QuestSerializer(quest).data,
+                "image_status": achievement.image_status,
+                "image_job": job.id if job else None,
+            }
+        )
 
     @decorators.action(detail=True, methods=["post"])
     def restart(self, request: Any, pk: Any = None) -> Response:
         quest = self.get_object()
-        if quest.status != "failed":
-            return Response({"error": "Only failed quests can be restarted"}, status=status.HTTP_400_BAD_REQUEST)
-
-        quest.status = "created"
-        quest.start_time = None
-        quest.end_time = None
-        quest.save()
+        old_status = quest.status
+        try:
+            quest.mark_restarted()
+        except QuestTransitionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if not self._save_transition(quest, old_status):
+                return Response({"error": QUEST_CHANGED_ERROR}, status=status.HTTP_409_CONFLICT)
+            self._record_transition(quest, old_status)
+            evict_speculative_images([quest.id])
+        notify_deadline(quest)
 
         return Response(QuestSerializer(quest).data)
 
+    def _save_transition(self, quest: Quest, old_status: str) -> bool:
+        """Write the new status only if the row still has old_status.
+
+        Returns False when a concurrent request (or expire_quests) moved the quest first; the caller must then
+        skip the stats delta, otherwise both transitions would be counted.
+        """
+        quest.updated_at = timezone.now()
+        updated = Quest.objects.filter(pk=quest.pk, status=old_status).update(
+            status=quest.status, start_time=quest.start_time, end_time=quest.end_time, updated_at=quest.updated_at
+        )
+        if updated:
+            # .update() не шлёт post_save, версию поднимаем сами (как expire_quests)
+            bump_user_versions([quest.user_id], create_missing=True)
+        return bool(updated)
+
+    def _record_transition(self, quest: Quest, old_status: str, achievement: Achievement | None = None) -> None:
+        # Вызывается внутри транзакции перехода: статистика и событие фиксируются вместе с квестом
+        delta = StatsDelta()
+        delta.status_changed(quest, old_status, now=timezone.now())
+        if achievement is not None:
+            delta.achievement_added(achievement)
+        apply_stats_delta(quest.user_id, delta)
+        publish_quest_events([quest])
+
+    @decorators.action(detail=False, methods=["post"])
+    def batch(self, request: Any) -> Response:
+        operations = request.data.get("operations") if isinstance(request.data, dict) else request.data
+        if not isinstance(operations, list) or not operations:
+            return Response({"error": "operations must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = run_batch(
+            request.user,
+            operations,
+            default_duration_minutes=self.DEFAULT_DURATION_MINUTES,
+            serializer_context=self.get_serializer_context(),
+        )
+        return Response({"results": results})
 
-class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
+
+class AchievementViewSet(ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = AchievementSerializer
+    pagination_class = AchievementCursorPagination
+    filter_backends = [ChoiceAndRangeFilter, KeysetOrderingFilter]
+    filter_choices = {"rarity": ("rarity", Achievement.RARITY_CHOICES)}
+    filter_ranges = {"awarded": "awarded_at"}
+    ordering_fields = ["awarded_at", "name"]
 
     def get_queryset(self) -> QuerySet[Achievement]:
-        return Achievement.objects.filter(user=self.request.user)
+        queryset = Achievement.objects.filter(user=self.request.user)
+        fields = requested_fields(self.request)
+        if fields is None or fields & {"quest_title", "quest_description"}:
+            queryset = queryset.select_related("quest", "archived_quest")
+        return queryset
 
     @decorators.action(detail=True, methods=["post"])
     def regenerate_image(self, request: Any, pk: Any = None) -> Response:
         achievement = self.get_object()
-        quest = achievement.quest
+        # Двойной клик не запускает вторую генерацию: запросы ждут идущую и получают её результат
+        status_code, data = regenerate_flights.do(achievement.id, lambda: self._regenerate(achievement, request))
+        return Response(data, status=status_code)
+
+    def _regenerate(self, achievement: Achievement, request: Any) -> tuple[int, dict[str, Any]]:
+        limiter = get_regenerate_limiter()
+        if not limiter.try_acquire():
+            raise Throttled(wait=settings.IMAGE_REGENERATE_RETRY_AFTER)
+        quest = achievement.source_quest
 
         try:
             new_seed = random.randint(1, 10000)
@@ -119,27 +265,44 @@ class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
             if image_content:
-                self._save_image(achievement, image_content)
-                return Response(AchievementSerializer(achievement, context={"request": request}).data)
+                with image_content:
+                    save_achievement_image(achievement, image_content)
+                return status.HTTP_200_OK, AchievementSerializer(achievement, context={"request": request}).data
             else:
                 logger.error(f"REGENERATE: Image generator returned None for achievement {achievement.id}")
-                return Response({"error": "Failed to generate image"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                return status.HTTP_500_INTERNAL_SERVER_ERROR, {"error": "Failed to generate image"}
 
         except Exception as e:
             logger.error(f"Error regenerating image for achievement {achievement.id}: {e}")
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    def _save_image(self, achievement: Achievement, image_content: bytes) -> None:
-        if achievement.image:
-            self._replace_existing_image(achievement, image_content)
-        else:
-            filename = f"achievement_{achievement.id}_{achievement.quest.id}.png"
-            achievement.image.save(filename, image_content, save=True)
-
-    def _replace_existing_image(self, achievement: Achievement, image_content: bytes) -> None:
-        full_name = achievement.image.name
-        existing_filename = os.path.basename(full_name)
-
-        if achievement.image.storage.exists(full_name):
-            achievement.image.storage.delete(full_name)
-        achievement.image.save(existing_filename, image_content, save=True)
+            return status.HTTP_500_INTERNAL_SERVER_ERROR, {"error": str(e)}
+        finally:
+            limiter.release()
+
+
+class ImageJobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ImageJobSerializer
+
+    def get_queryset(self) -> QuerySet[ImageJob]:
+        queryset = ImageJob.objects.filter(achievement__user=self.request.user).order_by("-created_at", "-id")
+        achievement_id = self.request.query_params.get("achievement")
+        if achievement_id and achievement_id.isdigit():
+            queryset = queryset.filter(achievement_id=achievement_id)
+        return queryset
+
+
+class UserQuestStatsView(views.APIView):
+    def get(self, request: Any) -> Response:
+        # Одна выборка по первичному ключу; строки нет только у пользователей, не прошедших ни одного перехода
+        try:
+            stats = UserQuestStats.objects.get(user=request.user)
+        except UserQuestStats.DoesNotExist:
+            stats = rebuild_user_stats(request.user.id)
+        return Response(UserQuestStatsSerializer(stats).data)
+
+
+class EventStreamTicketView(views.APIView):
+    def post(self, request: Any) -> Response:
+        # Без потока (WSGI-режим) билет не нужен: 204 говорит клиенту опрашивать quests/
+        if not streaming_enabled():
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response({"ticket": issue_stream_ticket(request.user.id)})
@@ -1,21 +1,36 @@
-import time
-import subprocess
-import sys
+import os
+import signal
+from typing import Any
+import django
 
 
 def run_scheduler():
+    # Django загружается один раз на весь срок жизни процесса
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "quest_service.settings")
+    django.setup()
+
+    from django.conf import settings
+    from quests.expiry import ExpiryScheduler, expire_quests
+
     print("Starting background scheduler...")
-    while True:
-        try:
-            print("Running check_expired_quests...")
-            subprocess.run([sys.executable, "manage.py", "check_expired_quests"], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error running command: {e}")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-
-        # Wait for 60 seconds
-        time.sleep(60)
+    scheduler = ExpiryScheduler(listen_address=settings.EXPIRY_SCHEDULER_ADDRESS)
+
+    def shutdown(signum: int, frame: Any) -> None:
+        # Прерываем ожидание в select сразу, а не после следующего таймаута
+        scheduler.stop()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Всё, что истекло, пока планировщик не работал
+    print(f"Marked {expire_quests()} overdue quest(s) as failed on startup.")
+
+    try:
+        scheduler.run_forever()
+    finally:
+        scheduler.close()
+        print("Background scheduler stopped.")
 
 
 if __name__ == "__main__":